@@ -1,5 +1,6 @@
 # backend/app/api/admin_routes.py
 import os
+import shutil
 from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
 from fastapi.responses import FileResponse
 from app.services.ingest_service import (
@@ -9,54 +10,149 @@ from app.services.ingest_service import (
     search_documents,
     get_all_products_metadata,
     delete_document_by_file_id,
-    delete_product_if_empty
+    delete_product_if_empty,
+    find_file,
+    file_name_exists
 )
 from app.utils.security import require_role
 from app.services import auth_service
+from app.services.job_service import UPLOAD_DIR, submit_ingest_job, submit_if_absent, get_job, list_jobs
+from app.services.upload_service import spool_upload, discard_spooled, UploadTooLargeError
 from app.services.analytics_service import get_analytics, set_total_users, clear_failed_queries
+from app.services.embedding_cache import embedding_cache
+from app.services.embedding_batcher import batcher_stats
+from app.services.rag_service import retrieval_cache_stats
 
 router = APIRouter()
 
 # ----------------------------
 # Document Ingestion (Admin)
 # ----------------------------
-@router.post("/upload")
+def _spool_or_413(file: UploadFile) -> dict:
+    try:
+        return spool_upload(file.file)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+
+@router.post("/upload", status_code=202)
 def upload_doc(file: UploadFile = File(...), admin=Depends(require_role("admin"))):
-    file_name = file.filename
+    original_name = os.path.basename(file.filename or "")
+    if not original_name:
+        raise HTTPException(status_code=400, detail="Missing file name")
 
-    # Auto-rename if file exists
-    existing_files = [f["file_name"] for p in get_all_products_metadata() for f in p.get("files", [])]
-    original_name = file_name
-    counter = 1
-    while file_name in existing_files:
-        name, ext = os.path.splitext(original_name)
-        file_name = f"{name}_{counter}{ext}"
-        counter += 1
+    # Streamed to the spool dir in fixed-size blocks; hashed on the way in
+    spooled = _spool_or_413(file)
 
-    temp_path = f"{file_name}"
-    with open(temp_path, "wb") as f:
-        f.write(file.file.read())
+    requeued = None
 
-    try:
-        product_id = os.path.splitext(file_name)[0]
-        file_meta = ingest_pdf(product_id, temp_path)
+    def place(failed):
+        """Move the upload to where its job reads it from; runs under the job queue's lock."""
+        nonlocal requeued
+        if failed:
+            # Same content as an ingest that failed part-way: run it again under the same
+            # file id, overwriting its positional chunk ids, instead of adding a renamed copy
+            requeued = failed
+            saved_path = failed.get("local_path") or os.path.join(UPLOAD_DIR, failed["file_name"])
+            os.makedirs(os.path.dirname(saved_path), exist_ok=True)
+            shutil.move(spooled["path"], saved_path)
+            return {"product_id": failed["product_id"], "pdf_path": saved_path,
+                    "file_name": failed["file_name"], "file_id": failed["file_id"]}
 
-        # Optional: add size info (in bytes)
-        if os.path.exists(temp_path):
-            file_meta["size"] = os.path.getsize(temp_path)
+        # Auto-rename if file exists
+        file_name = original_name
+        counter = 1
+        while file_name_exists(file_name) or os.path.exists(os.path.join(UPLOAD_DIR, file_name)):
+            name, ext = os.path.splitext(original_name)
+            file_name = f"{name}_{counter}{ext}"
+            counter += 1
 
-        # Optional: store local path if you want download to work
-        file_meta["local_path"] = temp_path
+        # Keep the file until the job finishes so a restart can resume it
+        os.makedirs(UPLOAD_DIR, exist_ok=True)
+        saved_path = os.path.join(UPLOAD_DIR, file_name)
+        shutil.move(spooled["path"], saved_path)
+        return {"product_id": os.path.splitext(file_name)[0], "pdf_path": saved_path, "file_name": file_name}
 
-    finally:
-        os.remove(temp_path)
+    # Identical content: point at the existing index (or running job) instead of ingesting
+    # a copy. Only finished ingests count; a failed one is re-queued by place().
+    status, record = submit_if_absent(spooled["sha256"], place)
+    if status == "indexed":
+        discard_spooled(spooled)
+        return {
+            "message": f"File {original_name} is identical to '{record['file_name']}' "
+                       f"already indexed for product {record['product_id']}",
+            "duplicate": True,
+            "file": record
+        }
+    if status == "active":
+        discard_spooled(spooled)
+        return {
+            "message": f"File {original_name} is identical to '{record['file_name']}' "
+                       f"which is already being ingested",
+            "duplicate": True,
+            "job_id": record["job_id"],
+            "job": record
+        }
 
+    if requeued:
+        message = (f"File {record['file_name']} re-queued for ingestion into product "
+                   f"{record['product_id']} (its previous ingestion failed)")
+    else:
+        message = f"File {record['file_name']} queued for ingestion into product {record['product_id']}"
     return {
-        "message": f"File {file_name} ingested for product {product_id}",
-        "file": file_meta
+        "message": message,
+        "job_id": record["job_id"],
+        "job": record
     }
 
 
+# ----------------------------
+# Re-index a New File Version (Admin)
+# ----------------------------
+@router.post("/files/{file_id}/reindex", status_code=202)
+def reindex_file(file_id: str, file: UploadFile = File(...), admin=Depends(require_role("admin"))):
+    """
+    Replace an indexed file with a new version. Only chunks whose content
+    changed are embedded; unchanged chunks keep their vectors.
+    """
+    current = find_file(file_id)
+    if not current:
+        raise HTTPException(status_code=404, detail="File ID not found")
+
+    # The spooled file stays in place until the job swaps it in
+    spooled = _spool_or_413(file)
+    job = submit_ingest_job(
+        current["product_id"], spooled["path"], current["file_name"],
+        file_hash=spooled["sha256"], file_id=file_id, kind="reindex",
+        # Replaces the stored file where it is; files indexed before paths were recorded live in UPLOAD_DIR
+        target_path=current.get("local_path") or os.path.join(UPLOAD_DIR, current["file_name"])
+    )
+    return {
+        "message": f"File {current['file_name']} queued for incremental re-indexing",
+        "job_id": job["job_id"],
+        "job": job
+    }
+
+
+# ----------------------------
+# Ingestion Jobs (Admin)
+# ----------------------------
+@router.get("/jobs")
+def list_ingest_jobs(admin=Depends(require_role("admin"))):
+    return {"jobs": list_jobs()}
+
+
+@router.get("/jobs/{job_id}")
+def get_ingest_job(job_id: str, admin=Depends(require_role("admin"))):
+    """
+    Progress of a background ingestion: status, pages, chunks embedded, ETA and error.
+    """
+    job = get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
 # ----------------------------
 # File Download (Admin)
 # ----------------------------
@@ -65,16 +161,14 @@ def download_file(file_id: str, admin=Depends(require_role("admin"))):
     """
     Allows admin to download/view a raw uploaded file
     """
-    products = get_all_products_metadata()
-    for product in products:
-        for f in product.get("files", []):
-            if f.get("file_id") == file_id:
-                file_path = f.get("local_path")
-                if file_path and os.path.exists(file_path):
-                    return FileResponse(file_path, filename=f.get("file_name"), media_type="application/octet-stream")
-                else:
-                    raise HTTPException(status_code=404, detail="File not found on server")
-    raise HTTPException(status_code=404, detail="File ID not found")
+    f = find_file(file_id)
+    if not f:
+        raise HTTPException(status_code=404, detail="File ID not found")
+    # Files indexed before the manifest existed have no stored path; uploads keep their name
+    file_path = f.get("local_path") or os.path.join(UPLOAD_DIR, f["file_name"])
+    if not os.path.exists(file_path):
+        raise HTTPException(status_code=404, detail="File not found on server")
+    return FileResponse(file_path, filename=f.get("file_name"), media_type="application/octet-stream")
 
 
 # ----------------------------
@@ -137,7 +231,7 @@ def products_metadata(admin=Depends(require_role("admin"))):
         for f in product.get("files", []):
             # Size in bytes, optional
             if "size" not in f or not f["size"]:
-                local_path = f.get("local_path")
+                local_path = f.get("local_path") or os.path.join(UPLOAD_DIR, f["file_name"])
                 if local_path and os.path.exists(local_path):
                     f["size"] = os.path.getsize(local_path)
                 else:
@@ -181,3 +275,15 @@ def delete_user(username: str, admin=Depends(require_role("admin"))):
 def get_admin_analytics(admin=Depends(require_role("admin"))):
     set_total_users(len(auth_service.list_users()))
     return get_analytics()
+
+
+@router.get("/embedding_cache")
+def get_embedding_cache_stats(admin=Depends(require_role("admin"))):
+    """Hit rates, sizes and evictions of the embedding cache tiers, plus query micro-batching counters."""
+    return {**embedding_cache.stats(), "batching": batcher_stats()}
+
+
+@router.get("/retrieval_cache")
+def get_retrieval_cache_stats(admin=Depends(require_role("admin"))):
+    """Hit / miss counters of the query-embedding LRU, the collection handle cache and the answer cache."""
+    return retrieval_cache_stats()
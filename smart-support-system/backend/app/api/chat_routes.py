@@ -1,10 +1,14 @@
+import json
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import List, Optional
 from app.services import conversation_service
 from app.utils.security import require_role
-from app.services.rag_pipeline import query_groq_rag, generate_suggestions_from_rag
-from app.services.rag_service import answer_question
+from app.services.rag_pipeline import query_groq_rag_async, stream_groq_rag_async
+from app.services.suggestion_service import get_suggestions
+from app.services.rag_service import answer_question_async
 from app.services.analytics_service import record_query
 
 router = APIRouter(prefix="/chat", tags=["Chat"])
@@ -57,6 +61,50 @@ def is_failed_query(answer_text: str) -> bool:
         return True
     return any(ft.lower() in answer_text.lower() for ft in fallback_texts)
 
+def save_exchange(username: str, chat_id: str, product_id: str, question: str, answer: dict) -> str:
+    """Store the question and the answer in the chat and record analytics; returns the answer text."""
+    answer_text = answer.get("answer", str(answer))
+
+    # Save user message
+    conversation_service.add_message(
+        username=username,
+        chat_id=chat_id,
+        role="user",
+        text=question,
+        product_id=product_id,
+        sources=[]
+    )
+
+    # Save assistant message
+    conversation_service.add_message(
+        username=username,
+        chat_id=chat_id,
+        role="assistant",
+        text=answer_text,
+        product_id=product_id,
+        sources=answer.get("sources", [])
+    )
+
+    # Record analytics
+    success = not is_failed_query(answer_text)
+    record_query(product_id, success, question, answer_text)
+    return answer_text
+
+def save_to_latest_chat(username: str, product_id: str, question: str, answer: dict) -> dict:
+    """save_exchange into the user's most recent chat (a new one if there is none); returns that chat."""
+    chats = conversation_service.get_all_chats(username)
+    chat = chats[-1] if chats else conversation_service.create_new_chat(username)
+    save_exchange(username, chat["id"], product_id, question, answer)
+    return conversation_service.get_chat(username, chat["id"])
+
+def save_to_chat(username: str, chat_id: str, product_id: str, question: str, answer: dict) -> Optional[dict]:
+    """save_exchange into chat `chat_id`; returns the updated chat, or None if it doesn't exist."""
+    save_exchange(username, chat_id, product_id, question, answer)
+    return conversation_service.get_chat(username, chat_id)
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
 # -----------------------------
 # Multi-Chat System
 # -----------------------------
@@ -75,112 +123,82 @@ def get_chat_by_id(chat_id: str, user=Depends(require_role("user"))):
 def new_chat(user=Depends(require_role("user"))):
     return conversation_service.create_new_chat(user["sub"])
 
+# The LLM-bound endpoints below are async: the Groq call is awaited and the CPU work
+# (embedding, retrieval) runs on the CPU executor, so waiting on Groq holds no thread.
+# Conversation / analytics writes are file I/O and go to the threadpool.
 @router.post("/{chat_id}/message", response_model=ChatResponse)
-def send_message(chat_id: str, message: MessageSchema, user=Depends(require_role("user"))):
+async def send_message(chat_id: str, message: MessageSchema, user=Depends(require_role("user"))):
     if not message.question.strip() or len(message.question.strip()) < 3:
         raise HTTPException(status_code=400, detail="Please provide a valid question.")
 
     # Get AI response from RAG pipeline
-    answer = query_groq_rag(message.product_id, message.question)
-    answer_text = answer.get("answer", str(answer))
-
-    # Save user message
-    conversation_service.add_message(
-        username=user["sub"],
-        chat_id=chat_id,
-        role="user",
-        text=message.question,
-        product_id=message.product_id,
-        sources=[]
+    answer = await query_groq_rag_async(message.product_id, message.question)
+    updated_chat = await run_in_threadpool(
+        save_to_chat, user["sub"], chat_id, message.product_id, message.question, answer
     )
-
-    # Save assistant message
-    conversation_service.add_message(
-        username=user["sub"],
-        chat_id=chat_id,
-        role="assistant",
-        text=answer_text,
-        product_id=message.product_id,
-        sources=answer.get("sources", [])
-    )
-
-    # Record analytics
-    success = not is_failed_query(answer_text)
-    record_query(message.product_id, success, message.question, answer_text)
-
-    updated_chat = conversation_service.get_chat(user["sub"], chat_id)
     if not updated_chat:
         raise HTTPException(status_code=404, detail="Chat not found")
     return updated_chat
 
+@router.post("/{chat_id}/message/stream")
+async def send_message_stream(chat_id: str, message: MessageSchema, user=Depends(require_role("user"))):
+    """
+    Server-Sent Events version of /{chat_id}/message. Events, in order:
+    `sources` ({"sources": [...]}) once retrieval is done, `token` ({"text": ...}) for
+    every piece of the answer as Groq generates it, then `done` ({"answer", "chat"})
+    after the exchange was saved, or `error` ({"detail"}) if generation failed.
+    """
+    if not message.question.strip() or len(message.question.strip()) < 3:
+        raise HTTPException(status_code=400, detail="Please provide a valid question.")
+    # Checked up front: once streaming has started the status code can't change
+    if not await run_in_threadpool(conversation_service.get_chat, user["sub"], chat_id):
+        raise HTTPException(status_code=404, detail="Chat not found")
+
+    async def events():
+        answer = None
+        try:
+            async for kind, payload in stream_groq_rag_async(message.product_id, message.question):
+                if kind == "sources":
+                    yield sse_event("sources", {"sources": payload})
+                elif kind == "token":
+                    yield sse_event("token", {"text": payload})
+                else:
+                    answer = payload
+        except Exception as e:
+            yield sse_event("error", {"detail": str(e)})
+            return
+
+        # Saved only for a complete answer, like the non-streaming endpoint
+        chat = await run_in_threadpool(
+            save_to_chat, user["sub"], chat_id, message.product_id, message.question, answer
+        )
+        yield sse_event("done", {"answer": answer.get("answer", str(answer)), "chat": chat})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # No caching or proxy buffering, so each token reaches the client when it is sent
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # -----------------------------
 # Legacy Endpoints (Backward Compatibility)
 # -----------------------------
 @router.post("/", response_model=ChatResponse)
-def chat_post(request: ChatQuery, user=Depends(require_role("user"))):
+async def chat_post(request: ChatQuery, user=Depends(require_role("user"))):
     if not request.question.strip() or len(request.question.strip()) < 3:
         raise HTTPException(status_code=400, detail="Please provide a valid question.")
 
-    answer = query_groq_rag(request.product_id, request.question)
-    answer_text = answer.get("answer", str(answer))
-
-    chats = conversation_service.get_all_chats(user["sub"])
-    chat = chats[-1] if chats else conversation_service.create_new_chat(user["sub"])
-
-    conversation_service.add_message(
-        username=user["sub"],
-        chat_id=chat["id"],
-        role="user",
-        text=request.question,
-        product_id=request.product_id,
-        sources=[]
-    )
-    conversation_service.add_message(
-        username=user["sub"],
-        chat_id=chat["id"],
-        role="assistant",
-        text=answer_text,
-        product_id=request.product_id,
-        sources=answer.get("sources", [])
-    )
-
-    success = not is_failed_query(answer_text)
-    record_query(request.product_id, success, request.question, answer_text)
-
-    return conversation_service.get_chat(user["sub"], chat["id"])
+    answer = await query_groq_rag_async(request.product_id, request.question)
+    return await run_in_threadpool(save_to_latest_chat, user["sub"], request.product_id, request.question, answer)
 
 @router.post("/qa", response_model=ChatResponse)
-def qa_post(request: QARequest, user=Depends(require_role("user"))):
+async def qa_post(request: QARequest, user=Depends(require_role("user"))):
     if not request.question.strip() or len(request.question.strip()) < 3:
         raise HTTPException(status_code=400, detail="Please provide a valid question.")
 
-    answer = answer_question(request.product_id, request.question)
-    answer_text = answer.get("answer", str(answer))
-
-    chats = conversation_service.get_all_chats(user["sub"])
-    chat = chats[-1] if chats else conversation_service.create_new_chat(user["sub"])
-
-    conversation_service.add_message(
-        username=user["sub"],
-        chat_id=chat["id"],
-        role="user",
-        text=request.question,
-        product_id=request.product_id,
-        sources=[]
-    )
-    conversation_service.add_message(
-        username=user["sub"],
-        chat_id=chat["id"],
-        role="assistant",
-        text=answer_text,
-        product_id=request.product_id,
-        sources=answer.get("sources", [])
-    )
-
-    success = not is_failed_query(answer_text)
-    record_query(request.product_id, success, request.question, answer_text)
-
-    return conversation_service.get_chat(user["sub"], chat["id"])
+    answer = await answer_question_async(request.product_id, request.question)
+    return await run_in_threadpool(save_to_latest_chat, user["sub"], request.product_id, request.question, answer)
 
 # -----------------------------
 # AI Suggestions per Product
@@ -188,9 +206,10 @@ def qa_post(request: QARequest, user=Depends(require_role("user"))):
 @router.get("/{product_id}/suggestions", response_model=SuggestionResponse)
 def get_query_suggestions(product_id: str, user=Depends(require_role("user"))):
     """
-    Generate top 3 AI suggestions for user queries based on product's PDF / vector DB.
+    Top 3 AI suggestions for user queries based on product's PDF / vector DB.
+    Built when the product's ingestion finishes; this only reads them.
     """
-    suggestions = generate_suggestions_from_rag(product_id)
+    suggestions = get_suggestions(product_id)
     if not suggestions or len(suggestions) == 0:
         raise HTTPException(status_code=404, detail="No suggestions available for this product.")
     return {"suggestions": suggestions}
@@ -0,0 +1,84 @@
+# backend/app/benchmarks/bench_chunker.py
+# Compare the token-aware chunker with the legacy RecursiveCharacterTextSplitter.
+#
+# Usage (from backend/):
+#   python -m app.benchmarks.bench_chunker path/to/manual.pdf [--qa qa.json] [--k 4]
+#
+# qa.json is a list of {"question": "...", "answer": "..."}; a question counts as
+# recalled when its answer string appears in one of the top-k retrieved chunks.
+import os
+import json
+import time
+import argparse
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from app.services.pdf_extract import iter_pdf_pages
+from app.services.chunker import TokenChunker, tokenizer_counter
+
+EMB_MODEL = os.getenv("EMB_MODEL", "all-MiniLM-L6-v2")
+
+
+def chunk_recursive(pages):
+    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+    return [(c, {"page": n}) for n, t in pages if t.strip() for c in splitter.split_text(t)]
+
+
+def chunk_token(pages, model, max_tokens, overlap):
+    chunker = TokenChunker(min(max_tokens, model.max_seq_length - 2), overlap, tokenizer_counter(model.tokenizer))
+    return list(chunker.chunk_pages((n, t) for n, t in pages if t.strip()))
+
+
+def recall_at_k(model, chunks, qa, k):
+    texts = [c for c, _ in chunks]
+    doc_emb = model.encode(texts, batch_size=64, normalize_embeddings=True)
+    q_emb = model.encode([q["question"] for q in qa], normalize_embeddings=True)
+    top = np.argsort(-(q_emb @ doc_emb.T), axis=1)[:, :k]
+    hits = sum(
+        any(item["answer"].lower() in texts[i].lower() for i in row)
+        for item, row in zip(qa, top)
+    )
+    return hits / len(qa)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PDF chunkers")
+    parser.add_argument("pdf")
+    parser.add_argument("--qa", help="JSON list of {question, answer} pairs for recall@k")
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--max-tokens", type=int, default=200)
+    parser.add_argument("--overlap", type=int, default=32)
+    args = parser.parse_args()
+
+    model = SentenceTransformer(EMB_MODEL)
+    count = tokenizer_counter(model.tokenizer)
+    limit = model.max_seq_length - 2
+    pages = list(iter_pdf_pages(args.pdf))
+    total_chars = sum(len(t) for _, t in pages)
+    qa = json.load(open(args.qa)) if args.qa else None
+
+    runs = {
+        "recursive_1000_200": lambda: chunk_recursive(pages),
+        f"token_{args.max_tokens}_{args.overlap}": lambda: chunk_token(pages, model, args.max_tokens, args.overlap),
+    }
+    print(f"{len(pages)} pages, {total_chars} chars, model limit {limit} tokens\n")
+    for name, run in runs.items():
+        start = time.perf_counter()
+        chunks = run()
+        elapsed = time.perf_counter() - start
+        tokens = count([c for c, _ in chunks])
+        truncated = sum(t > limit for t in tokens)
+        print(f"[{name}]")
+        print(f"  chunks:      {len(chunks)}")
+        print(f"  throughput:  {total_chars / elapsed / 1e6:.2f} MB/s ({elapsed * 1000:.1f} ms)")
+        print(f"  tokens/chunk: mean {np.mean(tokens):.0f}, max {max(tokens)}")
+        print(f"  truncated:   {truncated} ({truncated / len(chunks):.1%}) exceed the model limit")
+        if qa:
+            print(f"  recall@{args.k}:   {recall_at_k(model, chunks, qa, args.k):.3f}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
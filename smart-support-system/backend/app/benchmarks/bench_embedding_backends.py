@@ -0,0 +1,108 @@
+# backend/app/benchmarks/bench_embedding_backends.py
+# Compare embedding backends: PyTorch SentenceTransformer, ONNX fp32 and ONNX int8.
+#
+# Usage (from backend/):
+#   python -m app.benchmarks.bench_embedding_backends path/to/manual.pdf [--queries q.txt] [--k 4]
+#       [--backends torch,onnx,onnx-int8] [--threads 0]
+#
+# Reports single-query latency (p50/p95), batch throughput, resident memory added by
+# loading the backend, and agreement with the first backend: mean cosine between the
+# vectors of the same text and top-k retrieval overlap. Memory is measured in one
+# process, so run one backend per invocation for absolute numbers.
+# q.txt holds one query per line; without it the first sentence of every 10th chunk is used.
+import os
+import time
+import argparse
+
+import numpy as np
+import psutil
+from sentence_transformers import SentenceTransformer
+
+from app.services.pdf_extract import iter_pdf_pages
+from app.services.chunker import TokenChunker, tokenizer_counter
+from app.services.onnx_embedder import OnnxEmbedder, _model_dir, export_onnx, EXPORT_CONFIG
+
+EMB_MODEL = os.getenv("EMB_MODEL", "all-MiniLM-L6-v2")
+ONNX_DIR = os.getenv("ONNX_DIR", "onnx_models")
+
+
+def load_backend(name, threads):
+    if name == "torch":
+        return SentenceTransformer(EMB_MODEL, device="cpu")
+    model_dir = _model_dir(ONNX_DIR, EMB_MODEL)
+    if not os.path.exists(os.path.join(model_dir, EXPORT_CONFIG)):
+        export_onnx(EMB_MODEL, model_dir)
+    return OnnxEmbedder(model_dir, quantized=name == "onnx-int8", intra_op_threads=threads)
+
+
+def rss_mb():
+    return psutil.Process().memory_info().rss / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark embedding backends")
+    parser.add_argument("pdf")
+    parser.add_argument("--queries", help="Text file with one query per line")
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--backends", default="torch,onnx,onnx-int8")
+    parser.add_argument("--threads", type=int, default=0, help="onnxruntime intra-op threads (0 = auto)")
+    parser.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+
+    backends = args.backends.split(",")
+    pages = [(n, t) for n, t in iter_pdf_pages(args.pdf) if t.strip()]
+    chunker = TokenChunker(200, 32)
+    chunks = [c for c, _ in chunker.chunk_pages(pages)]
+    if args.queries:
+        queries = [q.strip() for q in open(args.queries) if q.strip()]
+    else:
+        queries = [c.split(".")[0][:200] for c in chunks[::10]]
+    print(f"{len(chunks)} chunks, {len(queries)} queries, model {EMB_MODEL}\n")
+
+    reference = None
+    for name in backends:
+        before = rss_mb()
+        start = time.perf_counter()
+        model = load_backend(name, args.threads)
+        load_seconds = time.perf_counter() - start
+        memory = rss_mb() - before
+
+        # Chunks were sized with the approximate counter; report any the model would truncate
+        if reference is None:
+            count = tokenizer_counter(model.tokenizer)
+            too_long = sum(t > model.max_seq_length for t in count(chunks))
+            if too_long:
+                print(f"note: {too_long} chunks exceed {model.max_seq_length} tokens and are truncated\n")
+
+        model.encode(queries[:2])  # warm up
+        latencies = []
+        for q in queries:
+            t0 = time.perf_counter()
+            model.encode([q])
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+        t0 = time.perf_counter()
+        doc_emb = np.asarray(model.encode(chunks, batch_size=args.batch_size), dtype=np.float32)
+        throughput = len(chunks) / (time.perf_counter() - t0)
+        q_emb = np.asarray(model.encode(queries, batch_size=args.batch_size), dtype=np.float32)
+        top = np.argsort(-(q_emb @ doc_emb.T), axis=1)[:, :args.k]
+
+        print(f"[{name}]")
+        print(f"  load:        {load_seconds:.2f}s, +{memory:.0f} MB RSS")
+        print(f"  latency:     p50 {np.percentile(latencies, 50):.2f} ms, p95 {np.percentile(latencies, 95):.2f} ms")
+        print(f"  throughput:  {throughput:.1f} chunks/sec (batch {args.batch_size})")
+        if reference is None:
+            reference = (name, doc_emb, top)
+        else:
+            ref_name, ref_emb, ref_top = reference
+            cosine = np.sum(doc_emb * ref_emb, axis=1) / (
+                np.linalg.norm(doc_emb, axis=1) * np.linalg.norm(ref_emb, axis=1))
+            overlap = np.mean([len(set(a) & set(b)) / args.k for a, b in zip(top, ref_top)])
+            print(f"  vs {ref_name}:    cosine mean {cosine.mean():.4f}, min {cosine.min():.4f}; "
+                  f"top-{args.k} overlap {overlap:.3f}")
+        print()
+        del model
+
+
+if __name__ == "__main__":
+    main()
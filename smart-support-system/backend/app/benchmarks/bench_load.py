@@ -0,0 +1,271 @@
+# backend/app/benchmarks/bench_load.py
+# End-to-end load test of the chat RAG path (HTTP, auth, embedding, retrieval, LLM,
+# conversation + analytics writes) with the LLM replaced by the local stub backend
+# (app.services.llm_provider), so it needs neither a network nor Groq quota.
+#
+# Usage (from backend/):
+#   python -m app.benchmarks.bench_load --product <id> [--pdf manual.pdf] [--rate 20] [--duration 30]
+#       [--concurrency 64] [--stream] [--latency-ms 300] [--latency-dist lognormal] [--spread 0.5]
+#       [--tokens-per-sec 400] [--output-tokens 150] [--error-rate 0] [--answer-cache]
+#   python -m app.benchmarks.bench_load --url http://host:8000 --token <jwt> --product <id> [...]
+#
+# Without --url the app is served from this process by uvicorn on a free port, with the
+# stub LLM configured from the flags and conversations / analytics written to a temporary
+# directory. --pdf first ingests that file into --product; point CHROMA_PERSIST_DIR /
+# VECTOR_STORE_DIR / MANIFEST_PATH at a scratch directory to keep it out of the real index.
+# The client shares the process (and the GIL) with the server: for high rates start the
+# server separately with LLM_PROVIDER=stub and use --url (the stub flags don't apply then).
+#
+# Open loop by default: requests arrive as a Poisson process at --rate per second no matter
+# how fast the server is, and wait client-side while --concurrency requests are in flight
+# (reported as queueing). --rate 0 runs closed loop: --concurrency clients back to back.
+import os
+import time
+import random
+import socket
+import asyncio
+import argparse
+import tempfile
+import threading
+from collections import Counter
+
+import numpy as np
+
+QUESTIONS = [
+    "How do I reset the device to factory settings?",
+    "What does the warranty cover?",
+    "How long does the battery last?",
+    "How do I connect it to Wi-Fi?",
+    "What should I do if it does not turn on?",
+    "How do I update the firmware?",
+    "What are the safety instructions?",
+    "How do I clean and maintain it?",
+    "Which accessories are included in the box?",
+    "How can I contact customer support?",
+]
+
+
+def configure_in_process(args, workdir):
+    """Env for the app imported by serve(); must run before anything from app is imported."""
+    os.environ["LLM_PROVIDER"] = "stub"
+    os.environ["STUB_LLM_LATENCY_MS"] = str(args.latency_ms)
+    os.environ["STUB_LLM_LATENCY_DIST"] = args.latency_dist
+    os.environ["STUB_LLM_LATENCY_SPREAD"] = str(args.spread)
+    os.environ["STUB_LLM_TOKENS_PER_SEC"] = str(args.tokens_per_sec)
+    os.environ["STUB_LLM_OUTPUT_TOKENS"] = str(args.output_tokens)
+    os.environ["STUB_LLM_ERROR_RATE"] = str(args.error_rate)
+    os.environ["STUB_LLM_SEED"] = str(args.seed)
+    os.environ["ANSWER_CACHE_ENABLED"] = "true" if args.answer_cache else "false"
+    os.environ.setdefault("SUGGESTIONS_DIR", os.path.join(workdir, "suggestions"))
+
+
+def serve(args, workdir):
+    """Start the app on a free local port; returns (base_url, token, stop)."""
+    import uvicorn
+    from app.main import app
+    from app.services import conversation_service, analytics_service, ingest_service
+    from app.services.auth_service import generate_token
+
+    conversation_service.CONVO_FILE = os.path.join(workdir, "conversations.json")
+    analytics_service.ANALYTICS_FILE = os.path.join(workdir, "analytics.json")
+    if args.pdf:
+        result = ingest_service.ingest_pdf(args.product, args.pdf, file_name=os.path.basename(args.pdf))
+        print(f"Ingested {args.pdf} into product {args.product}: {result.get('chunks')} chunks")
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    def stop():
+        server.should_exit = True
+        thread.join()
+    return f"http://127.0.0.1:{port}", generate_token("loadtest", "user"), stop
+
+
+def percentiles(values):
+    if not values:
+        return "-"
+    p50, p95, p99 = np.percentile(values, [50, 95, 99]) * 1000
+    return f"p50 {p50:8.1f} ms   p95 {p95:8.1f} ms   p99 {p99:8.1f} ms   max {max(values) * 1000:8.1f} ms"
+
+
+class LoadTest:
+    def __init__(self, client, args, chat_ids):
+        self.client = client
+        self.args = args
+        self.chat_ids = chat_ids
+        self.slots = asyncio.Semaphore(args.concurrency) if args.concurrency else None
+        self.queue, self.ttft, self.latency, self.total = [], [], [], []
+        self.errors = Counter()
+        self.ok = 0
+        self.sent = 0
+        self.last_done = None
+
+    async def _send(self, i: int):
+        chat_id = self.chat_ids[i % len(self.chat_ids)]
+        body = {"chat_id": chat_id, "product_id": self.args.product, "question": QUESTIONS[i % len(QUESTIONS)]}
+        loop = asyncio.get_running_loop()
+        sent = loop.time()
+        if not self.args.stream:
+            r = await self.client.post(f"/chat/{chat_id}/message", json=body)
+            return (None if r.status_code == 200 else f"HTTP {r.status_code}"), None, loop.time() - sent
+
+        first_token, event, outcome = None, None, "no done event"
+        async with self.client.stream("POST", f"/chat/{chat_id}/message/stream", json=body) as r:
+            if r.status_code != 200:
+                return f"HTTP {r.status_code}", None, loop.time() - sent
+            async for line in r.aiter_lines():
+                if line.startswith("event: "):
+                    event = line[len("event: "):]
+                    if event == "token" and first_token is None:
+                        first_token = loop.time() - sent
+                    elif event == "error":
+                        outcome = "stream error"
+                    elif event == "done":
+                        outcome = None
+        return outcome, first_token, loop.time() - sent
+
+    async def request(self, i: int, arrived: float, record: bool = True):
+        loop = asyncio.get_running_loop()
+        if self.slots:
+            await self.slots.acquire()
+        try:
+            queued = loop.time() - arrived
+            try:
+                error, first_token, latency = await self._send(i)
+            except Exception as e:
+                error, first_token, latency = type(e).__name__, None, loop.time() - arrived - queued
+        finally:
+            if self.slots:
+                self.slots.release()
+        if not record:
+            return
+        self.sent += 1
+        self.last_done = loop.time()
+        self.queue.append(queued)
+        if error:
+            self.errors[error] += 1
+            return
+        self.ok += 1
+        self.latency.append(latency)
+        self.total.append(queued + latency)
+        if first_token is not None:
+            self.ttft.append(first_token)
+
+    async def open_loop(self, started: float):
+        loop = asyncio.get_running_loop()
+        rng = random.Random(self.args.seed)
+        tasks, arrival, i = [], started, 0
+        while True:
+            arrival += rng.expovariate(self.args.rate)
+            if arrival - started > self.args.duration:
+                break
+            await asyncio.sleep(max(arrival - loop.time(), 0))
+            tasks.append(asyncio.create_task(self.request(i, arrival)))
+            i += 1
+        await asyncio.gather(*tasks)
+
+    async def closed_loop(self, started: float):
+        loop = asyncio.get_running_loop()
+
+        async def worker(w: int):
+            i = w
+            while loop.time() - started < self.args.duration:
+                await self.request(i, loop.time())
+                i += self.args.concurrency
+        await asyncio.gather(*(worker(w) for w in range(self.args.concurrency)))
+
+    def report(self, started: float):
+        elapsed = (self.last_done or started) - started
+        mode = (f"open loop, {self.args.rate:g} req/s offered" if self.args.rate
+                else f"closed loop, {self.args.concurrency} clients")
+        print(f"\n{mode}, {'streaming' if self.args.stream else 'non-streaming'}, {elapsed:.1f}s")
+        print(f"  requests:    {self.sent} sent, {self.ok} ok, {sum(self.errors.values())} failed"
+              + (f" ({dict(self.errors)})" if self.errors else ""))
+        print(f"  throughput:  {self.ok / elapsed if elapsed else 0:.2f} answers/s")
+        print(f"  queueing:    {percentiles(self.queue)}")
+        if self.args.stream:
+            print(f"  first token: {percentiles(self.ttft)}")
+        print(f"  latency:     {percentiles(self.latency)}")
+        print(f"  end-to-end:  {percentiles(self.total)}")
+
+
+async def run(args, base_url, token):
+    import httpx
+
+    limits = httpx.Limits(max_connections=args.concurrency or None, max_keepalive_connections=args.concurrency or None)
+    async with httpx.AsyncClient(base_url=base_url, headers={"Authorization": f"Bearer {token}"},
+                                 timeout=args.timeout, limits=limits) as client:
+        ready = await client.get("/ready")
+        while ready.status_code == 503 and not ready.json().get("error"):
+            await asyncio.sleep(0.2)
+            ready = await client.get("/ready")
+        print(f"Server ready: {ready.json().get('load_seconds')}")
+
+        chat_ids = []
+        for _ in range(args.chats):
+            r = await client.post("/chat/new")
+            r.raise_for_status()
+            chat_ids.append(r.json()["id"])
+
+        test = LoadTest(client, args, chat_ids)
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(test.request(i, loop.time(), record=False) for i in range(args.warmup)))
+
+        started = loop.time()
+        if args.rate:
+            await test.open_loop(started)
+        else:
+            await test.closed_loop(started)
+        test.report(started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the chat RAG path with a stub LLM")
+    parser.add_argument("--product", required=True, help="product id to ask about")
+    parser.add_argument("--pdf", help="ingest this PDF into --product first (in-process only)")
+    parser.add_argument("--url", help="test a running server instead of serving the app in-process")
+    parser.add_argument("--token", help="user JWT for --url")
+    parser.add_argument("--rate", type=float, default=20, help="arrivals per second; 0 = closed loop")
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--concurrency", type=int, default=64, help="max requests in flight; 0 = unlimited")
+    parser.add_argument("--stream", action="store_true", help="use the SSE endpoint and measure first token")
+    parser.add_argument("--chats", type=int, default=8, help="conversations the requests are spread over")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--answer-cache", action="store_true", help="leave the answer cache on")
+    parser.add_argument("--seed", type=int, default=0)
+    stub = parser.add_argument_group("stub LLM (in-process only)")
+    stub.add_argument("--latency-ms", type=float, default=300, help="median time to first token")
+    stub.add_argument("--latency-dist", default="lognormal",
+                      choices=["fixed", "uniform", "normal", "lognormal", "exponential"])
+    stub.add_argument("--spread", type=float, default=0.5)
+    stub.add_argument("--tokens-per-sec", type=float, default=400)
+    stub.add_argument("--output-tokens", type=int, default=150)
+    stub.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    if args.rate == 0 and not args.concurrency:
+        parser.error("closed loop (--rate 0) needs --concurrency")
+    if args.url and not args.token:
+        parser.error("--url needs --token")
+
+    if args.url:
+        asyncio.run(run(args, args.url.rstrip("/"), args.token))
+        return
+
+    with tempfile.TemporaryDirectory() as workdir:
+        configure_in_process(args, workdir)
+        base_url, token, stop = serve(args, workdir)
+        try:
+            asyncio.run(run(args, base_url, token))
+        finally:
+            stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# backend/app/benchmarks/bench_vector_store.py
+# Head-to-head: Chroma (HNSW) vs the mmap vector store, exact and IVF.
+#
+# Usage (from backend/):
+#   python -m app.benchmarks.bench_vector_store [--n 100000] [--dim 384] [--queries 200] [--k 4]
+#       [--nprobe 8] [--dtype float32] [--backends chroma,mmap,mmap-ivf]
+#
+# Vectors are random unit vectors around a few hundred centres (roughly the shape of
+# chunk embeddings). Reports load time, query latency (p50/p95) and recall@k against
+# exact search. Every store is built in a temporary directory.
+import os
+import time
+import tempfile
+import argparse
+
+import numpy as np
+
+from app.services import vector_store
+from app.services.vector_store import MmapVectorClient
+
+
+def make_vectors(n, dim, seed=0):
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(max(n // 300, 1), dim)).astype(np.float32)
+    vectors = centres[rng.integers(0, len(centres), n)] + 0.5 * rng.normal(size=(n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def build(name, directory, ids, vectors, batch_size):
+    if name == "chroma":
+        import chromadb
+        client = chromadb.PersistentClient(path=directory)
+        collection = client.get_or_create_collection("bench")
+    else:
+        # Segments at least IVF_MIN_ROWS long get IVF lists when they are written
+        vector_store.IVF_MIN_ROWS = 1 if name == "mmap-ivf" else len(ids) + 1
+        collection = MmapVectorClient(directory).get_or_create_collection("bench")
+    for start in range(0, len(ids), batch_size):
+        collection.upsert(ids=ids[start:start + batch_size], embeddings=vectors[start:start + batch_size],
+                          documents=[f"doc {i}" for i in range(start, min(start + batch_size, len(ids)))])
+    return collection
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark vector store backends")
+    parser.add_argument("--n", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--nprobe", type=int, default=8)
+    parser.add_argument("--dtype", default="float32", choices=["float32", "float16"])
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--backends", default="chroma,mmap,mmap-ivf")
+    args = parser.parse_args()
+
+    vector_store.VECTOR_STORE_DTYPE = args.dtype
+    vector_store.IVF_NPROBE = args.nprobe
+    vectors = make_vectors(args.n + args.queries, args.dim)
+    vectors, queries = vectors[:args.n], vectors[args.n:]
+    ids = [f"id{i}" for i in range(args.n)]
+    truth = np.argsort(-(queries @ vectors.T), axis=1)[:, :args.k]
+    print(f"{args.n} vectors x {args.dim} ({args.dtype}), {args.queries} queries, k={args.k}\n")
+
+    for name in args.backends.split(","):
+        with tempfile.TemporaryDirectory() as directory:
+            t0 = time.perf_counter()
+            collection = build(name, directory, ids, vectors, args.batch_size)
+            build_seconds = time.perf_counter() - t0
+
+            collection.query(query_embeddings=[queries[0].tolist()], n_results=args.k)  # warm up
+            latencies, recalls = [], []
+            for q, expected in zip(queries, truth):
+                t0 = time.perf_counter()
+                result = collection.query(query_embeddings=[q.tolist()], n_results=args.k, include=["distances"])
+                latencies.append((time.perf_counter() - t0) * 1000)
+                found = {int(i[2:]) for i in result["ids"][0]}
+                recalls.append(len(found & set(expected.tolist())) / args.k)
+
+            print(f"[{name}]")
+            print(f"  build:    {build_seconds:.2f}s")
+            print(f"  latency:  p50 {np.percentile(latencies, 50):.2f} ms, p95 {np.percentile(latencies, 95):.2f} ms")
+            print(f"  recall@{args.k}: {np.mean(recalls):.3f}\n")
+            del collection
+
+
+if __name__ == "__main__":
+    main()
@@ -7,8 +7,18 @@ load_dotenv()
 
 class Settings:
     GROQ_API_KEY: str = os.getenv("GROQ_API_KEY", "")
+    # "groq" or "stub" (local stand-in for load tests, see app.services.llm_provider)
+    LLM_PROVIDER: str = os.getenv("LLM_PROVIDER", "groq")
     CHROMA_DIR: str = os.getenv("CHROMA_PERSIST_DIR", "chroma_db")
+    # "chroma" or "mmap" (app.services.vector_store; migrate with app.migrate_vector_store)
+    VECTOR_BACKEND: str = os.getenv("VECTOR_BACKEND", "chroma")
     EMB_MODEL: str = os.getenv("EMB_MODEL", "all-MiniLM-L6-v2")
+    # "torch" (SentenceTransformer) or "onnx" (onnxruntime, exported on first use)
+    EMB_BACKEND: str = os.getenv("EMB_BACKEND", "torch")
+    ONNX_DIR: str = os.getenv("ONNX_DIR", "onnx_models")
+    ONNX_QUANTIZE: bool = os.getenv("ONNX_QUANTIZE", "true").lower() == "true"
+    ONNX_INTRA_OP_THREADS: int = int(os.getenv("ONNX_INTRA_OP_THREADS", "0"))
+    ONNX_INTER_OP_THREADS: int = int(os.getenv("ONNX_INTER_OP_THREADS", "1"))
     JWT_SECRET: str = os.getenv("JWT_SECRET", "supersecretkey")
     JWT_ALGORITHM: str = "HS256"
 
@@ -0,0 +1,202 @@
+# app/core/registry.py
+# One shared instance per process of the embedding model, the vector store client and
+# the Groq client. Everything is created lazily on first use, or up front by warmup().
+import os
+import time
+import asyncio
+import threading
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+from urllib.parse import quote
+
+from app.core.config import settings
+from app.utils.lru import LRUCache
+
+_lock = threading.RLock()
+_instances: Dict[str, object] = {}
+_load_seconds: Dict[str, float] = {}
+_ready = threading.Event()
+_warmup_error = None
+
+# Embedding, vector search and prompt packing for async routes run here rather than on the
+# event loop; sized for the CPU, independently of how many requests wait on the LLM
+CPU_WORKERS = int(os.getenv("CPU_WORKERS", str(os.cpu_count() or 4)))
+
+# Handles of existing collections only; a missing collection is never cached, so
+# a product created by another worker process becomes visible immediately.
+_collections = LRUCache(int(os.getenv("COLLECTION_CACHE_SIZE", "1024")))
+
+
+def _get_or_create(name: str, factory):
+    instance = _instances.get(name)
+    if instance is not None:
+        return instance
+    with _lock:
+        if name not in _instances:
+            start = time.perf_counter()
+            _instances[name] = factory()
+            _load_seconds[name] = round(time.perf_counter() - start, 3)
+        return _instances[name]
+
+
+def get_embed_model():
+    def load():
+        if settings.EMB_BACKEND == "onnx":
+            from app.services.onnx_embedder import load_onnx_embedder
+            return load_onnx_embedder(
+                settings.EMB_MODEL, settings.ONNX_DIR, settings.ONNX_QUANTIZE,
+                settings.ONNX_INTRA_OP_THREADS, settings.ONNX_INTER_OP_THREADS
+            )
+        # Imported here so importing the app doesn't pay for torch until the model is needed
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(settings.EMB_MODEL)
+    return _get_or_create("embed_model", load)
+
+
+def embed_model_key() -> str:
+    """
+    Model identity for the embedding cache. fp32 ONNX reproduces the torch vectors, so
+    they share entries; int8 vectors differ slightly and are cached separately.
+    """
+    if settings.EMB_BACKEND == "onnx" and settings.ONNX_QUANTIZE:
+        return f"{settings.EMB_MODEL}@onnx-int8"
+    return settings.EMB_MODEL
+
+
+def get_chroma_client():
+    def load():
+        import chromadb
+        return chromadb.PersistentClient(path=settings.CHROMA_DIR)
+    return _get_or_create("chroma_client", load)
+
+
+def get_vector_client():
+    """Client of the configured vector backend; both expose the Chroma collection API."""
+    if settings.VECTOR_BACKEND != "mmap":
+        return get_chroma_client()
+
+    def load():
+        from app.services.vector_store import MmapVectorClient
+        return MmapVectorClient()
+    return _get_or_create("vector_client", load)
+
+
+def get_groq_client():
+    def load():
+        if not settings.GROQ_API_KEY:
+            raise RuntimeError("❌ GROQ_API_KEY is missing. Please set it in your .env file")
+        from groq import Groq
+        return Groq(api_key=settings.GROQ_API_KEY)
+    return _get_or_create("groq_client", load)
+
+
+def get_async_groq_client():
+    """AsyncGroq for async routes: a request waiting on the LLM holds no thread."""
+    def load():
+        if not settings.GROQ_API_KEY:
+            raise RuntimeError("❌ GROQ_API_KEY is missing. Please set it in your .env file")
+        from groq import AsyncGroq
+        return AsyncGroq(api_key=settings.GROQ_API_KEY)
+    return _get_or_create("async_groq_client", load)
+
+
+def get_llm():
+    """The LLM backend selected by settings.LLM_PROVIDER."""
+    def load():
+        from app.services.llm_provider import load_llm_provider
+        return load_llm_provider(settings.LLM_PROVIDER)
+    return _get_or_create("llm", load)
+
+
+def llm_configured() -> bool:
+    """False only for Groq without an API key; the stub needs nothing."""
+    return settings.LLM_PROVIDER != "groq" or bool(settings.GROQ_API_KEY)
+
+
+def get_cpu_executor() -> ThreadPoolExecutor:
+    return _get_or_create("cpu_executor", lambda: ThreadPoolExecutor(CPU_WORKERS, thread_name_prefix="cpu"))
+
+
+async def run_cpu(fn, *args, **kwargs):
+    """Await `fn(*args, **kwargs)` run on the CPU executor."""
+    return await asyncio.get_running_loop().run_in_executor(get_cpu_executor(), partial(fn, *args, **kwargs))
+
+
+def get_collection(name: str):
+    """Cached `get_vector_client().get_collection(name)`; raises like Chroma if it doesn't exist."""
+    collection = _collections.get(name)
+    if collection is None:
+        collection = get_vector_client().get_collection(name)
+        _collections.put(name, collection)
+    return collection
+
+
+def invalidate_collection(name: str):
+    """Drop a cached handle; call after creating or deleting the collection."""
+    _collections.pop(name)
+
+
+def collection_cache_stats() -> dict:
+    return _collections.stats()
+
+
+# Product content versions, shared by every worker process through file mtimes.
+# Anything derived from a product's documents (cached answers, suggestions) records
+# the version it was built from and is stale once the version moves.
+PRODUCT_VERSION_DIR = os.getenv(
+    "PRODUCT_VERSION_DIR", os.path.join(os.path.dirname(__file__), "../../data/product_versions")
+)
+ALL_PRODUCTS = ""  # version that moves whenever any product changes
+
+
+def _version_path(product_id: str) -> str:
+    # quote() escapes every "%", so no product id can be stored as "%all"
+    return os.path.join(PRODUCT_VERSION_DIR, quote(product_id, safe="") or "%all")
+
+
+def bump_product_version(product_id: str):
+    """Call after a product's documents were added, replaced or deleted."""
+    os.makedirs(PRODUCT_VERSION_DIR, exist_ok=True)
+    now = time.time_ns()
+    for path in {_version_path(product_id), _version_path(ALL_PRODUCTS)}:
+        with open(path, "a"):
+            pass
+        os.utime(path, ns=(now, now))
+
+
+def product_version(product_id: str) -> int:
+    """Current content version of a product (ALL_PRODUCTS for the union); 0 if never changed."""
+    try:
+        return os.stat(_version_path(product_id)).st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
+def warmup():
+    """Load every shared component now instead of on the first request."""
+    global _warmup_error
+    try:
+        get_vector_client()
+        get_embed_model().encode(["warmup"])
+        if llm_configured():
+            get_llm()
+            if settings.LLM_PROVIDER == "groq":
+                get_groq_client()
+        _ready.set()
+    except Exception as e:
+        _warmup_error = str(e)
+        raise
+
+
+def is_ready() -> bool:
+    return _ready.is_set()
+
+
+def readiness() -> dict:
+    return {
+        "ready": _ready.is_set(),
+        "loaded": sorted(_instances),
+        "load_seconds": dict(_load_seconds),
+        "error": _warmup_error,
+    }
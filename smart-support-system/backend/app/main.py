@@ -1,7 +1,9 @@
 import os
 import time
+import threading
 from dotenv import load_dotenv
 from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 # Routers
@@ -13,6 +15,10 @@ from app.models import chat_model  # ✅ ensures Chat & Message models are regis
 
 # Auth service for default admin
 from app.services.auth_service import decode_token, create_user
+from app.services.job_service import resume_pending_jobs
+
+# Shared models / clients
+from app.core import registry
 
 # ---------------------------
 # Load environment variables
@@ -41,6 +47,34 @@ def create_default_admin():
     except ValueError:
         print("ℹ️ Default admin user already exists")
 
+# ---------------------------
+# Warm Up Shared Models and Clients
+# ---------------------------
+@app.on_event("startup")
+def warmup_registry():
+    """Load the embedding model and clients in the background; /ready flips once done."""
+    if os.getenv("WARMUP_ON_STARTUP", "true").lower() != "true":
+        return
+
+    def run():
+        try:
+            registry.warmup()
+            print(f"✅ Warmup finished: {registry.readiness()['load_seconds']}")
+        except Exception as e:
+            print(f"❌ Warmup failed: {e}")
+
+    threading.Thread(target=run, name="warmup", daemon=True).start()
+
+# ---------------------------
+# Resume Interrupted Ingestion Jobs
+# ---------------------------
+@app.on_event("startup")
+def resume_ingest_jobs():
+    """Re-queue uploads that were still being ingested when the server stopped."""
+    resumed = resume_pending_jobs()
+    if resumed:
+        print(f"🔁 Resumed {resumed} ingestion job(s)")
+
 # ---------------------------
 # CORS Middleware
 # ---------------------------
@@ -75,6 +109,12 @@ def root():
     """Root API endpoint for health check."""
     return {"message": "🚀 Smart Support System is running"}
 
+@app.get("/ready")
+def ready():
+    """Readiness probe: 200 once models and clients are loaded, 503 before."""
+    status = registry.readiness()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
 # ---------------------------
 # Middleware: Request Logging
 # ---------------------------
@@ -0,0 +1,69 @@
+import os
+import argparse
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.vector_store import MmapVectorClient, VECTOR_STORE_DIR
+
+# Copy every Chroma collection (ids, embeddings, documents, metadatas) into the
+# memory-mapped vector store, then switch with VECTOR_BACKEND=mmap.
+#
+# Usage (from backend/, with the app stopped or read-only):
+#   python -m app.migrate_vector_store [--dest data/vector_store] [--batch-size 5000] [--overwrite]
+# Embeddings are copied as stored, so nothing is re-embedded. Collections already in
+# the destination are skipped unless --overwrite is given.
+
+# ---------------- Helpers ---------------- #
+def migrate_collection(source, client: MmapVectorClient, overwrite: bool, batch_size: int) -> int:
+    name = source.name
+    if any(c.name == name for c in client.list_collections()):
+        if not overwrite:
+            print(f"⏭️  {name}: already migrated, skipping")
+            return 0
+        client.delete_collection(name)
+    target = client.create_collection(name, metadata=source.metadata)
+
+    total = source.count()
+    copied = 0
+    for offset in range(0, total, batch_size):
+        batch = source.get(limit=batch_size, offset=offset, include=["embeddings", "documents", "metadatas"])
+        if not batch["ids"]:
+            break
+        target.upsert(
+            ids=batch["ids"],
+            embeddings=np.asarray(batch["embeddings"], dtype=np.float32),
+            documents=batch["documents"],
+            metadatas=batch["metadatas"],
+        )
+        copied += len(batch["ids"])
+        print(f"   {name}: {copied}/{total}")
+
+    if target.count() != total:
+        raise RuntimeError(f"{name}: copied {target.count()} of {total} records")
+    return copied
+
+
+# ---------------- Main Migration ---------------- #
+def main():
+    parser = argparse.ArgumentParser(description="Migrate Chroma collections to the mmap vector store")
+    parser.add_argument("--dest", default=VECTOR_STORE_DIR)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--overwrite", action="store_true")
+    args = parser.parse_args()
+
+    if not os.path.exists(settings.CHROMA_DIR):
+        print(f"Chroma directory not found: {settings.CHROMA_DIR}")
+        exit(1)
+
+    import chromadb
+    source = chromadb.PersistentClient(path=settings.CHROMA_DIR)
+    client = MmapVectorClient(args.dest)
+    for collection in source.list_collections():
+        copied = migrate_collection(source.get_collection(collection.name), client, args.overwrite, args.batch_size)
+        print(f"✅ {collection.name}: {copied} records")
+    print(f"Done. Set VECTOR_BACKEND=mmap (VECTOR_STORE_DIR={os.path.abspath(args.dest)}) to use it.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 import os
 import json
+import threading
 from datetime import datetime
 from typing import Dict, Any
 from fastapi import FastAPI, HTTPException, Request
@@ -14,6 +15,9 @@ app = FastAPI(title="Analytics Service")
 # File to persist analytics
 ANALYTICS_FILE = os.path.join(os.path.dirname(__file__), "../../data/analytics.json")
 
+# Guards `analytics` while it is changed or written; requests record from several threads
+_lock = threading.RLock()
+
 # Default structure
 analytics: Dict[str, Any] = {
     "total_users": 0,
@@ -40,8 +44,11 @@ def load_analytics():
 
 def save_analytics():
     os.makedirs(os.path.dirname(ANALYTICS_FILE), exist_ok=True)
-    with open(ANALYTICS_FILE, "w") as f:
-        json.dump(analytics, f, indent=2)
+    with _lock:
+        tmp_path = f"{ANALYTICS_FILE}.tmp.{os.getpid()}.{threading.get_ident()}"
+        with open(tmp_path, "w") as f:
+            json.dump(analytics, f, indent=2)
+        os.replace(tmp_path, ANALYTICS_FILE)
 
 # ---------------------------
 # Analytics functions
@@ -62,19 +69,21 @@ def log_failed_query(product_id: str, query: str, answer: str = ""):
     if not answer or "don't have" in answer.lower() or "no answer" in answer.lower() or "no data" in answer.lower():
         answer = canonical_failed_msg
 
-    analytics["failed_queries"].append({
-        "product_id": product_id,
-        "query": query,
-        "answer": answer,
-        "timestamp": datetime.utcnow().isoformat()
-    })
-    save_analytics()
+    with _lock:
+        analytics["failed_queries"].append({
+            "product_id": product_id,
+            "query": query,
+            "answer": answer,
+            "timestamp": datetime.utcnow().isoformat()
+        })
+        save_analytics()
 
 def increment_queries(product_id: str):
-    if product_id not in analytics["queries_per_product"]:
-        analytics["queries_per_product"][product_id] = 0
-    analytics["queries_per_product"][product_id] += 1
-    save_analytics()
+    with _lock:
+        if product_id not in analytics["queries_per_product"]:
+            analytics["queries_per_product"][product_id] = 0
+        analytics["queries_per_product"][product_id] += 1
+        save_analytics()
 
 def record_query(product_id: str, success: bool, query: str, answer: str = ""):
     increment_queries(product_id)
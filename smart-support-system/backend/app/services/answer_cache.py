@@ -0,0 +1,158 @@
+# backend/app/services/answer_cache.py
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.registry import product_version
+
+# -------------------------
+# Config
+# -------------------------
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+# Cosine similarity between query embeddings needed to reuse an answer
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+ANSWER_CACHE_TTL_SECONDS = int(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600"))
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "5000"))
+
+
+class _Bucket:
+    """Cached answers of one (product, kind), with their query embeddings stacked for one matmul."""
+
+    def __init__(self, version: int):
+        self.version = version
+        self.entries: List[dict] = []
+        self._matrix: Optional[np.ndarray] = None
+
+    def matrix(self) -> np.ndarray:
+        if self._matrix is None:
+            self._matrix = np.vstack([e["embedding"] for e in self.entries])
+        return self._matrix
+
+    def add(self, entry: dict):
+        self.entries.append(entry)
+        self._matrix = None
+
+    def remove(self, entry_id: int):
+        self.entries = [e for e in self.entries if e["id"] != entry_id]
+        self._matrix = None
+
+
+class SemanticAnswerCache:
+    """
+    Answers keyed on the query embedding, per product. A lookup matches the most similar
+    cached question above `threshold`, so rephrasings and near-duplicates hit too.
+    Entries expire after `ttl` seconds, the least recently used go beyond `maxsize`, and a
+    product's entries are dropped as soon as its content version (app.core.registry) moves.
+    """
+
+    def __init__(self, threshold: float, ttl: int, maxsize: int):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._buckets: Dict[Tuple[str, str], _Bucket] = {}
+        self._lru: "OrderedDict[int, Tuple[str, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _normalize(q_emb) -> np.ndarray:
+        q = np.asarray(q_emb, dtype=np.float32).ravel()
+        return q / max(float(np.linalg.norm(q)), 1e-12)
+
+    def _bucket(self, product_id: str, kind: str, create: bool) -> Optional[_Bucket]:
+        key = (product_id, kind)
+        version = product_version(product_id)
+        bucket = self._buckets.get(key)
+        if bucket is not None and bucket.version != version:
+            for entry in bucket.entries:
+                self._lru.pop(entry["id"], None)
+            del self._buckets[key]
+            bucket = None
+            self.invalidations += 1
+        if bucket is None and create:
+            bucket = self._buckets[key] = _Bucket(version)
+        return bucket
+
+    def _drop(self, entry_id: int):
+        key = self._lru.pop(entry_id, None)
+        bucket = self._buckets.get(key)
+        if bucket is not None:
+            bucket.remove(entry_id)
+            if not bucket.entries:
+                del self._buckets[key]
+
+    def get(self, product_id: str, kind: str, q_emb) -> Optional[dict]:
+        q = self._normalize(q_emb)
+        with self._lock:
+            bucket = self._bucket(product_id, kind, create=False)
+            if bucket is not None and bucket.entries:
+                similarities = bucket.matrix() @ q
+                best = int(np.argmax(similarities))
+                entry = bucket.entries[best]
+                if similarities[best] >= self.threshold:
+                    if entry["expires_at"] > time.time():
+                        self._lru.move_to_end(entry["id"])
+                        self.hits += 1
+                        return dict(entry["answer"])
+                    self._drop(entry["id"])
+            self.misses += 1
+            return None
+
+    def put(self, product_id: str, kind: str, q_emb, answer: dict, version: int):
+        """Store an answer built from `version` of the product; dropped if the product moved on since."""
+        q = self._normalize(q_emb)
+        with self._lock:
+            bucket = self._bucket(product_id, kind, create=True)
+            if bucket.version != version:
+                return
+            entry_id = self._next_id
+            self._next_id += 1
+            bucket.add({"id": entry_id, "embedding": q, "answer": dict(answer),
+                        "expires_at": time.time() + self.ttl})
+            self._lru[entry_id] = (product_id, kind)
+            while len(self._lru) > self.maxsize:
+                self._drop(next(iter(self._lru)))
+                self.evictions += 1
+
+    def invalidate(self, product_id: str = None):
+        """Drop one product's answers, or everything."""
+        with self._lock:
+            for key in [k for k in self._buckets if product_id is None or k[0] == product_id]:
+                for entry in self._buckets.pop(key).entries:
+                    self._lru.pop(entry["id"], None)
+                self.invalidations += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": ANSWER_CACHE_ENABLED,
+            "size": len(self._lru),
+            "maxsize": self.maxsize,
+            "threshold": self.threshold,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+answer_cache = SemanticAnswerCache(ANSWER_CACHE_THRESHOLD, ANSWER_CACHE_TTL_SECONDS, ANSWER_CACHE_SIZE)
+
+
+def cached_answer(product_id: str, kind: str, q_emb) -> Optional[dict]:
+    return answer_cache.get(product_id, kind, q_emb) if ANSWER_CACHE_ENABLED else None
+
+
+def cache_answer(product_id: str, kind: str, q_emb, answer: dict, version: int):
+    if ANSWER_CACHE_ENABLED:
+        answer_cache.put(product_id, kind, q_emb, answer, version)
@@ -0,0 +1,187 @@
+# backend/app/services/chunker.py
+# Token-aware chunking with page and section provenance.
+# Sizes are measured with the embedding model's own tokenizer so chunks are never
+# silently truncated by the model (all-MiniLM-L6-v2 stops at 256 word pieces).
+import re
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[]?[A-Z0-9])")
+_NUMBERED_HEADING = re.compile(r"^(\d+(\.\d+)*\.?|[IVXLC]+\.|[A-Z]\.)\s+\S")
+_WORD = re.compile(r"\w+|[^\w\s]")
+_BULLET = re.compile(r"^([-*•▪●◦]|\d+[.)]|[a-z][.)])\s+")
+
+
+def approx_token_count(texts: List[str]) -> List[int]:
+    """Fallback counter when no tokenizer is available: words and punctuation marks."""
+    return [len(_WORD.findall(t)) for t in texts]
+
+
+def tokenizer_counter(tokenizer) -> Callable[[List[str]], List[int]]:
+    """Wrap a Hugging Face tokenizer into a batched token counter (special tokens excluded)."""
+    def count(texts: List[str]) -> List[int]:
+        if not texts:
+            return []
+        encoded = tokenizer(texts, add_special_tokens=False, truncation=False)["input_ids"]
+        return [len(ids) for ids in encoded]
+    return count
+
+
+def _is_title(words: List[str]) -> bool:
+    """Most words capitalised, as in "Return Policy" (not running prose)."""
+    return sum(w[0].isupper() for w in words if w[0].isalpha()) >= max(1, len(words) - 1)
+
+
+def _is_heading(line: str) -> bool:
+    s = line.strip()
+    if not s or len(s) > 80 or s[-1] in ".,;:!?":
+        return False
+    words = s.split()
+    number = _NUMBERED_HEADING.match(s)
+    if number:
+        # "2.1 Shipping" or "3 Cleaning the filter", but not a wrapped line of prose such as
+        # "30 days of purchase for a full refund": short, and the text starts capitalised
+        rest = s[number.end(1):].split()
+        return (len(rest) <= 8 and rest[0][0].isupper() and not any(c in s for c in ",;")
+                and (_is_title(rest) or len(rest) <= 5))
+    if len(words) > 10:
+        return False
+    letters = [c for c in s if c.isalpha()]
+    if letters and all(c.isupper() for c in letters):
+        return True
+    return _is_title(words)
+
+
+def _blocks(page_text: str) -> Iterator[Tuple[str, str, int]]:
+    """Yield (kind, text, char_offset) for headings and paragraphs of one page."""
+    offset = 0
+    paragraph, para_start = [], 0
+    for line in page_text.splitlines(keepends=True):
+        stripped = line.strip()
+        if not stripped or _is_heading(line):
+            if paragraph:
+                yield "paragraph", " ".join(paragraph), para_start
+                paragraph = []
+            if stripped:
+                yield "heading", stripped, offset
+        else:
+            # List items stand on their own so they are never glued into one run-on sentence
+            if paragraph and _BULLET.match(stripped):
+                yield "paragraph", " ".join(paragraph), para_start
+                paragraph = []
+            if not paragraph:
+                para_start = offset + (len(line) - len(line.lstrip()))
+            paragraph.append(stripped)
+        offset += len(line)
+    if paragraph:
+        yield "paragraph", " ".join(paragraph), para_start
+
+
+def _split_oversized(text: str, start: int, max_tokens: int, count) -> List[Tuple[str, int, int]]:
+    """Split a paragraph that exceeds the budget into sentences, then words if needed."""
+    pieces, cursor = [], 0
+    for sentence in _SENTENCE_END.split(text):
+        pos = text.find(sentence, cursor)
+        cursor = pos + len(sentence)
+        pieces.append((sentence, start + pos))
+
+    units = []
+    for (sentence, pos), tokens in zip(pieces, count([p for p, _ in pieces])):
+        if tokens <= max_tokens:
+            units.append((sentence, pos, tokens))
+            continue
+        words = sentence.split(" ")
+        # Word-level fallback for run-on text such as tables flattened by the PDF extractor
+        per_word = max(tokens / max(len(words), 1), 1.0)
+        step = max(int(max_tokens / per_word), 1)
+        for i in range(0, len(words), step):
+            part = " ".join(words[i:i + step])
+            units.append((part, pos + len(" ".join(words[:i])) + (1 if i else 0), count([part])[0]))
+    return units
+
+
+class TokenChunker:
+    """
+    Greedily packs paragraphs (or sentences of long paragraphs) into chunks of at most
+    `max_tokens`, carrying up to `overlap_tokens` of trailing sentences into the next chunk.
+    A chunk never spans a page or a section heading; the heading is prefixed to the text of
+    every chunk of its section, so it is embedded and indexed with them. Each chunk's
+    metadata records the page, section title, character offsets of the body within the page
+    and token count (heading included).
+    """
+
+    def __init__(self, max_tokens: int = 200, overlap_tokens: int = 32,
+                 count_tokens: Optional[Callable[[List[str]], List[int]]] = None):
+        if overlap_tokens >= max_tokens:
+            raise ValueError("overlap_tokens must be smaller than max_tokens")
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.count = count_tokens or approx_token_count
+
+    def _page_units(self, page_text: str) -> Iterator[Tuple[str, str, int, int]]:
+        """Yield (kind, text, char_offset, tokens) with every unit within the budget."""
+        blocks = list(_blocks(page_text))
+        for (kind, text, start), tokens in zip(blocks, self.count([b[1] for b in blocks])):
+            if kind == "heading" or tokens <= self.max_tokens:
+                yield kind, text, start, tokens
+            else:
+                for piece, pos, piece_tokens in _split_oversized(text, start, self.max_tokens, self.count):
+                    yield "paragraph", piece, pos, piece_tokens
+
+    def chunk_pages(self, pages: Iterable[Tuple[int, str]]) -> Iterator[Tuple[str, dict]]:
+        section = ""
+        headings: List[str] = []  # prefixed to every chunk; stacked while no body text came between
+        heading_tokens = 0
+        section_has_body = True
+        for page_number, page_text in pages:
+            current: List[Tuple[str, int, int]] = []  # (text, char_offset, tokens)
+
+            def emit():
+                text = "\n".join(headings + [u[0] for u in current])
+                meta = {
+                    "page": page_number,
+                    "section": section,
+                    "char_start": current[0][1],
+                    "char_end": current[-1][1] + len(current[-1][0]),
+                    "tokens": heading_tokens + sum(u[2] for u in current),
+                }
+                return text, meta
+
+            def carry_overlap(budget):
+                kept, room = [], min(self.overlap_tokens, budget)
+                for unit in reversed(current):
+                    if unit[2] > room:
+                        break
+                    kept.insert(0, unit)
+                    room -= unit[2]
+                return kept
+
+            for kind, text, start, tokens in self._page_units(page_text):
+                if kind == "heading":
+                    if current:
+                        yield emit()
+                        current = []
+                    headings = headings + [text] if not section_has_body else [text]
+                    # Very long stacks of headings would crowd out the body text
+                    while len(headings) > 1 and self.count(["\n".join(headings)])[0] > self.max_tokens // 4:
+                        headings.pop(0)
+                    heading_tokens = self.count(["\n".join(headings)])[0] + 1  # joining newline
+                    section = text
+                    section_has_body = False
+                    continue
+
+                budget = max(self.max_tokens - heading_tokens, 1)
+                pieces = ([(text, start, tokens)] if tokens <= budget
+                          else _split_oversized(text, start, budget, self.count))
+                for piece, pos, piece_tokens in pieces:
+                    used = sum(u[2] for u in current)
+                    if current and used + piece_tokens > budget:
+                        yield emit()
+                        current = carry_overlap(budget)
+                        # Overlap must never push a fresh chunk over the limit
+                        while current and sum(u[2] for u in current) + piece_tokens > budget:
+                            current.pop(0)
+                    current.append((piece, pos, piece_tokens))
+                    section_has_body = True
+
+            if current:
+                yield emit()
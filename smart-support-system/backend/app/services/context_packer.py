@@ -0,0 +1,89 @@
+# backend/app/services/context_packer.py
+# Fits retrieved chunks into a fixed prompt token budget, so prompt size (and with it
+# Groq time-to-first-token) no longer depends on how long the retrieved chunks are.
+# Chunks are taken in relevance order; sentences already in the context (the overlap
+# TokenChunker carries between neighbouring chunks) are dropped, and the chunk that
+# no longer fits is cut at a sentence boundary.
+import os
+from functools import lru_cache
+from typing import Callable, Dict, List
+
+from app.services.chunker import _SENTENCE_END, approx_token_count
+
+# -------------------------
+# Config
+# -------------------------
+# Whole prompt: instructions + question + context
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "1800"))
+# tiktoken encoding used to count; close enough to Llama's tokenizer for budgeting
+PROMPT_TOKENIZER = os.getenv("PROMPT_TOKENIZER", "cl100k_base")
+# A chunk cut shorter than this is left out rather than sent as a fragment
+CONTEXT_MIN_TOKENS = int(os.getenv("CONTEXT_MIN_TOKENS", "40"))
+
+
+@lru_cache(maxsize=1)
+def get_token_counter() -> Callable[[List[str]], List[int]]:
+    """Batched token counter: tiktoken if its encoding can be loaded, else the word-based estimate."""
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding(PROMPT_TOKENIZER)
+    except Exception as e:
+        print(f"⚠️ tiktoken encoding '{PROMPT_TOKENIZER}' unavailable ({e}); estimating prompt tokens")
+        return approx_token_count
+    return lambda texts: [len(ids) for ids in encoding.encode_ordinary_batch(list(texts))] if texts else []
+
+
+def count_tokens(text: str) -> int:
+    return get_token_counter()([text])[0]
+
+
+def _normalize(sentence: str) -> str:
+    return " ".join(sentence.split()).lower()
+
+
+def _cut_words(text: str, tokens: int, budget: int) -> str:
+    """Word-level cut for a single sentence longer than the budget (e.g. a flattened table)."""
+    words = text.split()
+    keep = max(int(len(words) * budget / max(tokens, 1)), 1)
+    return " ".join(words[:keep])
+
+
+def pack_context(docs: List[Dict], budget: int, header: Callable[[int, Dict], str] = None) -> List[Dict]:
+    """
+    Copies of `docs` (already in relevance order) whose "document" fits `budget` tokens
+    in total, each with "tokens" and "truncated" added. `header(position, doc)` is the
+    text prepended to every excerpt in the prompt; it is counted against the budget.
+    """
+    count = get_token_counter()
+    seen = set()
+    packed = []
+    remaining = budget
+    for doc in docs:
+        sentences = [s for s in _SENTENCE_END.split(doc["document"].strip()) if s.strip()]
+        fresh = [s for s in sentences if _normalize(s) not in seen]
+        if not fresh:
+            continue
+        overhead = count([header(len(packed) + 1, doc)])[0] if header else 0
+        lengths = count(fresh)
+        room = remaining - overhead
+        if room < min(CONTEXT_MIN_TOKENS, sum(lengths)):
+            continue
+
+        kept, used = [], 0
+        for sentence, tokens in zip(fresh, lengths):
+            if used + tokens + 1 > room:
+                break
+            kept.append(sentence)
+            used += tokens + 1  # joining space
+        if not kept and not packed:
+            # The best chunk must not vanish because its first sentence is huge
+            kept = [_cut_words(fresh[0], lengths[0], room)]
+            used = count(kept)[0]
+        if not kept or (packed and len(kept) < len(fresh) and used < CONTEXT_MIN_TOKENS):
+            continue
+
+        seen.update(_normalize(s) for s in kept)
+        remaining -= overhead + used
+        packed.append({**doc, "document": " ".join(kept), "tokens": used,
+                       "truncated": len(kept) < len(fresh)})
+    return packed
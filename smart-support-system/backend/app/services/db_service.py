@@ -1,23 +1,22 @@
 # backend/app/services/db_service.py
-import chromadb
-from sentence_transformers import SentenceTransformer
+from app.core.registry import get_embed_model, embed_model_key, get_vector_client
+from app.services.embedding_cache import encode_texts
 
-# Initialize Chroma client (local persistence)
-chroma_client = chromadb.PersistentClient(path="chroma_db")
+# Chroma client (local persistence) and embedding model (free, runs locally)
+# are shared with the other services through the registry
+EMB_MODEL = embed_model_key()
 
-# Create a collection (like a table in SQL)
-collection = chroma_client.get_or_create_collection("support_docs")
-
-# Load embedding model (free, runs locally)
-embedding_model = SentenceTransformer("all-MiniLM-L6-v2")
+def _collection():
+    # Create a collection (like a table in SQL)
+    return get_vector_client().get_or_create_collection("support_docs")
 
 def add_document(doc_id: str, text: str):
     """Add a document to ChromaDB"""
-    embedding = embedding_model.encode([text]).tolist()
-    collection.add(documents=[text], embeddings=embedding, ids=[doc_id])
+    embedding = encode_texts(get_embed_model(), [text], EMB_MODEL).tolist()
+    _collection().add(documents=[text], embeddings=embedding, ids=[doc_id])
 
 def query_document(query: str, top_k: int = 1):
     """Search for the most relevant document"""
-    query_embedding = embedding_model.encode([query]).tolist()
-    results = collection.query(query_embeddings=query_embedding, n_results=top_k)
+    query_embedding = encode_texts(get_embed_model(), [query], EMB_MODEL).tolist()
+    results = _collection().query(query_embeddings=query_embedding, n_results=top_k)
     return results
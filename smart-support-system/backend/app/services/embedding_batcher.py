@@ -0,0 +1,119 @@
+# backend/app/services/embedding_batcher.py
+# Coalesces concurrent small `encode` calls (one query per chat request) into batched
+# forward passes. A single worker thread per model drains a queue: when requests arrive
+# while the model is busy they are picked up together, and under sustained concurrency the
+# worker waits up to EMBED_BATCH_MAX_WAIT_MS for more. An idle queue dispatches at once,
+# so a lone request never pays the wait.
+import os
+import time
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+# -------------------------
+# Config
+# -------------------------
+EMBED_BATCHING = os.getenv("EMBED_BATCHING", "true").lower() == "true"
+EMBED_BATCH_MAX_WAIT_MS = float(os.getenv("EMBED_BATCH_MAX_WAIT_MS", "5"))
+EMBED_BATCH_MAX_SIZE = int(os.getenv("EMBED_BATCH_MAX_SIZE", "64"))
+
+
+class EmbeddingBatcher:
+    """Duck-types `model.encode(texts, batch_size)` so it can stand in for the model anywhere."""
+
+    def __init__(self, model, max_batch: int = EMBED_BATCH_MAX_SIZE, max_wait_ms: float = EMBED_BATCH_MAX_WAIT_MS):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._concurrent = False  # last batch held more than one request
+        self.batches = 0
+        self.requests = 0
+        self.texts = 0
+        self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._thread.start()
+
+    def encode(self, texts: Sequence[str], batch_size: int = 32) -> np.ndarray:
+        if len(texts) >= self.max_batch:
+            # Already a full batch (e.g. ingestion); nothing to gain from queueing
+            return np.asarray(self.model.encode(list(texts), batch_size=batch_size), dtype=np.float32)
+        future: Future = Future()
+        self._queue.put((list(texts), future))
+        return future.result()
+
+    def _collect(self) -> List[tuple]:
+        batch = [self._queue.get()]
+        size = len(batch[0][0])
+        deadline = time.perf_counter() + self.max_wait
+        while size < self.max_batch:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                remaining = deadline - time.perf_counter()
+                if not self._concurrent or remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    def _run(self):
+        # The only thread serving encode(): it must survive anything, or every caller hangs
+        while True:
+            batch = []
+            try:
+                batch = self._collect()
+                self._concurrent = len(batch) > 1
+                # Identical texts in flight (the same hot question) are encoded once
+                unique: Dict[str, int] = {}
+                for texts, _ in batch:
+                    for text in texts:
+                        unique.setdefault(text, len(unique))
+                vectors = np.asarray(self.model.encode(list(unique), batch_size=len(unique)), dtype=np.float32)
+                self.batches += 1
+                self.requests += len(batch)
+                self.texts += len(unique)
+                for texts, future in batch:
+                    future.set_result(vectors[[unique[t] for t in texts]])
+            except Exception as e:
+                print(f"❌ Embedding batch of {len(batch)} request(s) failed: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "texts_encoded": self.texts,
+            "avg_requests_per_batch": round(self.requests / self.batches, 2) if self.batches else 0.0,
+            "max_wait_ms": self.max_wait * 1000,
+            "max_batch": self.max_batch,
+        }
+
+
+_batchers: Dict[int, EmbeddingBatcher] = {}
+_batchers_lock = threading.Lock()
+
+
+def get_batcher(model):
+    """The process-wide batcher for `model`, or the model itself when batching is disabled."""
+    if not EMBED_BATCHING:
+        return model
+    batcher = _batchers.get(id(model))
+    if batcher is None:
+        with _batchers_lock:
+            batcher = _batchers.get(id(model))
+            if batcher is None:
+                batcher = _batchers[id(model)] = EmbeddingBatcher(model)
+    return batcher
+
+
+def batcher_stats() -> dict:
+    return {"enabled": EMBED_BATCHING, "batchers": [b.stats() for b in _batchers.values()]}
@@ -0,0 +1,170 @@
+# backend/app/services/embedding_cache.py
+import os
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.utils.lru import LRUCache
+from app.services.embedding_batcher import get_batcher
+
+# -------------------------
+# Config
+# -------------------------
+EMBED_CACHE_PATH = os.getenv(
+    "EMBED_CACHE_PATH", os.path.join(os.path.dirname(__file__), "../../data/embedding_cache.sqlite")
+)
+EMBED_CACHE_MEMORY_ITEMS = int(os.getenv("EMBED_CACHE_MEMORY_ITEMS", "20000"))
+EMBED_CACHE_DISK_ITEMS = int(os.getenv("EMBED_CACHE_DISK_ITEMS", "1000000"))
+EMBED_CACHE_DISK = os.getenv("EMBED_CACHE_DISK", "true").lower() == "true"
+
+_SQLITE_MAX_PARAMS = 500
+
+
+# -------------------------
+# Two-tier embedding cache
+# -------------------------
+def normalize_text(text: str) -> str:
+    # Whitespace never changes the tokenized input, so collapse it for better hit rates
+    return " ".join(text.split())
+
+
+class EmbeddingCache:
+    """
+    Embedding cache keyed on (model name, normalized text hash).
+    Lookups go memory LRU -> SQLite -> model; only the misses reach the model,
+    in one batched `encode` call, and are written back to both tiers.
+    """
+
+    def __init__(self, path: Optional[str], memory_items: int, disk_items: int):
+        self.memory = LRUCache(memory_items)
+        self.disk_items = disk_items
+        self.disk_hits = 0
+        self.disk_misses = 0
+        self.disk_evictions = 0
+        self.encoded = 0
+        self._disk_lock = threading.Lock()
+        self._conn = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+            self._conn.commit()
+
+    @staticmethod
+    def key(model_name: str, text: str) -> str:
+        return hashlib.sha256(f"{model_name}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+    # --- disk tier ---
+    def _disk_get(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        found = {}
+        if not self._conn or not keys:
+            return found
+        with self._disk_lock:
+            for i in range(0, len(keys), _SQLITE_MAX_PARAMS):
+                part = keys[i:i + _SQLITE_MAX_PARAMS]
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(part))})", part
+                ).fetchall()
+                for k, blob in rows:
+                    found[k] = np.frombuffer(blob, dtype=np.float32)
+            self.disk_hits += len(found)
+            self.disk_misses += len(keys) - len(found)
+        return found
+
+    def _disk_put(self, items: Dict[str, np.ndarray]):
+        if not self._conn or not items:
+            return
+        with self._disk_lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(k, np.asarray(v, dtype=np.float32).tobytes()) for k, v in items.items()]
+            )
+            # Enforced in SQL, in the same transaction, so every worker process sharing the
+            # file sees the same limit. Rowids grow with each insert and only the oldest rows
+            # are ever deleted, so the newest `disk_items` rowids are the rows to keep.
+            evicted = self._conn.execute(
+                "DELETE FROM embeddings WHERE rowid <= (SELECT MAX(rowid) FROM embeddings) - ?",
+                (self.disk_items,)
+            ).rowcount
+            self.disk_evictions += max(evicted, 0)
+            self._conn.commit()
+
+    def _disk_size(self) -> int:
+        if not self._conn:
+            return 0
+        with self._disk_lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    # --- public ---
+    def encode(self, model, texts: Sequence[str], model_name: str, batch_size: int = 32,
+               counts: dict = None) -> np.ndarray:
+        """
+        Return a float32 (len(texts), dim) matrix, running the model only on uncached texts.
+        If `counts` is given, counts["encoded"] is set to the number of texts sent to the model.
+        """
+        keys = [self.key(model_name, t) for t in texts]
+        vectors: Dict[str, np.ndarray] = {}
+        for k in dict.fromkeys(keys):
+            v = self.memory.get(k)
+            if v is not None:
+                vectors[k] = v
+
+        missing = [k for k in dict.fromkeys(keys) if k not in vectors]
+        from_disk = self._disk_get(missing)
+        for k, v in from_disk.items():
+            self.memory.put(k, v)
+        vectors.update(from_disk)
+
+        to_encode = {}
+        for k, t in zip(keys, texts):
+            if k not in vectors and k not in to_encode:
+                to_encode[k] = normalize_text(t)
+        if to_encode:
+            encoded = np.asarray(model.encode(list(to_encode.values()), batch_size=batch_size), dtype=np.float32)
+            fresh = dict(zip(to_encode.keys(), encoded))
+            self.encoded += len(fresh)
+            for k, v in fresh.items():
+                self.memory.put(k, v)
+            self._disk_put(fresh)
+            vectors.update(fresh)
+        if counts is not None:
+            counts["encoded"] = len(to_encode)
+
+        return np.vstack([vectors[k] for k in keys])
+
+    def stats(self) -> dict:
+        disk_lookups = self.disk_hits + self.disk_misses
+        return {
+            "memory": self.memory.stats(),
+            "disk": {
+                "enabled": self._conn is not None,
+                "size": self._disk_size(),
+                "maxsize": self.disk_items,
+                "hits": self.disk_hits,
+                "misses": self.disk_misses,
+                "evictions": self.disk_evictions,
+                "hit_rate": round(self.disk_hits / disk_lookups, 4) if disk_lookups else 0.0,
+            },
+            "model_encodes": self.encoded,
+        }
+
+
+embedding_cache = EmbeddingCache(
+    EMBED_CACHE_PATH if EMBED_CACHE_DISK else None,
+    EMBED_CACHE_MEMORY_ITEMS,
+    EMBED_CACHE_DISK_ITEMS,
+)
+
+
+def encode_texts(model, texts: Sequence[str], model_name: str, batch_size: int = 32,
+                 counts: dict = None) -> np.ndarray:
+    return embedding_cache.encode(model, texts, model_name, batch_size=batch_size, counts=counts)
+
+
+def encode_text(model, text: str, model_name: str) -> np.ndarray:
+    # Single texts come from concurrent requests (queries), so misses go through the batcher
+    return embedding_cache.encode(get_batcher(model), [text], model_name)[0]
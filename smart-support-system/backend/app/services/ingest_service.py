@@ -1,27 +1,47 @@
 # backend/app/services/ingest_service.py
 import os
 import fitz  # PyMuPDF
-import chromadb
 import uuid
+import time
+import hashlib
+import numpy as np
+from functools import lru_cache
+from itertools import islice
 from datetime import datetime
-from sentence_transformers import SentenceTransformer
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 from langchain_text_splitters import RecursiveCharacterTextSplitter
+from app.services.pdf_extract import iter_pdf_pages
+from app.services.embedding_cache import encode_texts, encode_text
+from app.services.chunker import TokenChunker, tokenizer_counter
+from app.services.lexical_index import get_lexical_index, drop_lexical_index
+from app.services.manifest import file_manifest
+from app.services.suggestion_service import drop_suggestions
+from app.core.registry import (
+    get_embed_model, embed_model_key, get_vector_client, get_collection, invalidate_collection,
+    bump_product_version
+)
 
 # -------------------------
 # Config
 # -------------------------
-CHROMA_DIR = os.getenv("CHROMA_PERSIST_DIR", "chroma_db")
-EMB_MODEL = os.getenv("EMB_MODEL", "all-MiniLM-L6-v2")
-
-embed_model = SentenceTransformer(EMB_MODEL)
-chroma_client = chromadb.PersistentClient(path=CHROMA_DIR)
+EMB_MODEL = embed_model_key()
+# Number of chunks encoded and written to Chroma per round trip
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+# "token" = TokenChunker sized with the embedding tokenizer, "recursive" = legacy 1000/200 char splitter
+CHUNKER = os.getenv("CHUNKER", "token")
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "200"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "32"))
 
 # -------------------------
 # Utilities
 # -------------------------
+@lru_cache(maxsize=8)
+def _get_splitter(chunk_size: int, overlap: int) -> RecursiveCharacterTextSplitter:
+    # split_text now runs once per page, so reuse the splitter instead of rebuilding it
+    return RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=overlap)
+
 def split_text(text: str, chunk_size: int = 1000, overlap: int = 200):
-    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=overlap)
-    return splitter.split_text(text)
+    return _get_splitter(chunk_size, overlap).split_text(text)
 
 def extract_text_from_pdf(pdf_path: str) -> str:
     text = ""
@@ -30,17 +50,68 @@ def extract_text_from_pdf(pdf_path: str) -> str:
             text += page.get_text()
     return text
 
+@lru_cache(maxsize=1)
+def get_token_chunker() -> TokenChunker:
+    # Never exceed what the model actually reads; [CLS]/[SEP] take two positions
+    embed_model = get_embed_model()
+    max_tokens = min(CHUNK_MAX_TOKENS, embed_model.max_seq_length - 2)
+    return TokenChunker(max_tokens, CHUNK_OVERLAP_TOKENS, tokenizer_counter(embed_model.tokenizer))
+
+def iter_pdf_chunks(pdf_path: str, chunk_size: int = 1000, overlap: int = 200) -> Iterator[Tuple[str, dict]]:
+    """
+    Stream (chunk, metadata) pairs page by page instead of building one string
+    for the whole document. Each chunk records the page it came from; the token
+    chunker also records section, character offsets and token count.
+    """
+    if CHUNKER == "token":
+        pages = ((n, t) for n, t in iter_pdf_pages(pdf_path) if t.strip())
+        yield from get_token_chunker().chunk_pages(pages)
+        return
+
+    for page_number, page_text in iter_pdf_pages(pdf_path):
+        if not page_text.strip():
+            continue
+        for chunk in split_text(page_text, chunk_size, overlap):
+            yield chunk, {"page": page_number}
+
+def _batched(items: Iterable, size: int) -> Iterator[List]:
+    """Yield lists of at most `size` items without materialising the whole iterable."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def hash_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def hash_file(path: str, block_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _get_or_create_collection(product_id: str):
+    collection_name = f"product_{product_id}"
+    try:
+        return get_collection(collection_name)
+    except Exception:
+        collection = get_vector_client().get_or_create_collection(name=collection_name)
+        invalidate_collection(collection_name)
+        return collection
+
 # -------------------------
 # Core functions
 # -------------------------
 def add_document_chroma(doc_id: str, text: str, product_id: str, file_name: str, file_id: str):
-    collection_name = f"product_{product_id}"
-    try:
-        collection = chroma_client.get_collection(collection_name)
-    except Exception:
-        collection = chroma_client.create_collection(name=collection_name)
+    collection = _get_or_create_collection(product_id)
 
-    embedding = embed_model.encode([text])[0].tolist()
+    embedding = encode_text(get_embed_model(), text, EMB_MODEL).tolist()
+    uploaded_at = datetime.utcnow().isoformat()
 
     collection.add(
         ids=[doc_id],
@@ -49,54 +120,321 @@ def add_document_chroma(doc_id: str, text: str, product_id: str, file_name: str,
         metadatas=[{
             "file_name": file_name,
             "file_id": file_id,
-            "uploaded_at": datetime.utcnow().isoformat()
+            "uploaded_at": uploaded_at
         }]
     )
+    get_lexical_index(product_id, collection).add([doc_id], [text])
+    file_manifest.record_file(product_id, file_id, file_name, 1, uploaded_at=uploaded_at, increment=True)
+    bump_product_version(product_id)
+
+def _lookup_chunk_embeddings(product_id: str, chunk_hashes: List[str]) -> Dict[str, np.ndarray]:
+    """Find embeddings already stored in this product for the given chunk hashes."""
+    found: Dict[str, np.ndarray] = {}
+    try:
+        collection = get_collection(f"product_{product_id}")
+        results = collection.get(where={"chunk_hash": {"$in": chunk_hashes}}, include=["metadatas", "embeddings"])
+    except Exception:
+        return found
+    embeddings = results.get("embeddings")
+    if embeddings is None:
+        return found
+    for meta, emb in zip(results.get("metadatas", []), embeddings):
+        if meta and meta.get("chunk_hash"):
+            found.setdefault(meta["chunk_hash"], np.asarray(emb, dtype=np.float32))
+    return found
 
-def ingest_pdf(product_id: str, pdf_path: str) -> dict:
-    file_id = str(uuid.uuid4())
-    file_name = os.path.basename(pdf_path)
+def _embed_chunks(product_id: str, texts: List[str], batch_size: int) -> Tuple[np.ndarray, List[str], int]:
+    """
+    Embed a batch, reusing vectors already stored in this product and going through
+    the shared embedding cache for the rest, so chunks seen in any product or earlier
+    upload never reach the model twice. Returns (embeddings, chunk hashes, reused count).
+    """
+    hashes = [hash_text(t) for t in texts]
+    known = _lookup_chunk_embeddings(product_id, list(dict.fromkeys(hashes)))
 
-    raw_text = extract_text_from_pdf(pdf_path)
-    if not raw_text.strip():
-        raise ValueError("No text could be extracted from the PDF.")
+    to_embed = {}
+    for h, t in zip(hashes, texts):
+        if h not in known and h not in to_embed:
+            to_embed[h] = t
+    counts = {"encoded": 0}
+    if to_embed:
+        embedded = encode_texts(get_embed_model(), list(to_embed.values()), EMB_MODEL, batch_size=batch_size, counts=counts)
+        known.update(zip(to_embed.keys(), embedded))
 
-    chunks = split_text(raw_text)
+    reused = len(texts) - counts["encoded"]
+    return np.vstack([known[h] for h in hashes]), hashes, reused
+
+def add_documents_chroma_bulk(chunks: Iterable[Tuple[str, dict]], product_id: str, file_name: str, file_id: str,
+                              batch_size: int = None, skip: int = 0, uploaded_at: str = None,
+                              on_progress: Callable[[int, dict], None] = None, file_hash: str = None,
+                              local_path: str = None) -> dict:
+    """
+    Embed and store the (text, metadata) chunks of one file in batches.
+    Each batch is encoded in a single model call and written with a single
+    `collection.upsert`, so memory stays bounded by `batch_size` regardless of file size.
+
+    Chunk ids are positional and deterministic, so an interrupted run can be
+    resumed with `skip` set to the number of chunks already stored.
+    Chunks whose text hash is already stored reuse that embedding instead of re-encoding.
+    `on_progress(chunks_done, last_metadata)` is called after every stored batch.
+    The file manifest is updated with the stored chunk count once the loop ends; a
+    failed batch leaves the file marked incomplete, so it is never taken as a duplicate.
+    Returns the number of chunks written, how many embeddings were reused and the throughput.
+    """
+    batch_size = batch_size or EMBED_BATCH_SIZE
+    collection = None
+    uploaded_at = uploaded_at or datetime.utcnow().isoformat()
+    # Read up front: nothing in the finally below may raise over the ingest's own error
+    try:
+        size = os.path.getsize(local_path) if local_path else None
+    except OSError:
+        size = None
 
-    for i, chunk in enumerate(chunks):
-        add_document_chroma(f"{product_id}_{file_id}_{i}", chunk, product_id, file_name, file_id)
+    start = time.perf_counter()
+    count = skip
+    reused = 0
+    finished = False
+    try:
+        for batch in _batched(islice(chunks, skip, None), batch_size):
+            # Created lazily so a PDF without text leaves no empty product behind
+            if collection is None:
+                collection = _get_or_create_collection(product_id)
+                lexical = get_lexical_index(product_id, collection)
+            texts = [text for text, _ in batch]
+            ids = [f"{product_id}_{file_id}_{count + i}" for i in range(len(batch))]
+            embeddings, chunk_hashes, batch_reused = _embed_chunks(product_id, texts, batch_size)
+            reused += batch_reused
+            collection.upsert(
+                ids=ids,
+                documents=texts,
+                embeddings=embeddings.tolist(),
+                metadatas=[{
+                    **extra,
+                    "file_name": file_name,
+                    "file_id": file_id,
+                    "file_hash": file_hash or "",
+                    "chunk_hash": chunk_hash,
+                    "uploaded_at": uploaded_at
+                } for (_, extra), chunk_hash in zip(batch, chunk_hashes)]
+            )
+            lexical.add(ids, texts)
+            count += len(batch)
+            if on_progress:
+                on_progress(count, batch[-1][1])
+        finished = True
+    finally:
+        # Also after a failed batch: whatever was written is visible to queries
+        if count > skip:
+            file_manifest.record_file(
+                product_id, file_id, file_name, count, file_hash=file_hash, uploaded_at=uploaded_at,
+                size=size, local_path=local_path,
+                complete=finished
+            )
+            bump_product_version(product_id)
+
+    elapsed = time.perf_counter() - start
+    written = count - skip
+    chunks_per_sec = written / elapsed if elapsed > 0 else 0.0
+    print(f"📥 Indexed {written} chunks of '{file_name}' in {elapsed:.2f}s "
+          f"({chunks_per_sec:.1f} chunks/sec, {reused} embeddings reused)")
+    return {
+        "chunks": count,
+        "reused_embeddings": reused,
+        "seconds": round(elapsed, 3),
+        "chunks_per_sec": round(chunks_per_sec, 1)
+    }
+
+def ingest_pdf(product_id: str, pdf_path: str, file_id: str = None, file_name: str = None,
+               skip: int = 0, uploaded_at: str = None, on_progress: Callable[[int, dict], None] = None,
+               file_hash: str = None) -> dict:
+    file_id = file_id or str(uuid.uuid4())
+    file_name = file_name or os.path.basename(pdf_path)
+    uploaded_at = uploaded_at or datetime.utcnow().isoformat()
+    file_hash = file_hash or hash_file(pdf_path)
+
+    stats = add_documents_chroma_bulk(
+        iter_pdf_chunks(pdf_path), product_id, file_name, file_id,
+        skip=skip, uploaded_at=uploaded_at, on_progress=on_progress, file_hash=file_hash,
+        local_path=pdf_path
+    )
+    if not stats["chunks"]:
+        raise ValueError("No text could be extracted from the PDF.")
 
     return {
         "file_id": file_id,
         "file_name": file_name,
-        "chunks": len(chunks),
-        "uploaded_at": datetime.utcnow().isoformat(),
+        "chunks": stats["chunks"],
+        "reused_embeddings": stats["reused_embeddings"],
+        "chunks_per_sec": stats["chunks_per_sec"],
+        "file_hash": file_hash,
+        "uploaded_at": uploaded_at,
         "pdf_path": pdf_path
     }
 
 # -------------------------
 # New function: index existing file by file_id
 # -------------------------
-def index_file_by_id(file_id: str, product_id: str = None, pdf_path: str = None, file_name: str = None):
+def index_file_by_id(file_id: str, product_id: str = None, pdf_path: str = None, file_name: str = None,
+                     incremental: bool = False):
     if not pdf_path or not product_id or not file_name:
         raise ValueError("product_id, pdf_path, and file_name are required to index the file.")
 
-    raw_text = extract_text_from_pdf(pdf_path)
-    if not raw_text.strip():
-        raise ValueError("No text could be extracted from the PDF for indexing.")
+    if incremental:
+        reindex_file_incremental(file_id, product_id, pdf_path, file_name)
+        return True
 
-    chunks = split_text(raw_text)
-    for i, chunk in enumerate(chunks):
-        add_document_chroma(f"{product_id}_{file_id}_{i}", chunk, product_id, file_name, file_id)
+    stats = add_documents_chroma_bulk(iter_pdf_chunks(pdf_path), product_id, file_name, file_id,
+                                      file_hash=hash_file(pdf_path), local_path=pdf_path)
+    if not stats["chunks"]:
+        raise ValueError("No text could be extracted from the PDF for indexing.")
 
     return True
 
+def _existing_chunks_by_hash(collection, file_id: str) -> Dict[str, List[dict]]:
+    """Map chunk_hash -> stored chunks ({id, metadata}) of a file, hashing legacy chunks that lack one."""
+    results = collection.get(where={"file_id": file_id}, include=["metadatas"])
+    by_hash: Dict[str, List[dict]] = {}
+    legacy_ids = []
+    for doc_id, meta in zip(results.get("ids", []), results.get("metadatas", [])):
+        meta = meta or {}
+        if meta.get("chunk_hash"):
+            by_hash.setdefault(meta["chunk_hash"], []).append({"id": doc_id, "metadata": meta})
+        else:
+            legacy_ids.append(doc_id)
+
+    # Only chunks indexed before hashes were stored need their text fetched
+    for ids in _batched(legacy_ids, EMBED_BATCH_SIZE):
+        legacy = collection.get(ids=ids, include=["documents", "metadatas"])
+        for doc_id, doc, meta in zip(legacy["ids"], legacy["documents"], legacy["metadatas"]):
+            by_hash.setdefault(hash_text(doc), []).append({"id": doc_id, "metadata": meta or {}})
+    return by_hash
+
+def reindex_file_incremental(file_id: str, product_id: str, pdf_path: str, file_name: str,
+                             batch_size: int = None, on_progress: Callable[[int, dict], None] = None) -> dict:
+    """
+    Re-index a new version of an already indexed file by diffing chunk content hashes.
+    Unchanged chunks keep their id and embedding (only provenance metadata is refreshed),
+    new chunks are embedded and added, and chunks no longer present are deleted,
+    so the cost follows the size of the change rather than the size of the document.
+    `on_progress(chunks_done, last_metadata)` is called every `batch_size` chunks read,
+    whether reused or embedded, and after every batch of deletes.
+    """
+    batch_size = batch_size or EMBED_BATCH_SIZE
+    collection = _get_or_create_collection(product_id)
+    lexical = get_lexical_index(product_id, collection)
+    existing = _existing_chunks_by_hash(collection, file_id)
+    existing_ids = {c["id"] for chunks in existing.values() for c in chunks}
+    file_hash = hash_file(pdf_path)
+    uploaded_at = datetime.utcnow().isoformat()
+
+    start = time.perf_counter()
+    occurrences: Dict[str, int] = {}
+    new_chunks: List[Tuple[str, str, dict]] = []
+    moved_ids, moved_metas = [], []
+    kept = added = total = 0
+
+    def flush_new():
+        nonlocal added
+        if not new_chunks:
+            return
+        embeddings, chunk_hashes, _ = _embed_chunks(product_id, [t for _, t, _ in new_chunks], batch_size)
+        collection.upsert(
+            ids=[doc_id for doc_id, _, _ in new_chunks],
+            documents=[t for _, t, _ in new_chunks],
+            embeddings=embeddings.tolist(),
+            metadatas=[{
+                **extra,
+                "file_name": file_name,
+                "file_id": file_id,
+                "file_hash": file_hash,
+                "chunk_hash": chunk_hash,
+                "uploaded_at": uploaded_at
+            } for (_, _, extra), chunk_hash in zip(new_chunks, chunk_hashes)]
+        )
+        lexical.add([doc_id for doc_id, _, _ in new_chunks], [t for _, t, _ in new_chunks])
+        added += len(new_chunks)
+        new_chunks.clear()
+
+    def flush_moved():
+        if moved_ids:
+            collection.update(ids=list(moved_ids), metadatas=list(moved_metas))
+            moved_ids.clear()
+            moved_metas.clear()
+
+    last_extra: dict = {}
+    for text, extra in iter_pdf_chunks(pdf_path):
+        total += 1
+        last_extra = extra
+        chunk_hash = hash_text(text)
+        occurrence = occurrences.get(chunk_hash, 0)
+        occurrences[chunk_hash] = occurrence + 1
+
+        matches = existing.get(chunk_hash)
+        if matches:
+            match = matches.pop(0)
+            kept += 1
+            meta = match["metadata"]
+            # Provenance (page, section, offsets) may move even when the text is unchanged
+            if any(meta.get(k) != v for k, v in extra.items()) or meta.get("file_hash") != file_hash \
+                    or meta.get("chunk_hash") != chunk_hash:
+                moved_ids.append(match["id"])
+                moved_metas.append({**meta, **extra, "file_hash": file_hash, "chunk_hash": chunk_hash})
+                if len(moved_ids) >= batch_size:
+                    flush_moved()
+        else:
+            # Content-addressed id so later edits never shift it
+            doc_id = f"{product_id}_{file_id}_{chunk_hash[:16]}_{occurrence}"
+            while doc_id in existing_ids:
+                occurrence += 1
+                doc_id = f"{product_id}_{file_id}_{chunk_hash[:16]}_{occurrence}"
+            existing_ids.add(doc_id)
+            new_chunks.append((doc_id, text, extra))
+            if len(new_chunks) >= batch_size:
+                flush_new()
+
+        # Reused chunks count as progress too, so a mostly unchanged file doesn't look stuck
+        if on_progress and total % batch_size == 0:
+            on_progress(total, extra)
+
+    if not total:
+        raise ValueError("No text could be extracted from the PDF for indexing.")
+
+    flush_new()
+    flush_moved()
+    if on_progress:
+        on_progress(total, last_extra)
+
+    stale_ids = [c["id"] for chunks in existing.values() for c in chunks]
+    for ids in _batched(stale_ids, batch_size):
+        collection.delete(ids=ids)
+        if on_progress:
+            on_progress(total, last_extra)
+    lexical.remove(stale_ids)
+    # The stored path is updated by the caller once the new version replaced the old file
+    file_manifest.record_file(product_id, file_id, file_name, total, file_hash=file_hash,
+                              uploaded_at=uploaded_at, size=os.path.getsize(pdf_path))
+    bump_product_version(product_id)
+
+    elapsed = time.perf_counter() - start
+    print(f"🔁 Re-indexed '{file_name}' in {elapsed:.2f}s: "
+          f"{kept} kept, {added} embedded, {len(stale_ids)} deleted")
+    return {
+        "file_id": file_id,
+        "file_name": file_name,
+        "chunks": total,
+        "kept": kept,
+        "added": added,
+        "deleted": len(stale_ids),
+        "file_hash": file_hash,
+        "seconds": round(elapsed, 3)
+    }
+
 # -------------------------
 # Product / document management
 # -------------------------
 def list_products() -> list:
     products = []
-    for c in chroma_client.list_collections():
+    for c in get_vector_client().list_collections():
         if c.name.startswith("product_"):
             product_id = c.name[len("product_"):]
             products.append(product_id)
@@ -105,7 +443,7 @@ def list_products() -> list:
 def list_documents(product_id: str) -> list:
     collection_name = f"product_{product_id}"
     try:
-        collection = chroma_client.get_collection(collection_name)
+        collection = get_collection(collection_name)
     except Exception:
         return []
 
@@ -122,11 +460,11 @@ def list_documents(product_id: str) -> list:
 def search_documents(product_id: str, query: str, top_k: int = 5):
     collection_name = f"product_{product_id}"
     try:
-        collection = chroma_client.get_collection(collection_name)
+        collection = get_collection(collection_name)
     except Exception:
         return []
 
-    query_embedding = embed_model.encode([query])[0].tolist()
+    query_embedding = encode_text(get_embed_model(), query, EMB_MODEL).tolist()
     results = collection.query(query_embeddings=[query_embedding], n_results=top_k)
 
     return [
@@ -138,29 +476,33 @@ def search_documents(product_id: str, query: str, top_k: int = 5):
         )
     ]
 
-def get_all_products_metadata():
-    all_metadata = []
-    for product_id in list_products():
-        docs = list_documents(product_id)
-        files_meta = {}
-        for doc in docs:
-            if not doc.get("metadata"):
-                continue
-            file_id = doc["metadata"]["file_id"]
-            if file_id not in files_meta:
-                files_meta[file_id] = {
-                    "file_name": doc["metadata"]["file_name"],
-                    "file_id": file_id,
-                    "uploaded_at": doc["metadata"]["uploaded_at"],
-                    "chunks": 0,
-                }
-            files_meta[file_id]["chunks"] += 1
+def _file_info(record: dict) -> dict:
+    return {k: v for k, v in record.items() if k != "product_id"}
+
+def find_file(file_id: str) -> Optional[dict]:
+    """Manifest record ({product_id, file_id, file_name, file_hash, chunks, size, local_path, uploaded_at})."""
+    return file_manifest.get_file(file_id)
+
+def file_name_exists(file_name: str) -> bool:
+    return file_manifest.file_name_exists(file_name)
 
-        all_metadata.append({
-            "product_id": product_id,
-            "files": list(files_meta.values())
-        })
-    return all_metadata
+def find_file_by_hash(file_hash: str) -> Optional[dict]:
+    """Return {product_id, file_id, file_name, uploaded_at} of a fully indexed file with this content hash."""
+    record = file_manifest.find_by_hash(file_hash)
+    if not record:
+        return None
+    return {k: record[k] for k in ("product_id", "file_id", "file_name", "uploaded_at")}
+
+def find_incomplete_file_by_hash(file_hash: str) -> Optional[dict]:
+    """Manifest record of a file with this content hash whose ingest failed part-way."""
+    return file_manifest.find_by_hash(file_hash, complete=False)
+
+def get_all_products_metadata():
+    """Products with their files and chunk counts, read from the manifest rather than the chunks."""
+    return [
+        {"product_id": product["product_id"], "files": [_file_info(f) for f in product["files"]]}
+        for product in file_manifest.products()
+    ]
 
 # -------------------------
 # Deletion logic (updated)
@@ -169,25 +511,29 @@ def delete_document_by_file_id(file_id: str):
     """
     Delete all chunks of a file given its file_id.
     Return the product_id it belonged to (for cleanup).
+    The product comes from the manifest and the chunks from a `file_id` filter,
+    so the cost follows the size of the file, not of the corpus.
     """
-    for product_id in list_products():
-        collection_name = f"product_{product_id}"
-        try:
-            collection = chroma_client.get_collection(collection_name)
-        except Exception:
-            continue
+    record = file_manifest.get_file(file_id)
+    if not record:
+        return None
+    product_id = record["product_id"]
 
-        results = collection.get()
-        ids_to_delete = [
-            doc_id for doc_id, meta in zip(results.get("ids", []), results.get("metadatas", []))
-            if meta and meta.get("file_id") == file_id
-        ]
+    try:
+        collection = get_collection(f"product_{product_id}")
+        # Ids only: the lexical index needs them, the text is never loaded
+        ids_to_delete = collection.get(where={"file_id": file_id}, include=[]).get("ids", [])
+    except Exception:
+        ids_to_delete = []
 
-        if ids_to_delete:
-            collection.delete(ids=ids_to_delete)
-            # ✅ return product_id so caller can decide if product should be deleted
-            return product_id
-    return None
+    if ids_to_delete:
+        for ids in _batched(ids_to_delete, EMBED_BATCH_SIZE * 16):
+            collection.delete(ids=ids)
+        get_lexical_index(product_id, collection).remove(ids_to_delete)
+    file_manifest.remove_file(file_id)
+    bump_product_version(product_id)
+    # ✅ return product_id so caller can decide if product should be deleted
+    return product_id
 
 def delete_product_if_empty(product_id: str):
     """
@@ -195,12 +541,16 @@ def delete_product_if_empty(product_id: str):
     """
     collection_name = f"product_{product_id}"
     try:
-        collection = chroma_client.get_collection(collection_name)
+        collection = get_collection(collection_name)
     except Exception:
         return False
 
-    results = collection.get()
-    if not results.get("ids"):
-        chroma_client.delete_collection(name=collection_name)
+    if collection.count() == 0:
+        get_vector_client().delete_collection(name=collection_name)
+        invalidate_collection(collection_name)
+        drop_lexical_index(product_id)
+        file_manifest.remove_product(product_id)
+        drop_suggestions(product_id)
+        bump_product_version(product_id)
         return True
     return False
@@ -0,0 +1,226 @@
+# backend/app/services/job_service.py
+import os
+import json
+import time
+import uuid
+import shutil
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.services.ingest_service import (
+    ingest_pdf, reindex_file_incremental, find_file_by_hash, find_incomplete_file_by_hash
+)
+from app.services.manifest import file_manifest
+from app.services.suggestion_service import refresh_suggestions
+from app.services.pdf_extract import count_pages
+
+# -------------------------
+# Config
+# -------------------------
+JOBS_FILE = os.path.join(os.path.dirname(__file__), "../../data/ingest_jobs.json")
+UPLOAD_DIR = os.path.abspath(os.getenv("UPLOAD_DIR", os.path.join(os.path.dirname(__file__), "../../uploads")))
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "2"))
+
+# Bounded pool: at most INGEST_WORKERS files are extracted / embedded at once,
+# everything else waits in the executor queue as "queued".
+_executor = ThreadPoolExecutor(max_workers=INGEST_WORKERS, thread_name_prefix="ingest")
+_lock = threading.Lock()
+_jobs: Dict[str, dict] = {}
+
+# -------------------------
+# Persistence
+# -------------------------
+def _load_jobs():
+    global _jobs
+    if os.path.exists(JOBS_FILE):
+        try:
+            with open(JOBS_FILE, "r") as f:
+                _jobs = json.load(f)
+        except Exception:
+            print("⚠️ Failed to load ingest_jobs.json, starting fresh")
+            _jobs = {}
+
+def _save_jobs():
+    # Caller holds _lock. Write-then-rename so a crash never leaves a torn file.
+    os.makedirs(os.path.dirname(JOBS_FILE), exist_ok=True)
+    tmp_path = f"{JOBS_FILE}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(_jobs, f, indent=2)
+    os.replace(tmp_path, JOBS_FILE)
+
+def _update_job(job_id: str, **fields):
+    with _lock:
+        _jobs[job_id].update(fields)
+        _save_jobs()
+
+# -------------------------
+# Worker
+# -------------------------
+def _run_job(job_id: str):
+    with _lock:
+        job = dict(_jobs[job_id])
+
+    try:
+        pages_total = count_pages(job["pdf_path"])
+    except Exception as e:
+        _update_job(job_id, status="failed", error=str(e), finished_at=datetime.utcnow().isoformat())
+        return
+
+    started = time.time()
+    resumed_from = job["chunks_embedded"]
+    pages_at_start = job["pages_done"]
+    _update_job(job_id, status="running", pages_total=pages_total,
+                started_at=job.get("started_at") or datetime.utcnow().isoformat())
+
+    def on_progress(chunks_done: int, last_meta: dict):
+        pages_done = last_meta.get("page", pages_at_start)
+        # Rate measured over this run only, so a resumed job doesn't look instant
+        elapsed = time.time() - started
+        rate = (pages_done - pages_at_start) / elapsed if elapsed > 0 else 0
+        eta = round((pages_total - pages_done) / rate, 1) if rate > 0 else None
+        _update_job(job_id, chunks_embedded=chunks_done, pages_done=pages_done, eta_seconds=eta)
+
+    try:
+        if job.get("kind") == "reindex":
+            # Idempotent: a resumed diff simply finds the chunks it already added
+            result = reindex_file_incremental(
+                job["file_id"], job["product_id"], job["pdf_path"], job["file_name"],
+                on_progress=on_progress
+            )
+            # Swap the stored file only once the index reflects the new version
+            os.makedirs(os.path.dirname(job["target_path"]), exist_ok=True)
+            shutil.move(job["pdf_path"], job["target_path"])
+            job["pdf_path"] = job["target_path"]
+            file_manifest.set_location(job["file_id"], job["target_path"])
+        else:
+            result = ingest_pdf(
+                job["product_id"], job["pdf_path"],
+                file_id=job["file_id"], file_name=job["file_name"],
+                skip=resumed_from, uploaded_at=job["uploaded_at"],
+                on_progress=on_progress, file_hash=job.get("file_hash")
+            )
+        result["size"] = os.path.getsize(job["pdf_path"])
+        result["local_path"] = job["pdf_path"]
+        _update_job(job_id, status="done", pages_done=pages_total, chunks_embedded=result["chunks"],
+                    eta_seconds=0, result=result, finished_at=datetime.utcnow().isoformat())
+    except Exception as e:
+        _update_job(job_id, status="failed", error=str(e), eta_seconds=None,
+                    finished_at=datetime.utcnow().isoformat())
+        return
+
+    # Built once per content change here, so the suggestions endpoint only reads them
+    try:
+        refresh_suggestions(job["product_id"])
+    except Exception as e:
+        print(f"⚠️ Suggestions for product {job['product_id']} not refreshed: {e}")
+
+# -------------------------
+# Public API
+# -------------------------
+def _new_job(product_id: str, pdf_path: str, file_name: str, file_hash: str = None,
+             file_id: str = None, kind: str = "ingest", target_path: str = None) -> dict:
+    # Caller holds _lock and submits the job to the executor once it has released it
+    job_id = str(uuid.uuid4())
+    job = {
+        "job_id": job_id,
+        "kind": kind,
+        "status": "queued",
+        "product_id": product_id,
+        "file_id": file_id or str(uuid.uuid4()),
+        "file_name": file_name,
+        "file_hash": file_hash,
+        "pdf_path": pdf_path,
+        "target_path": target_path,
+        "uploaded_at": datetime.utcnow().isoformat(),
+        "pages_total": None,
+        "pages_done": 0,
+        "chunks_embedded": 0,
+        "eta_seconds": None,
+        "error": None,
+        "result": None,
+    }
+    _jobs[job_id] = job
+    _save_jobs()
+    return dict(job)
+
+def submit_ingest_job(product_id: str, pdf_path: str, file_name: str, file_hash: str = None,
+                      file_id: str = None, kind: str = "ingest", target_path: str = None) -> dict:
+    """
+    Queue a PDF for ingestion and return the job record immediately.
+    kind="reindex" diffs a new version of `file_id` against its indexed chunks and
+    moves `pdf_path` to `target_path` when done.
+    """
+    with _lock:
+        job = _new_job(product_id, pdf_path, file_name, file_hash, file_id, kind, target_path)
+    _executor.submit(_run_job, job["job_id"])
+    return job
+
+def submit_if_absent(file_hash: str, prepare: Callable[[Optional[dict]], dict]) -> Tuple[str, dict]:
+    """
+    Queue an upload unless its content is already indexed or being ingested. The check
+    and the enqueue happen under one lock, so simultaneous uploads of a file queue it once.
+    `prepare(failed)` gets the manifest record of an earlier ingest of this content that
+    failed part-way (or None), moves the upload into place and returns the arguments of
+    submit_ingest_job. Returns ("indexed", file), ("active", job) or ("queued", job).
+    """
+    with _lock:
+        existing = find_file_by_hash(file_hash)
+        if existing:
+            return "indexed", existing
+        active = _active_job(file_hash)
+        if active:
+            return "active", active
+        job = _new_job(file_hash=file_hash, **prepare(find_incomplete_file_by_hash(file_hash)))
+    _executor.submit(_run_job, job["job_id"])
+    return "queued", job
+
+def get_job(job_id: str) -> Optional[dict]:
+    with _lock:
+        job = _jobs.get(job_id)
+        return dict(job) if job else None
+
+def _active_job(file_hash: str) -> Optional[dict]:
+    # Caller holds _lock
+    for job in _jobs.values():
+        if job.get("file_hash") == file_hash and job["status"] in ("queued", "running"):
+            return dict(job)
+    return None
+
+def find_active_job_by_hash(file_hash: str) -> Optional[dict]:
+    """A queued or running job for the same content, so concurrent re-uploads aren't ingested twice."""
+    with _lock:
+        return _active_job(file_hash)
+
+def list_jobs() -> List[dict]:
+    with _lock:
+        return [dict(j) for j in _jobs.values()]
+
+def resume_pending_jobs() -> int:
+    """
+    Re-queue jobs that were queued or running when the process stopped.
+    Running jobs continue after their last stored batch instead of starting over.
+    """
+    resumed = 0
+    with _lock:
+        pending = [j for j in _jobs.values() if j["status"] in ("queued", "running")]
+        for job in pending:
+            # A re-index that crashed right after swapping files re-runs against the swapped file
+            if job.get("target_path") and not os.path.exists(job["pdf_path"]):
+                job["pdf_path"] = job["target_path"]
+            if not os.path.exists(job["pdf_path"]):
+                job.update(status="failed", error="Uploaded file is missing; cannot resume")
+                continue
+            job["status"] = "queued"
+            resumed += 1
+        _save_jobs()
+    for job in pending:
+        if job["status"] == "queued":
+            _executor.submit(_run_job, job["job_id"])
+    return resumed
+
+# -------------------------
+# Initialize at import
+# -------------------------
+_load_jobs()
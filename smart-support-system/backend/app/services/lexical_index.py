@@ -0,0 +1,305 @@
+# backend/app/services/lexical_index.py
+# Per-product BM25 inverted index, kept next to each `product_{id}` Chroma collection.
+# Updates are appended to a JSONL log (data/lexical/<product>.jsonl) so ingestion
+# only writes what changed. The log is replayed on load, tailed before every search
+# (so other worker processes' writes show up) and compacted once superseded rows pass
+# LEXICAL_COMPACT_DEAD_RATIO, on load and after writes, so re-indexing doesn't grow it forever.
+import os
+import re
+import json
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import quote
+
+import numpy as np
+from filelock import FileLock
+
+# -------------------------
+# Config
+# -------------------------
+LEXICAL_INDEX_DIR = os.getenv(
+    "LEXICAL_INDEX_DIR", os.path.join(os.path.dirname(__file__), "../../data/lexical")
+)
+BM25_K1 = float(os.getenv("BM25_K1", "1.2"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+LEXICAL_COMPACT_DEAD_RATIO = float(os.getenv("LEXICAL_COMPACT_DEAD_RATIO", "0.5"))
+
+# Keeps SKUs, error codes and versions ("AB-1234", "E.102", "v2_1") as single tokens
+_TOKEN = re.compile(r"[a-z0-9]+(?:[-_./][a-z0-9]+)*")
+_PARTS = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased terms; compound codes are indexed whole and by their parts."""
+    tokens = []
+    for token in _TOKEN.findall(text.lower()):
+        tokens.append(token)
+        parts = _PARTS.findall(token)
+        if len(parts) > 1:
+            tokens.extend(parts)
+    return tokens
+
+
+class LexicalIndex:
+    """BM25 over an inverted index whose postings are scored with numpy, one array op per query term."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._lock = threading.RLock()
+        # Serialises log writes and compaction across worker processes
+        self._file_lock = FileLock(f"{path}.lock") if path else None
+        self._offset = 0
+        self._inode = None
+        self._loaded = False
+        self._reset()
+
+    def _reset(self):
+        self.doc_ids: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self.doc_len: List[int] = []
+        self.alive: List[bool] = []
+        self.live_count = 0
+        self.total_len = 0
+        self._postings: Dict[str, Tuple[List[int], List[int]]] = {}
+        self._arrays: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._len_array: Optional[np.ndarray] = None
+        self._alive_array: Optional[np.ndarray] = None
+
+    # --- mutation ---
+    def _add(self, doc_id: str, term_freqs: Dict[str, int], length: int):
+        if doc_id in self.rows:
+            self._remove(doc_id)
+        row = len(self.doc_ids)
+        self.doc_ids.append(doc_id)
+        self.rows[doc_id] = row
+        self.doc_len.append(length)
+        self.alive.append(True)
+        self.live_count += 1
+        self.total_len += length
+        for term, tf in term_freqs.items():
+            rows, tfs = self._postings.setdefault(term, ([], []))
+            rows.append(row)
+            tfs.append(tf)
+            self._arrays.pop(term, None)
+        self._len_array = self._alive_array = None
+
+    def _remove(self, doc_id: str):
+        row = self.rows.pop(doc_id, None)
+        if row is None:
+            return
+        self.alive[row] = False
+        self.live_count -= 1
+        self.total_len -= self.doc_len[row]
+        self._alive_array = None
+
+    def _apply(self, record: dict):
+        if record["op"] == "add":
+            self._add(record["id"], record["tf"], record["len"])
+        else:
+            for doc_id in record["ids"]:
+                self._remove(doc_id)
+
+    @contextmanager
+    def _locked(self):
+        """This process's lock plus, for an index kept on disk, the lock on its log file."""
+        with self._lock:
+            if not self.path:
+                yield
+                return
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with self._file_lock:
+                yield
+
+    def _write(self, records: List[dict]):
+        """Append records to the log and apply them."""
+        with self._locked():
+            if not self.path:
+                for record in records:
+                    self._apply(record)
+            elif records:
+                with open(self.path, "ab") as f:
+                    f.write("".join(json.dumps(r, separators=(",", ":")) + "\n" for r in records).encode("utf-8"))
+                # Replays other processes' lines that came before ours, then ours
+                self._sync()
+            # Re-added and deleted rows stay in the postings (and the log) until compaction
+            self._compact_if_mostly_dead()
+
+    def add(self, ids: List[str], texts: List[str]):
+        """Index (or re-index) documents; existing ids are replaced."""
+        records = []
+        for doc_id, text in zip(ids, texts):
+            tokens = tokenize(text)
+            records.append({"op": "add", "id": doc_id, "tf": dict(Counter(tokens)), "len": len(tokens)})
+        self._write(records)
+
+    def remove(self, ids: Iterable[str]):
+        ids = list(ids)
+        if ids:
+            self._write([{"op": "delete", "ids": ids}])
+
+    # --- persistence ---
+    def _sync(self):
+        """Replay log lines appended since the last read, including those of other worker processes."""
+        if not self.path:
+            return
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            if self._inode is not None:
+                self._reset()
+                self._offset, self._inode = 0, None
+            return
+        if stat.st_ino != self._inode or stat.st_size < self._offset:
+            # Compacted or recreated elsewhere: start over
+            self._reset()
+            self._offset, self._inode = 0, stat.st_ino
+        if stat.st_size == self._offset:
+            return
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            data = f.read()
+        # A trailing line without newline is still being written; pick it up next time
+        complete = data[:data.rfind(b"\n") + 1]
+        for line in complete.splitlines():
+            if line.strip():
+                self._apply(json.loads(line))
+        self._offset += len(complete)
+
+    def _compact_if_mostly_dead(self):
+        dead = len(self.doc_ids) - self.live_count
+        if dead and dead > LEXICAL_COMPACT_DEAD_RATIO * len(self.doc_ids):
+            self.compact()
+
+    def load(self):
+        with self._locked():
+            self._sync()
+            self._compact_if_mostly_dead()
+
+    def compact(self):
+        """Rewrite the log (and rebuild postings) with live documents only."""
+        with self._locked():
+            # Nobody can append while we hold the lock, so the rewrite keeps every process's writes
+            self._sync()
+            term_freqs: Dict[int, Dict[str, int]] = {row: {} for row in self.rows.values()}
+            for term, (rows, tfs) in self._postings.items():
+                for row, tf in zip(rows, tfs):
+                    if row in term_freqs:
+                        term_freqs[row][term] = tf
+            records = [{"op": "add", "id": doc_id, "tf": term_freqs[row], "len": self.doc_len[row]}
+                       for doc_id, row in self.rows.items()]
+
+            self._reset()
+            for record in records:
+                self._apply(record)
+
+            if self.path:
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write("".join(json.dumps(r, separators=(",", ":")) + "\n" for r in records).encode("utf-8"))
+                    self._offset = f.tell()
+                os.replace(tmp_path, self.path)
+                self._inode = os.stat(self.path).st_ino
+
+    # --- search ---
+    def _posting_arrays(self, term: str):
+        arrays = self._arrays.get(term)
+        if arrays is None:
+            rows, tfs = self._postings[term]
+            arrays = (np.asarray(rows, dtype=np.int64), np.asarray(tfs, dtype=np.float32))
+            self._arrays[term] = arrays
+        return arrays
+
+    def search(self, query: str, n: int = 10) -> Tuple[List[str], np.ndarray]:
+        """Top-n (ids, BM25 scores) for the query; documents without any query term are skipped."""
+        with self._lock:
+            self._sync()
+            if not self.live_count:
+                return [], np.zeros(0, dtype=np.float32)
+            if self._len_array is None:
+                self._len_array = np.asarray(self.doc_len, dtype=np.float32)
+            if self._alive_array is None:
+                self._alive_array = np.asarray(self.alive, dtype=bool)
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * self._len_array / (self.total_len / self.live_count))
+
+            scores = np.zeros(len(self.doc_ids), dtype=np.float32)
+            for term in set(tokenize(query)):
+                if term not in self._postings:
+                    continue
+                rows, tfs = self._posting_arrays(term)
+                df = int(self._alive_array[rows].sum())
+                if not df:
+                    continue
+                idf = np.log(1 + (self.live_count - df + 0.5) / (df + 0.5))
+                # rows are unique within a posting list, so fancy-index += is safe
+                scores[rows] += idf * tfs * (BM25_K1 + 1) / (tfs + norm[rows])
+
+            scores[~self._alive_array] = 0
+            candidates = np.flatnonzero(scores > 0)
+            if not len(candidates):
+                return [], np.zeros(0, dtype=np.float32)
+            if len(candidates) > n:
+                candidates = candidates[np.argpartition(-scores[candidates], n - 1)[:n]]
+            candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+            return [self.doc_ids[r] for r in candidates], scores[candidates]
+
+    def __len__(self):
+        return self.live_count
+
+
+# -------------------------
+# Per-product registry
+# -------------------------
+_indexes: Dict[str, LexicalIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def _index_path(product_id: str) -> str:
+    return os.path.join(LEXICAL_INDEX_DIR, f"{quote(product_id, safe='')}.jsonl")
+
+
+def _backfill(index: LexicalIndex, collection, batch_size: int = 500):
+    """Build the index for a collection that was ingested before lexical indexing existed."""
+    total = collection.count()
+    for offset in range(0, total, batch_size):
+        results = collection.get(limit=batch_size, offset=offset, include=["documents"])
+        index.add(results["ids"], results["documents"])
+
+
+def get_lexical_index(product_id: str, collection=None) -> LexicalIndex:
+    """
+    The product's index, loaded from disk on first use. If it has never been built
+    and `collection` is given, it is backfilled from the collection's documents.
+    Loading holds only that index's lock, so other products stay searchable meanwhile.
+    """
+    with _indexes_lock:
+        index = _indexes.get(product_id)
+        if index is None:
+            index = _indexes[product_id] = LexicalIndex(_index_path(product_id))
+    if not index._loaded:
+        with index._locked():
+            if not index._loaded:
+                if os.path.exists(index.path):
+                    index.load()
+                elif collection is not None and collection.count():
+                    _backfill(index, collection)
+                index._loaded = True
+    return index
+
+
+def drop_lexical_index(product_id: str):
+    with _indexes_lock:
+        _indexes.pop(product_id, None)
+        path = _index_path(product_id)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """Fuse ranked id lists: score(id) = sum over lists of 1 / (k + rank)."""
+    fused: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,158 @@
+# backend/app/services/llm_provider.py
+# LLM backends behind one interface, picked by LLM_PROVIDER (app.core.config):
+#   groq - the Groq API (needs GROQ_API_KEY)
+#   stub - a local stand-in with no network: configurable time to first token, streaming
+#          rate and injected errors, for load tests and offline benchmarks
+#
+# Every backend takes a chat completion request dict (model, messages, temperature,
+# max_tokens) and returns / streams the answer text, sync and async.
+import os
+import time
+import random
+import asyncio
+import threading
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from app.core.registry import get_groq_client, get_async_groq_client
+
+# -------------------------
+# Config (stub backend)
+# -------------------------
+# Time to first token: median in ms, and its distribution around it
+STUB_LLM_LATENCY_MS = float(os.getenv("STUB_LLM_LATENCY_MS", "300"))
+# fixed | uniform | normal | lognormal | exponential
+STUB_LLM_LATENCY_DIST = os.getenv("STUB_LLM_LATENCY_DIST", "lognormal")
+# Relative: sigma for normal / lognormal, +- fraction for uniform; unused by fixed / exponential
+STUB_LLM_LATENCY_SPREAD = float(os.getenv("STUB_LLM_LATENCY_SPREAD", "0.5"))
+# Generation speed after the first token; 0 = all at once
+STUB_LLM_TOKENS_PER_SEC = float(os.getenv("STUB_LLM_TOKENS_PER_SEC", "400"))
+# Answer length, capped by the request's max_tokens
+STUB_LLM_OUTPUT_TOKENS = int(os.getenv("STUB_LLM_OUTPUT_TOKENS", "150"))
+# Share of requests that fail (streams fail part-way through)
+STUB_LLM_ERROR_RATE = float(os.getenv("STUB_LLM_ERROR_RATE", "0"))
+STUB_LLM_SEED = os.getenv("STUB_LLM_SEED")
+
+
+class LLMError(RuntimeError):
+    pass
+
+
+class GroqProvider:
+    name = "groq"
+
+    def complete(self, request: Dict) -> str:
+        response = get_groq_client().chat.completions.create(**request)
+        return response.choices[0].message.content
+
+    def stream(self, request: Dict) -> Iterator[str]:
+        for chunk in get_groq_client().chat.completions.create(**request, stream=True):
+            text = chunk.choices[0].delta.content if chunk.choices else None
+            if text:
+                yield text
+
+    async def acomplete(self, request: Dict) -> str:
+        response = await get_async_groq_client().chat.completions.create(**request)
+        return response.choices[0].message.content
+
+    async def astream(self, request: Dict) -> AsyncIterator[str]:
+        stream = await get_async_groq_client().chat.completions.create(**request, stream=True)
+        async for chunk in stream:
+            text = chunk.choices[0].delta.content if chunk.choices else None
+            if text:
+                yield text
+
+
+class StubProvider:
+    """
+    Answers with words taken from the prompt after a sampled delay. Settings are read
+    when the provider is created, so a benchmark can set the STUB_LLM_* values first.
+    """
+    name = "stub"
+
+    def __init__(self, latency_ms: float = None, dist: str = None, spread: float = None,
+                 tokens_per_sec: float = None, output_tokens: int = None, error_rate: float = None,
+                 seed: Optional[int] = None):
+        self.latency_ms = STUB_LLM_LATENCY_MS if latency_ms is None else latency_ms
+        self.dist = dist or STUB_LLM_LATENCY_DIST
+        self.spread = STUB_LLM_LATENCY_SPREAD if spread is None else spread
+        self.tokens_per_sec = STUB_LLM_TOKENS_PER_SEC if tokens_per_sec is None else tokens_per_sec
+        self.output_tokens = STUB_LLM_OUTPUT_TOKENS if output_tokens is None else output_tokens
+        self.error_rate = STUB_LLM_ERROR_RATE if error_rate is None else error_rate
+        if seed is None and STUB_LLM_SEED:
+            seed = int(STUB_LLM_SEED)
+        if self.dist not in ("fixed", "uniform", "normal", "lognormal", "exponential"):
+            raise ValueError(f"Unknown STUB_LLM_LATENCY_DIST '{self.dist}'")
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()  # one Random shared by threads and the event loop
+
+    def _first_token_seconds(self) -> float:
+        median = self.latency_ms / 1000
+        if self.dist == "fixed":
+            return median
+        if self.dist == "uniform":
+            return median * self._rng.uniform(1 - self.spread, 1 + self.spread)
+        if self.dist == "normal":
+            return max(self._rng.gauss(median, median * self.spread), 0.0)
+        if self.dist == "lognormal":
+            return median * self._rng.lognormvariate(0, self.spread)
+        return self._rng.expovariate(1 / median) if median > 0 else 0.0
+
+    def _plan(self, request: Dict) -> Tuple[float, List[str], Optional[int]]:
+        """(seconds to first token, answer pieces, index of the piece that fails or None)."""
+        words = request["messages"][-1]["content"].split() or ["stub"]
+        n = max(min(self.output_tokens, request.get("max_tokens") or self.output_tokens), 1)
+        with self._lock:
+            delay = self._first_token_seconds()
+            start = self._rng.randrange(len(words))
+            fail_at = self._rng.randrange(n) if self._rng.random() < self.error_rate else None
+        pieces = [words[(start + i) % len(words)] + " " for i in range(n)]
+        return delay, pieces, fail_at
+
+    def _due(self, delay: float, i: int) -> float:
+        """Seconds after the call at which piece i is complete."""
+        return delay + (i / self.tokens_per_sec if self.tokens_per_sec > 0 else 0.0)
+
+    def complete(self, request: Dict) -> str:
+        delay, pieces, fail_at = self._plan(request)
+        time.sleep(self._due(delay, len(pieces) if fail_at is None else fail_at))
+        if fail_at is not None:
+            raise LLMError("Stub LLM: injected error")
+        return "".join(pieces).strip()
+
+    def stream(self, request: Dict) -> Iterator[str]:
+        started = time.monotonic()
+        delay, pieces, fail_at = self._plan(request)
+        for i, piece in enumerate(pieces):
+            time.sleep(max(started + self._due(delay, i) - time.monotonic(), 0))
+            if i == fail_at:
+                raise LLMError("Stub LLM: injected error")
+            yield piece
+
+    async def acomplete(self, request: Dict) -> str:
+        delay, pieces, fail_at = self._plan(request)
+        await asyncio.sleep(self._due(delay, len(pieces) if fail_at is None else fail_at))
+        if fail_at is not None:
+            raise LLMError("Stub LLM: injected error")
+        return "".join(pieces).strip()
+
+    async def astream(self, request: Dict) -> AsyncIterator[str]:
+        started = time.monotonic()
+        delay, pieces, fail_at = self._plan(request)
+        for i, piece in enumerate(pieces):
+            await asyncio.sleep(max(started + self._due(delay, i) - time.monotonic(), 0))
+            if i == fail_at:
+                raise LLMError("Stub LLM: injected error")
+            yield piece
+
+
+PROVIDERS = {"groq": GroqProvider, "stub": StubProvider}
+
+
+def load_llm_provider(name: str):
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown LLM_PROVIDER '{name}' (expected one of: {', '.join(PROVIDERS)})")
+    provider = PROVIDERS[name]()
+    if name == "stub":
+        print(f"🧪 Using stub LLM: {provider.latency_ms:g} ms {provider.dist} to first token, "
+              f"{provider.tokens_per_sec:g} tokens/s, {provider.error_rate:.0%} errors")
+    return provider
@@ -0,0 +1,187 @@
+# backend/app/services/manifest.py
+# Products and their files (name, hash, chunk count, size, path, upload time) in SQLite,
+# so listings, duplicate checks and downloads never scan the vector collections.
+# Ingest, re-index and delete update it right after they change the collection; an
+# existing deployment is backfilled from chunk metadata once, on first use.
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+
+# -------------------------
+# Config
+# -------------------------
+MANIFEST_PATH = os.getenv(
+    "MANIFEST_PATH", os.path.join(os.path.dirname(__file__), "../../data/manifest.sqlite")
+)
+
+FILE_FIELDS = ("file_id", "product_id", "file_name", "file_hash", "chunks", "size", "local_path", "uploaded_at")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (product_id TEXT PRIMARY KEY, created_at TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS files (
+    file_id TEXT PRIMARY KEY,
+    product_id TEXT NOT NULL,
+    file_name TEXT NOT NULL,
+    file_hash TEXT,
+    chunks INTEGER NOT NULL DEFAULT 0,
+    size INTEGER,
+    local_path TEXT,
+    uploaded_at TEXT,
+    complete INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS files_by_product ON files (product_id);
+CREATE INDEX IF NOT EXISTS files_by_hash ON files (file_hash);
+CREATE INDEX IF NOT EXISTS files_by_name ON files (file_name);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+def scan_collections() -> Iterable[dict]:
+    """File records rebuilt from chunk metadata of every product collection (metadatas only, no text)."""
+    from app.core.registry import get_vector_client
+
+    for collection in get_vector_client().list_collections():
+        if not collection.name.startswith("product_"):
+            continue
+        product_id = collection.name[len("product_"):]
+        results = collection.get(include=["metadatas"])
+        files: Dict[str, dict] = {}
+        for meta in results.get("metadatas") or []:
+            if not meta or "file_id" not in meta:
+                continue
+            record = files.setdefault(meta["file_id"], {
+                "file_id": meta["file_id"],
+                "product_id": product_id,
+                "file_name": meta.get("file_name", ""),
+                "file_hash": meta.get("file_hash") or None,
+                "chunks": 0,
+                "uploaded_at": meta.get("uploaded_at"),
+            })
+            record["chunks"] += 1
+        yield {"product_id": product_id}
+        yield from files.values()
+
+
+class FileManifest:
+    def __init__(self, path: str, scan: Callable[[], Iterable[dict]] = scan_collections):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._scan = scan
+        self._lock = threading.Lock()
+        self._built = False
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        # Manifests created before ingests were marked complete
+        if "complete" not in {row["name"] for row in self._conn.execute("PRAGMA table_info(files)")}:
+            self._conn.execute("ALTER TABLE files ADD COLUMN complete INTEGER NOT NULL DEFAULT 1")
+
+    def _ensure_built(self):
+        # Caller holds _lock
+        if self._built:
+            return
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            if not self._conn.execute("SELECT 1 FROM meta WHERE key = 'built_at'").fetchone():
+                records = list(self._scan())
+                now = datetime.utcnow().isoformat()
+                for record in records:
+                    self._conn.execute("INSERT OR IGNORE INTO products (product_id, created_at) VALUES (?, ?)",
+                                       (record["product_id"], record.get("uploaded_at") or now))
+                    if "file_id" in record:
+                        self._conn.execute(
+                            f"INSERT OR REPLACE INTO files ({', '.join(FILE_FIELDS)}) VALUES ({', '.join('?' * len(FILE_FIELDS))})",
+                            [record.get(k) for k in FILE_FIELDS]
+                        )
+                self._conn.execute("INSERT INTO meta (key, value) VALUES ('built_at', ?)", (now,))
+                print(f"🗂️ Built file manifest: {sum('file_id' in r for r in records)} files")
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._built = True
+
+    def _query(self, sql: str, params=()) -> List[dict]:
+        with self._lock:
+            self._ensure_built()
+            return [dict(row) for row in self._conn.execute(sql, params).fetchall()]
+
+    def _write(self, statements):
+        """Run (sql, params) pairs in one transaction."""
+        with self._lock:
+            self._ensure_built()
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for sql, params in statements:
+                    self._conn.execute(sql, params)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    # --- writes ---
+    def record_file(self, product_id: str, file_id: str, file_name: str, chunks: int, file_hash: str = None,
+                    uploaded_at: str = None, size: int = None, local_path: str = None, increment: bool = False,
+                    complete: bool = True):
+        """
+        Insert or update a file. `chunks` replaces the stored count, or is added to it
+        with `increment`; other fields left as None keep their stored value. An ingest
+        that failed part-way is recorded with `complete=False`.
+        """
+        chunks_sql = "files.chunks + excluded.chunks" if increment else "excluded.chunks"
+        self._write([
+            ("INSERT OR IGNORE INTO products (product_id, created_at) VALUES (?, ?)",
+             (product_id, uploaded_at or datetime.utcnow().isoformat())),
+            (f"""INSERT INTO files ({', '.join(FILE_FIELDS)}, complete) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                 ON CONFLICT (file_id) DO UPDATE SET
+                    product_id = excluded.product_id,
+                    file_name = excluded.file_name,
+                    chunks = {chunks_sql},
+                    file_hash = COALESCE(excluded.file_hash, files.file_hash),
+                    size = COALESCE(excluded.size, files.size),
+                    local_path = COALESCE(excluded.local_path, files.local_path),
+                    uploaded_at = COALESCE(excluded.uploaded_at, files.uploaded_at),
+                    complete = excluded.complete""",
+             (file_id, product_id, file_name, file_hash, chunks, size, local_path, uploaded_at, int(complete))),
+        ])
+
+    def set_location(self, file_id: str, local_path: str, size: int = None):
+        self._write([("UPDATE files SET local_path = ?, size = COALESCE(?, size) WHERE file_id = ?",
+                      (local_path, size, file_id))])
+
+    def remove_file(self, file_id: str):
+        self._write([("DELETE FROM files WHERE file_id = ?", (file_id,))])
+
+    def remove_product(self, product_id: str):
+        self._write([
+            ("DELETE FROM files WHERE product_id = ?", (product_id,)),
+            ("DELETE FROM products WHERE product_id = ?", (product_id,)),
+        ])
+
+    # --- reads ---
+    def get_file(self, file_id: str) -> Optional[dict]:
+        rows = self._query("SELECT * FROM files WHERE file_id = ?", (file_id,))
+        return rows[0] if rows else None
+
+    def find_by_hash(self, file_hash: str, complete: bool = True) -> Optional[dict]:
+        """Oldest file with this content hash whose ingest finished (or, with complete=False, failed)."""
+        rows = self._query("SELECT * FROM files WHERE file_hash = ? AND complete = ? ORDER BY uploaded_at LIMIT 1",
+                           (file_hash, int(complete)))
+        return rows[0] if rows else None
+
+    def file_name_exists(self, file_name: str) -> bool:
+        return bool(self._query("SELECT 1 FROM files WHERE file_name = ? LIMIT 1", (file_name,)))
+
+    def products(self) -> List[dict]:
+        """[{product_id, files: [...]}], products in creation order, files in upload order."""
+        products = {row["product_id"]: {"product_id": row["product_id"], "files": []}
+                    for row in self._query("SELECT product_id FROM products ORDER BY created_at, product_id")}
+        for row in self._query("SELECT * FROM files ORDER BY uploaded_at, file_id"):
+            products.setdefault(row["product_id"], {"product_id": row["product_id"], "files": []})
+            products[row["product_id"]]["files"].append(row)
+        return list(products.values())
+
+
+file_manifest = FileManifest(MANIFEST_PATH)
@@ -0,0 +1,165 @@
+# backend/app/services/onnx_embedder.py
+# ONNX Runtime embedding backend for CPU-only nodes (EMB_BACKEND=onnx).
+# The SentenceTransformer transformer is exported once with torch.onnx, optionally
+# int8-quantized with onnxruntime's dynamic quantization, and served with the same
+# pooling and normalization as the original model, so vectors stay in the same space
+# and existing collections keep working without re-indexing.
+import os
+import json
+import shutil
+import tempfile
+from typing import List, Sequence
+
+import numpy as np
+
+EXPORT_CONFIG = "embedder.json"
+
+
+def _model_dir(onnx_dir: str, model_name: str) -> str:
+    return os.path.join(onnx_dir, model_name.replace("/", "__"))
+
+
+def export_onnx(model_name: str, out_dir: str, opset: int = 14) -> str:
+    """
+    Export `model_name` to `out_dir`: model.onnx (fp32), model.int8.onnx, the tokenizer
+    and embedder.json (pooling, normalization, max_seq_length). Written to a temporary
+    directory first, so concurrent workers never see a half-exported model.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+    try:
+        # Needs the `onnx` package, which onnxruntime itself doesn't install
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+    except ImportError as e:
+        raise ImportError(f"ONNX export needs the 'onnx' package (pip install onnx; see requirements.txt): {e}") from e
+
+    st = SentenceTransformer(model_name, device="cpu")
+    pooling = st[1].get_config_dict() if len(st) > 1 else {}
+    if pooling.get("pooling_mode_mean_tokens"):
+        mode = "mean"
+    elif pooling.get("pooling_mode_cls_token"):
+        mode = "cls"
+    else:
+        raise ValueError(f"Unsupported pooling for ONNX export of {model_name}: {pooling}")
+
+    sample = st.tokenizer(["export sample"], return_tensors="pt")
+    input_names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in sample]
+
+    class Encoder(torch.nn.Module):
+        def __init__(self, auto_model):
+            super().__init__()
+            self.auto_model = auto_model
+
+        def forward(self, *inputs):
+            return self.auto_model(**dict(zip(input_names, inputs))).last_hidden_state
+
+    os.makedirs(os.path.dirname(os.path.abspath(out_dir)), exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(out_dir)), suffix=".export")
+    try:
+        fp32_path = os.path.join(tmp_dir, "model.onnx")
+        axes = {0: "batch", 1: "sequence"}
+        torch.onnx.export(
+            Encoder(st[0].auto_model.eval()),
+            tuple(sample[n] for n in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes={**{n: axes for n in input_names}, "last_hidden_state": axes},
+            opset_version=opset,
+            dynamo=False,
+        )
+        quantize_dynamic(fp32_path, os.path.join(tmp_dir, "model.int8.onnx"), weight_type=QuantType.QInt8)
+        st.tokenizer.save_pretrained(tmp_dir)
+        with open(os.path.join(tmp_dir, EXPORT_CONFIG), "w") as f:
+            json.dump({
+                "model_name": model_name,
+                "pooling": mode,
+                "normalize": any(type(m).__name__ == "Normalize" for m in st),
+                "max_seq_length": st.max_seq_length,
+                "dimension": st.get_sentence_embedding_dimension(),
+            }, f, indent=2)
+        try:
+            os.replace(tmp_dir, out_dir)
+        except OSError as e:
+            # Only a finished export from another worker may take the place of ours
+            if not os.path.exists(os.path.join(out_dir, EXPORT_CONFIG)):
+                print(f"❌ ONNX export of {model_name} could not be moved to {out_dir}: {e}")
+                raise
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return out_dir
+
+
+class OnnxEmbedder:
+    """
+    Drop-in for the parts of SentenceTransformer the app uses:
+    `encode(texts, batch_size)`, `tokenizer` and `max_seq_length`.
+    """
+
+    def __init__(self, model_dir: str, quantized: bool = True, intra_op_threads: int = 0,
+                 inter_op_threads: int = 1):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        with open(os.path.join(model_dir, EXPORT_CONFIG)) as f:
+            self.config = json.load(f)
+        self.max_seq_length = self.config["max_seq_length"]
+        self.pooling = self.config["pooling"]
+        self.normalize = self.config["normalize"]
+        self.quantized = quantized
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        # 0 lets onnxruntime use one thread per physical core
+        if intra_op_threads > 0:
+            options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = inter_op_threads
+        model_file = "model.int8.onnx" if quantized else "model.onnx"
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, model_file), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.config["dimension"]
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encoded = self.tokenizer(texts, padding=True, truncation=True, max_length=self.max_seq_length,
+                                 return_tensors="np")
+        feed = {name: encoded[name].astype(np.int64) for name in self.input_names}
+        hidden = self.session.run(None, feed)[0]
+        if self.pooling == "cls":
+            pooled = hidden[:, 0]
+        else:
+            mask = feed["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if self.normalize:
+            pooled = pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled.astype(np.float32)
+
+    def encode(self, texts, batch_size: int = 32, **kwargs) -> np.ndarray:
+        single = isinstance(texts, str)
+        texts: Sequence[str] = [texts] if single else list(texts)
+        if not texts:
+            return np.zeros((0, self.get_sentence_embedding_dimension()), dtype=np.float32)
+        # Length-sorted batches keep padding (and wasted compute) small
+        order = np.argsort([-len(t) for t in texts], kind="stable")
+        out = np.empty((len(texts), self.get_sentence_embedding_dimension()), dtype=np.float32)
+        for start in range(0, len(texts), batch_size):
+            idx = order[start:start + batch_size]
+            out[idx] = self._encode_batch([texts[i] for i in idx])
+        if kwargs.get("normalize_embeddings") and not self.normalize:
+            out /= np.clip(np.linalg.norm(out, axis=1, keepdims=True), 1e-12, None)
+        return out[0] if single else out
+
+
+def load_onnx_embedder(model_name: str, onnx_dir: str, quantized: bool = True, intra_op_threads: int = 0,
+                       inter_op_threads: int = 1) -> OnnxEmbedder:
+    """Load the exported model, exporting it first if this node has never done so."""
+    model_dir = _model_dir(onnx_dir, model_name)
+    if not os.path.exists(os.path.join(model_dir, EXPORT_CONFIG)):
+        print(f"📦 Exporting {model_name} to ONNX in {model_dir} ...")
+        export_onnx(model_name, model_dir)
+    return OnnxEmbedder(model_dir, quantized, intra_op_threads, inter_op_threads)
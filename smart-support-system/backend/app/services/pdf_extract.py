@@ -0,0 +1,59 @@
+# backend/app/services/pdf_extract.py
+# Page-streaming PDF text extraction.
+# Kept free of model / vector-store imports: worker processes are started with
+# "spawn" and import only this module, so they never load the embedding model.
+import os
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Tuple
+
+import fitz  # PyMuPDF
+
+# -------------------------
+# Config
+# -------------------------
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", str(os.cpu_count() or 1)))
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "16"))
+
+
+def count_pages(pdf_path: str) -> int:
+    with fitz.open(pdf_path) as doc:
+        return doc.page_count
+
+
+def _extract_page_range(pdf_path: str, start: int, end: int) -> List[Tuple[int, str]]:
+    """Worker entry point: return (1-based page number, text) for pages [start, end)."""
+    with fitz.open(pdf_path) as doc:
+        return [(i + 1, doc[i].get_text()) for i in range(start, end)]
+
+
+def iter_pdf_pages(pdf_path: str, workers: int = None, pages_per_task: int = None) -> Iterator[Tuple[int, str]]:
+    """
+    Yield (page_number, text) in page order.
+    Page ranges are extracted in a process pool; at most two ranges per worker
+    are in flight, so memory is bounded by the window rather than the document.
+    """
+    workers = workers or PDF_EXTRACT_WORKERS
+    pages_per_task = pages_per_task or PDF_PAGES_PER_TASK
+    page_count = count_pages(pdf_path)
+
+    # Small documents: a pool costs more than it saves
+    if workers <= 1 or page_count <= pages_per_task:
+        with fitz.open(pdf_path) as doc:
+            for i in range(page_count):
+                yield i + 1, doc[i].get_text()
+        return
+
+    ranges = [(s, min(s + pages_per_task, page_count)) for s in range(0, page_count, pages_per_task)]
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges)), mp_context=ctx) as pool:
+        pending = deque()
+        next_range = 0
+        while next_range < len(ranges) or pending:
+            while next_range < len(ranges) and len(pending) < workers * 2:
+                start, end = ranges[next_range]
+                pending.append(pool.submit(_extract_page_range, pdf_path, start, end))
+                next_range += 1
+            for page in pending.popleft().result():
+                yield page
@@ -1,9 +1,11 @@
 # backend/app/services/rag_pipeline.py
 
 import os
+from typing import AsyncIterator, Iterator, List, Tuple
 from dotenv import load_dotenv
-from groq import Groq
-from app.services.rag_service import retrieve_top_k, _build_prompt
+from app.core.registry import get_llm, product_version, run_cpu
+from app.services.rag_service import retrieve_top_k, _build_prompt, _query_embedding
+from app.services.answer_cache import cached_answer, cache_answer
 
 # ✅ Correct path to load .env
 load_dotenv(
@@ -12,29 +14,16 @@ load_dotenv(
     )
 )
 
-# ✅ Initialize Groq client safely
-api_key = os.getenv("GROQ_API_KEY")
-if not api_key:
-    raise RuntimeError("❌ GROQ_API_KEY is missing. Please set it in your .env file")
+# ✅ Groq client is shared with rag_service and created on first use (app.core.registry)
 
-groq_client = Groq(api_key=api_key)
 
+RAG_MODEL = "llama-3.1-8b-instant"
+NO_DOCUMENTS_ANSWER = "No documents found for this product."
 
-def query_groq_rag(product_id: str, question: str):
-    """Query Groq LLM with retrieved context."""
-    docs, _ = retrieve_top_k(product_id, question, k=3)
-    if not docs:
-        return {
-            "answer": "No documents found for this product.",
-            "sources": [],
-            "confidence": 0.0,
-            "escalate_to_human": True,
-        }
 
-    prompt = _build_prompt(question, docs)
-
-    response = groq_client.chat.completions.create(
-        model="llama-3.1-8b-instant",
+def _rag_request(prompt: str) -> dict:
+    return dict(
+        model=RAG_MODEL,
         messages=[
             {"role": "system", "content": "You are a helpful customer support AI."},
             {"role": "user", "content": prompt},
@@ -43,14 +32,104 @@ def query_groq_rag(product_id: str, question: str):
         max_tokens=512,
     )
 
-    answer = response.choices[0].message.content
 
+def _no_documents_result() -> dict:
     return {
+        "answer": NO_DOCUMENTS_ANSWER,
+        "sources": [],
+        "confidence": 0.0,
+        "escalate_to_human": True,
+    }
+
+
+def _prepare(product_id: str, question: str) -> dict:
+    """
+    Everything before the LLM call: {"result"} when no call is needed (cached answer,
+    no documents), else {"prompt", "docs", "q_emb", "version"} for _finish.
+    """
+    # Repeated / near-duplicate questions skip retrieval and the LLM entirely
+    q_emb = _query_embedding(question)
+    cached = cached_answer(product_id, "rag", q_emb)
+    if cached is not None:
+        return {"result": cached}
+    version = product_version(product_id)
+
+    docs, _ = retrieve_top_k(product_id, question, k=3)
+    if not docs:
+        return {"result": _no_documents_result()}
+    return {"prompt": _build_prompt(question, docs), "docs": docs, "q_emb": q_emb, "version": version}
+
+
+def _sources(docs) -> List[str]:
+    return [d["document"][:200] for d in docs]
+
+
+def _finish(product_id: str, prepared: dict, answer: str) -> dict:
+    result = {
         "answer": answer,
-        "sources": [d["document"][:200] for d in docs],
+        "sources": _sources(prepared["docs"]),
         "confidence": 1.0,
         "escalate_to_human": False,
     }
+    cache_answer(product_id, "rag", prepared["q_emb"], result, prepared["version"])
+    return result
+
+
+def query_groq_rag(product_id: str, question: str):
+    """Query Groq LLM with retrieved context."""
+    prepared = _prepare(product_id, question)
+    if "result" in prepared:
+        return prepared["result"]
+
+    return _finish(product_id, prepared, get_llm().complete(_rag_request(prepared["prompt"])))
+
+
+def stream_groq_rag(product_id: str, question: str) -> Iterator[Tuple[str, object]]:
+    """
+    Streaming variant of query_groq_rag. Yields ("sources", [...]) as soon as retrieval
+    is done, then ("token", text) for every piece Groq streams back, and finally
+    ("done", result) with the same result dict query_groq_rag returns.
+    """
+    prepared = _prepare(product_id, question)
+    if "result" in prepared:
+        # Cached or nothing to answer from: replayed as a single token
+        yield "sources", prepared["result"]["sources"]
+        yield "token", prepared["result"]["answer"]
+        yield "done", prepared["result"]
+        return
+
+    yield "sources", _sources(prepared["docs"])
+    parts = []
+    for text in get_llm().stream(_rag_request(prepared["prompt"])):
+        parts.append(text)
+        yield "token", text
+    yield "done", _finish(product_id, prepared, "".join(parts))
+
+
+async def query_groq_rag_async(product_id: str, question: str):
+    """query_groq_rag for async routes: CPU work on the CPU executor, the LLM call awaited."""
+    prepared = await run_cpu(_prepare, product_id, question)
+    if "result" in prepared:
+        return prepared["result"]
+
+    return _finish(product_id, prepared, await get_llm().acomplete(_rag_request(prepared["prompt"])))
+
+
+async def stream_groq_rag_async(product_id: str, question: str) -> AsyncIterator[Tuple[str, object]]:
+    """stream_groq_rag for async routes; same events."""
+    prepared = await run_cpu(_prepare, product_id, question)
+    if "result" in prepared:
+        yield "sources", prepared["result"]["sources"]
+        yield "token", prepared["result"]["answer"]
+        yield "done", prepared["result"]
+        return
+
+    yield "sources", _sources(prepared["docs"])
+    parts = []
+    async for text in get_llm().astream(_rag_request(prepared["prompt"])):
+        parts.append(text)
+        yield "token", text
+    yield "done", _finish(product_id, prepared, "".join(parts))
 
 
 def generate_suggestions_from_rag(product_id: str, num_suggestions: int = 3):
@@ -1,134 +1,458 @@
 # backend/app/services/rag_service.py
 import os
 import re
+import time
 import numpy as np
-import chromadb
-from sentence_transformers import SentenceTransformer
-from typing import List, Dict
-from groq import Groq
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import List, Dict, Optional, Tuple
+from app.core.registry import (
+    get_embed_model, embed_model_key, get_vector_client, get_llm, get_collection,
+    invalidate_collection, collection_cache_stats, product_version, run_cpu
+)
+from app.services.answer_cache import answer_cache, cached_answer, cache_answer
+from app.services.context_packer import PROMPT_TOKEN_BUDGET, pack_context, count_tokens
+from app.services.embedding_cache import encode_text, normalize_text
+from app.services.lexical_index import get_lexical_index, reciprocal_rank_fusion
+from app.services.rerank import mmr
+from app.utils.lru import LRUCache
 
 # --- Setup ---
-CHROMA_DIR = os.getenv("CHROMA_PERSIST_DIR", "chroma_db")
-EMB_MODEL = os.getenv("EMB_MODEL", "all-MiniLM-L6-v2")
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+# Model and clients are shared process-wide and created lazily by the registry
+EMB_MODEL = embed_model_key()
 
-embed_model = SentenceTransformer(EMB_MODEL)
-chroma_client = chromadb.PersistentClient(path=CHROMA_DIR)
+# Hot questions skip hashing and the disk tier of the embedding cache entirely
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "2048"))
+_query_cache = LRUCache(QUERY_CACHE_SIZE)
 
-# Groq LLM client
-if not GROQ_API_KEY:
-    raise RuntimeError("GROQ_API_KEY not set in environment")
-groq_client = Groq(api_key=GROQ_API_KEY)
+# "hybrid" fuses BM25 and vector rankings; "vector" is embedding similarity only
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")
+HYBRID_FETCH_K = int(os.getenv("HYBRID_FETCH_K", "20"))
+RRF_K = int(os.getenv("RRF_K", "60"))
 
+# MMR re-ranking: over-fetch MMR_FETCH_K candidates, keep a diverse top-k.
+# MMR_LAMBDA = 1 is pure relevance, lower values penalise redundancy more.
+MMR_ENABLED = os.getenv("MMR_ENABLED", "true").lower() == "true"
+MMR_LAMBDA = float(os.getenv("MMR_LAMBDA", "0.7"))
+MMR_FETCH_K = int(os.getenv("MMR_FETCH_K", "20"))
 
-# --- Similarity ---
-def _cosine_sim(a: List[float], b: List[float]) -> float:
-    a = np.array(a, dtype=float).flatten()
-    b = np.array(b, dtype=float).flatten()
-    if np.linalg.norm(a) == 0.0 or np.linalg.norm(b) == 0.0:
-        return 0.0
-    return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
+# Queries without a product search every product collection in parallel
+GLOBAL_SEARCH_WORKERS = int(os.getenv("GLOBAL_SEARCH_WORKERS", "16"))
+GLOBAL_SEARCH_BUDGET_MS = int(os.getenv("GLOBAL_SEARCH_BUDGET_MS", "2000"))
+_fanout_pool = ThreadPoolExecutor(max_workers=GLOBAL_SEARCH_WORKERS, thread_name_prefix="global-search")
+
+
+def _query_embedding(query: str) -> np.ndarray:
+    key = normalize_text(query)
+    q_emb = _query_cache.get(key)
+    if q_emb is None:
+        q_emb = encode_text(get_embed_model(), key, EMB_MODEL)
+        _query_cache.put(key, q_emb)
+    return q_emb
+
+
+def retrieval_cache_stats() -> dict:
+    return {
+        "query_embeddings": _query_cache.stats(),
+        "collections": collection_cache_stats(),
+        "answers": answer_cache.stats(),
+    }
 
 
 # --- Retrieve ---
-def retrieve_top_k(product_id: str, query: str, k: int = 4):
+class RetrievalResult:
+    """
+    One vector search against a product collection.
+    `ids`, `metadatas`, `distances` and `scores` are available immediately;
+    document text is only fetched from Chroma for the rows that ask for it.
+    """
+
+    def __init__(self, collection, ids: List[str], distances: np.ndarray, space: str = "l2",
+                 metadatas: List[dict] = None, documents: List[str] = None, embeddings: np.ndarray = None):
+        self.collection = collection
+        self.ids = ids
+        self.distances = distances
+        self.metadatas = metadatas
+        self.embeddings = embeddings
+        self.space = space
+        self._documents: Dict[str, str] = dict(zip(ids, documents)) if documents is not None else {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def scores(self) -> np.ndarray:
+        """Cosine similarity (assumes normalized embeddings for the L2 and ip spaces)."""
+        # Chroma's "ip" distance is 1 - dot, like "cosine" on normalized vectors
+        if self.space in ("cosine", "ip"):
+            return 1.0 - self.distances
+        return 1.0 - self.distances / 2.0
+
+    def documents(self, indices: List[int] = None) -> List[str]:
+        """Document text for the given row indices (all rows by default), fetched once."""
+        indices = range(len(self.ids)) if indices is None else indices
+        wanted = [self.ids[i] for i in indices]
+        missing = [doc_id for doc_id in wanted if doc_id not in self._documents]
+        if missing:
+            fetched = self.collection.get(ids=missing, include=["documents"])
+            self._documents.update(zip(fetched["ids"], fetched["documents"]))
+        return [self._documents.get(doc_id, "") for doc_id in wanted]
+
+
+RETRIEVAL_FIELDS = {"documents", "metadatas", "embeddings"}
+
+
+def retrieve(product_id: str, query: str, k: int = 4, include=("metadatas",), q_emb: np.ndarray = None):
+    """
+    Vector search returning a RetrievalResult, or None if the product has no collection.
+    `include` selects which of documents / metadatas / embeddings Chroma ships back;
+    distances are always returned. Leave documents out to load them lazily.
+    """
+    unknown = set(include) - RETRIEVAL_FIELDS
+    if unknown:
+        raise ValueError(f"Unsupported retrieval fields: {sorted(unknown)}")
+
     collection_name = f"product_{product_id}"
     try:
-        collection = chroma_client.get_collection(collection_name)
+        collection = get_collection(collection_name)
     except Exception:
-        return [], None
+        return None
 
-    q_emb = embed_model.encode(query).tolist()
+    if q_emb is None:
+        q_emb = _query_embedding(query)
+    fields = list(include) + ["distances"]
 
-    results = collection.query(
-        query_embeddings=[q_emb],
-        n_results=k,
-        include=["documents", "metadatas", "embeddings"]
+    try:
+        results = collection.query(query_embeddings=[q_emb.tolist()], n_results=k, include=fields)
+    except Exception:
+        # Handle went stale (collection dropped or recreated by another worker)
+        invalidate_collection(collection_name)
+        try:
+            collection = get_collection(collection_name)
+            results = collection.query(query_embeddings=[q_emb.tolist()], n_results=k, include=fields)
+        except Exception:
+            return None
+
+    def first(field):
+        rows = results.get(field)
+        return rows[0] if rows is not None and len(rows) else None
+
+    ids, distances, embeddings = first("ids"), first("distances"), first("embeddings")
+    return RetrievalResult(
+        collection,
+        ids=list(ids) if ids is not None else [],
+        distances=np.asarray(distances if distances is not None else [], dtype=np.float32),
+        space=(collection.metadata or {}).get("hnsw:space", "l2"),
+        metadatas=first("metadatas"),
+        documents=first("documents"),
+        embeddings=np.asarray(embeddings, dtype=np.float32) if embeddings is not None else None,
     )
 
+
+def _candidates(product_id: str, query: str, fetch_k: int, q_emb: np.ndarray, hybrid: bool):
+    """
+    (collection, vector hits, BM25 hits) for one product, each a list of (id, score)
+    best first, without document text. None if the product has no collection.
+    """
+    result = retrieve(product_id, query, fetch_k, include=(), q_emb=q_emb)
+    if result is None:
+        return None
+    vector = list(zip(result.ids, result.scores.tolist()))
+    lexical = []
+    if hybrid:
+        ids, scores = get_lexical_index(product_id, result.collection).search(query, fetch_k)
+        lexical = list(zip(ids, scores.tolist()))
+    return result.collection, vector, lexical
+
+
+def _rank(vector: List[Tuple], lexical: List[Tuple], k: int, hybrid: bool) -> List[Tuple]:
+    """Top-k (key, score): reciprocal rank fusion when hybrid, else vector score order."""
+    if not hybrid:
+        return sorted(vector, key=lambda hit: hit[1], reverse=True)[:k]
+    return reciprocal_rank_fusion([[key for key, _ in vector], [key for key, _ in lexical]], RRF_K)[:k]
+
+
+def _fetch(collection, ids: List[str], include: List[str]) -> Dict[str, dict]:
+    """The `include` fields of the given ids, in one `collection.get`."""
+    fetched = collection.get(ids=ids, include=include)
+    return {
+        doc_id: {field: fetched[field][i] for field in include}
+        for i, doc_id in enumerate(fetched["ids"])
+    }
+
+
+def _fetch_hits(hits: List[Tuple], collections: Dict, include: List[str], timeout: float = None) -> Dict[Tuple, dict]:
+    """`_fetch` for ((product_id, id), score) hits: one get per product, in parallel across products."""
+    by_product: Dict[str, List[str]] = {}
+    for (product_id, doc_id), _ in hits:
+        by_product.setdefault(product_id, []).append(doc_id)
+    if len(by_product) == 1:
+        product_id, ids = next(iter(by_product.items()))
+        return {(product_id, doc_id): row for doc_id, row in _fetch(collections[product_id], ids, include).items()}
+
+    futures = {
+        _fanout_pool.submit(_fetch, collections[product_id], ids, include): product_id
+        for product_id, ids in by_product.items()
+    }
+    done, _ = wait(futures, timeout=timeout)
+    rows = {}
+    for future in done:
+        if future.exception() is None:
+            product_id = futures[future]
+            rows.update(((product_id, doc_id), row) for doc_id, row in future.result().items())
+    return rows
+
+
+def _select(hits: List[Tuple], collections: Dict, q_emb: np.ndarray, k: int, diversify: bool, hybrid: bool,
+            timeout: float = None, with_product: bool = False) -> List[Dict]:
+    """
+    Final docs from ranked ((product_id, id), score) hits. With `diversify`, MMR picks k of
+    them using their stored embeddings; text is only fetched for the k that are kept.
+    """
+    if diversify and len(hits) > k:
+        rows = _fetch_hits(hits, collections, ["embeddings", "metadatas"], timeout)
+        hits = [hit for hit in hits if hit[0] in rows]
+        relevance = np.asarray([score for _, score in hits], dtype=np.float32)
+        if hybrid and len(relevance):
+            # Fused scores are rank-based; rescale to [0, 1] so they weigh against cosine redundancy
+            relevance = relevance / relevance.max()
+        embeddings = np.asarray([rows[key]["embeddings"] for key, _ in hits], dtype=np.float32)
+        hits = [hits[i] for i in mmr(q_emb, embeddings, k, MMR_LAMBDA, relevance)]
+        texts = _fetch_hits(hits, collections, ["documents"], timeout)
+        rows = {key: {**rows[key], **row} for key, row in texts.items()}
+    else:
+        hits = hits[:k]
+        rows = _fetch_hits(hits, collections, ["documents", "metadatas"], timeout)
+
+    docs = []
+    for key, score in hits:
+        if key not in rows:
+            continue  # deleted since it was ranked, or fetched too late
+        doc = {
+            "id": f"doc_{len(docs)+1}",
+            "document": rows[key]["documents"],
+            "metadata": rows[key]["metadatas"] or {},
+            "score": float(score)
+        }
+        if with_product:
+            doc["product_id"] = key[0]
+        docs.append(doc)
+    return docs
+
+
+def _hybrid_top_k(product_id: str, query: str, k: int, q_emb: np.ndarray, diversify: bool) -> Optional[List[Dict]]:
+    """
+    Reciprocal rank fusion of the vector and BM25 candidate lists, so exact identifiers
+    (SKUs, error codes) that embeddings blur still surface. None if the product has no collection.
+    """
+    n = max(k, MMR_FETCH_K) if diversify else k
+    candidates = _candidates(product_id, query, max(n, HYBRID_FETCH_K), q_emb, hybrid=True)
+    if candidates is None:
+        return None
+    collection, vector, lexical = candidates
+    fused = [((product_id, doc_id), score) for doc_id, score in _rank(vector, lexical, n, hybrid=True)]
+    if not fused:
+        return []
+    return _select(fused, {product_id: collection}, q_emb, k, diversify, hybrid=True)
+
+
+def _global_top_k(query: str, k: int, q_emb: np.ndarray, hybrid: bool, diversify: bool) -> List[Dict]:
+    """
+    Search every product collection concurrently with the one query embedding and merge
+    the hits: by cosine score in vector mode, by rank fusion of the pooled vector and BM25
+    lists in hybrid mode. Products that miss GLOBAL_SEARCH_BUDGET_MS are left out.
+    """
+    start = time.perf_counter()
+    budget = GLOBAL_SEARCH_BUDGET_MS / 1000
+    product_ids = [c.name[len("product_"):] for c in get_vector_client().list_collections()
+                   if c.name.startswith("product_")]
+    n = max(k, MMR_FETCH_K) if diversify else k
+    fetch_k = max(n, HYBRID_FETCH_K) if hybrid else n
+
+    futures = {
+        _fanout_pool.submit(_candidates, product_id, query, fetch_k, q_emb, hybrid): product_id
+        for product_id in product_ids
+    }
+    done, late = wait(futures, timeout=budget)
+    for future in late:
+        future.cancel()
+    if late:
+        print(f"⏱️ Global search skipped {len(late)}/{len(futures)} products over the {GLOBAL_SEARCH_BUDGET_MS}ms budget")
+
+    collections, vector, lexical = {}, [], []
+    for future in done:
+        if future.exception() is not None:
+            continue
+        candidates = future.result()
+        if candidates is None:
+            continue
+        product_id = futures[future]
+        collection, product_vector, product_lexical = candidates
+        collections[product_id] = collection
+        vector.extend(((product_id, doc_id), score) for doc_id, score in product_vector)
+        lexical.extend(((product_id, doc_id), score) for doc_id, score in product_lexical)
+    lexical.sort(key=lambda hit: hit[1], reverse=True)
+    vector.sort(key=lambda hit: hit[1], reverse=True)
+
+    ranked = _rank(vector, lexical, n, hybrid)
+    if not ranked:
+        return []
+    # Text for the winners only, again one round trip per product in parallel
+    remaining = max(budget - (time.perf_counter() - start), 0.1)
+    return _select(ranked, collections, q_emb, k, diversify, hybrid, timeout=remaining, with_product=True)
+
+
+def retrieve_top_k(product_id: str, query: str, k: int = 4, mode: str = None, diversify: bool = None):
+    """
+    Top-k chunks for a query as (docs, query embedding). An empty `product_id`
+    searches across all products; each hit then also carries its "product_id".
+    With `diversify` (default MMR_ENABLED), MMR_FETCH_K candidates are over-fetched
+    and re-ranked with MMR so near-duplicate chunks don't crowd the prompt.
+    """
+    q_emb = _query_embedding(query)
+    hybrid = (mode or RETRIEVAL_MODE) == "hybrid"
+    diversify = MMR_ENABLED if diversify is None else diversify
+    if not product_id:
+        return _global_top_k(query, k, q_emb, hybrid, diversify), q_emb.tolist()
+    if hybrid:
+        docs = _hybrid_top_k(product_id, query, k, q_emb, diversify)
+        return (docs, q_emb.tolist()) if docs is not None else ([], None)
+
+    if diversify:
+        # Embeddings of the candidates for MMR; text only for the k picked
+        result = retrieve(product_id, query, max(k, MMR_FETCH_K), include=("metadatas", "embeddings"), q_emb=q_emb)
+        if result is None:
+            return [], None
+        order = mmr(q_emb, result.embeddings, k, MMR_LAMBDA, result.scores) if len(result) else []
+    else:
+        # Every hit goes into the prompt, so fetch the text in the same round trip
+        result = retrieve(product_id, query, k, include=("documents", "metadatas"), q_emb=q_emb)
+        if result is None:
+            return [], None
+        order = list(range(len(result)))
+
     docs = []
-    documents = results.get("documents", [[]])[0]
-    metadatas = results.get("metadatas", [[]])[0]
-    embeddings = results.get("embeddings", [[]])[0]
+    documents = result.documents(order)
+    metadatas = result.metadatas or []
+    scores = result.scores
 
-    for i in range(len(documents)):
+    for rank, i in enumerate(order):
         docs.append({
-            "id": f"doc_{i+1}",
-            "document": documents[i],
+            "id": f"doc_{rank+1}",
+            "document": documents[rank],
             "metadata": metadatas[i] if i < len(metadatas) else {},
-            "embedding": embeddings[i] if i < len(embeddings) else None
+            "score": float(scores[i])
         })
 
-    return docs, q_emb
+    return docs, q_emb.tolist()
 
 
 # --- Build Prompt ---
-def _build_prompt(question: str, docs: List[Dict]) -> str:
-    context_parts = []
-    for idx, d in enumerate(docs, start=1):
-        excerpt = d["document"].strip()
-        if len(excerpt) > 1500:
-            excerpt = excerpt[:1500] + " ... [truncated]"
-        context_parts.append(f"Source {idx} ({d['id']}):\n{excerpt}\n")
-    context = "\n\n".join(context_parts).strip()
+def _source_header(position: int, doc: Dict) -> str:
+    return f"Source {position} ({doc['id']}):\n"
+
 
-    return (
+def _build_prompt(question: str, docs: List[Dict], budget: int = None) -> str:
+    """
+    Prompt with as much of `docs` (best first) as fits PROMPT_TOKEN_BUDGET tokens in total;
+    see app.services.context_packer for how excerpts are deduplicated and trimmed.
+    """
+    template = (
         "You are a helpful, concise customer support assistant.\n"
         "Answer the question ONLY using the provided context.\n"
         "If the answer is not present, say: \"I don't have that information.\".\n\n"
-        f"Context:\n{context}\n\n"
-        f"Question: {question}\nAnswer:"
+        "Context:\n{context}\n\n"
+        "Question: {question}\nAnswer:"
     )
+    fixed = count_tokens(template.format(context="", question=question))
+    packed = pack_context(docs, (budget or PROMPT_TOKEN_BUDGET) - fixed, header=_source_header)
+
+    context_parts = []
+    for idx, d in enumerate(packed, start=1):
+        excerpt = d["document"] + (" ..." if d["truncated"] else "")
+        context_parts.append(f"{_source_header(idx, d)}{excerpt}")
+    context = "\n\n".join(context_parts).strip()
+
+    return template.format(context=context, question=question)
 
 
 # --- Ask LLM ---
-def answer_question(product_id: str, query: str) -> Dict:
+def _qa_request(prompt: str) -> Dict:
+    return dict(
+        model="llama-3.1-8b-instant",  # free Groq LLM
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0,
+        max_tokens=300,
+    )
+
+
+def _prepare_answer(product_id: str, query: str) -> Dict:
+    """
+    Everything before the LLM call: {"result"} when no call is needed (cached answer,
+    no documents), else {"prompt", "docs", "q_emb", "version"} for _finish_answer.
+    """
+    # Repeated / near-duplicate questions skip retrieval and the LLM entirely
+    q_emb = _query_embedding(query)
+    cached = cached_answer(product_id, "qa", q_emb)
+    if cached is not None:
+        return {"result": {**cached, "query": query}}
+    version = product_version(product_id)
+
     docs, _ = retrieve_top_k(product_id, query, k=4)
 
     if not docs:
-        return {
+        return {"result": {
             "product_id": product_id,
             "query": query,
             "answer": "I don’t have that information.",
             "sources": []
-        }
+        }}
 
-    prompt = _build_prompt(query, docs)
+    return {"prompt": _build_prompt(query, docs), "docs": docs, "q_emb": q_emb, "version": version}
 
-    # Call Groq
-    response = groq_client.chat.completions.create(
-        model="llama-3.1-8b-instant",  # free Groq LLM
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0,
-        max_tokens=300,
-    )
 
-    answer = response.choices[0].message.content
-
-    return {
+def _finish_answer(product_id: str, query: str, prepared: Dict, answer: str) -> Dict:
+    result = {
         "product_id": product_id,
         "query": query,
         "answer": answer.strip(),
-        "sources": [d["document"] for d in docs]
+        "sources": [d["document"] for d in prepared["docs"]]
     }
+    cache_answer(product_id, "qa", prepared["q_emb"], result, prepared["version"])
+    return result
+
+
+def answer_question(product_id: str, query: str) -> Dict:
+    prepared = _prepare_answer(product_id, query)
+    if "result" in prepared:
+        return prepared["result"]
+
+    # Call the LLM (Groq, or the stub backend)
+    return _finish_answer(product_id, query, prepared, get_llm().complete(_qa_request(prepared["prompt"])))
+
+
+async def answer_question_async(product_id: str, query: str) -> Dict:
+    """answer_question for async routes: CPU work on the CPU executor, the LLM call awaited."""
+    prepared = await run_cpu(_prepare_answer, product_id, query)
+    if "result" in prepared:
+        return prepared["result"]
+
+    answer = await get_llm().acomplete(_qa_request(prepared["prompt"]))
+    return _finish_answer(product_id, query, prepared, answer)
 
 
 # --- New: generate_suggestions ---
 def generate_suggestions(product_id: str, n: int = 3) -> List[str]:
     """
     Generate up to `n` short, user-facing question suggestions
-    based on the top chunks for the given product.
+    based on the top chunks for the given product. Empty if the product
+    has no chunks or the LLM call fails.
     """
     # Attempt to retrieve top chunks (use a neutral query so we get representative chunks)
     docs, _ = retrieve_top_k(product_id, "overview", k=6)
 
     if not docs:
-        # Fallback generic suggestions
-        return [
-            "What is this product about?",
-            "How do I use this product?",
-            "What are the main features?"
-        ][:n]
+        # Nothing indexed (or an unknown product id): nothing to suggest from
+        return []
 
     # Build a short context from the top chunks (trim to ~1000 chars each)
     content = "\n\n".join([d["document"][:1200] for d in docs])
@@ -143,7 +467,7 @@ def generate_suggestions(product_id: str, n: int = 3) -> List[str]:
     )
 
     try:
-        response = groq_client.chat.completions.create(
+        text = get_llm().complete(dict(
             model="llama-3.1-8b-instant",
             messages=[
                 {"role": "system", "content": "You are a helpful assistant that writes example user queries."},
@@ -151,15 +475,11 @@ def generate_suggestions(product_id: str, n: int = 3) -> List[str]:
             ],
             temperature=0.2,
             max_tokens=200,
-        )
-        text = response.choices[0].message.content
-    except Exception:
-        # LLM unavailable -> fallback to safe defaults
-        return [
-            "What is this product about?",
-            "How do I use this product?",
-            "Where can I find setup instructions?"
-        ][:n]
+        ))
+    except Exception as e:
+        # LLM unavailable -> no suggestions; callers fall back or store nothing
+        print(f"❌ Error generating suggestions for {product_id}: {e}")
+        return []
 
     # Parse output into lines and clean bullets/numbering
     lines = []
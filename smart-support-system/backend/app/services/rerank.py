@@ -0,0 +1,44 @@
+# backend/app/services/rerank.py
+# Diversity re-ranking of retrieved chunks. Overlapping chunks often fill the top-k
+# with near-duplicates; MMR trades a little relevance for coverage of the prompt budget.
+from typing import List, Optional
+
+import numpy as np
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.clip(norms, 1e-12, None)
+
+
+def mmr(query_emb: np.ndarray, candidate_embs: np.ndarray, k: int, lambda_mult: float = 0.7,
+        relevance: Optional[np.ndarray] = None) -> List[int]:
+    """
+    Indices of `k` candidates picked by Maximal Marginal Relevance, best first:
+    each step takes argmax of lambda * relevance - (1 - lambda) * max similarity to
+    the already picked ones. Pairwise similarities come from one matrix product;
+    each step is then a vector update, never a per-pair loop.
+    `relevance` defaults to the cosine similarity with the query.
+    """
+    n = len(candidate_embs)
+    if n == 0 or k <= 0:
+        return []
+    candidates = _normalize(np.asarray(candidate_embs, dtype=np.float32))
+    if relevance is None:
+        relevance = candidates @ _normalize(np.asarray(query_emb, dtype=np.float32).ravel())
+    relevance = np.asarray(relevance, dtype=np.float32)
+    similarity = candidates @ candidates.T
+
+    first = int(np.argmax(relevance))
+    selected = [first]
+    picked = np.zeros(n, dtype=bool)
+    picked[first] = True
+    max_similarity = similarity[first].copy()
+    for _ in range(min(k, n) - 1):
+        scores = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+        scores[picked] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        picked[best] = True
+        np.maximum(max_similarity, similarity[best], out=max_similarity)
+    return selected
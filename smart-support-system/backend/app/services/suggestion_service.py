@@ -0,0 +1,121 @@
+# backend/app/services/suggestion_service.py
+# Query suggestions per product, built once when ingestion finishes and stored with
+# the product content version they were built from (app.core.registry). Reading them
+# is a version check (one stat) and a dict lookup; suggestions for content that has
+# changed since are still served while a background refresh rebuilds them. Requests
+# never build suggestions themselves.
+import os
+import json
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+from app.core.registry import llm_configured, product_version
+from app.services.rag_service import generate_suggestions
+from app.services.rag_pipeline import generate_suggestions_from_rag
+
+# -------------------------
+# Config
+# -------------------------
+SUGGESTIONS_DIR = os.getenv(
+    "SUGGESTIONS_DIR", os.path.join(os.path.dirname(__file__), "../../data/suggestions")
+)
+SUGGESTIONS_COUNT = int(os.getenv("SUGGESTIONS_COUNT", "3"))
+# Ask the LLM for suggestions (once per content version) when one is configured
+SUGGESTIONS_USE_LLM = os.getenv("SUGGESTIONS_USE_LLM", "true").lower() == "true"
+
+_cache: Dict[str, Tuple[int, List[str]]] = {}
+_refreshing = set()
+_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="suggestions")
+
+
+def _path(product_id: str) -> str:
+    return os.path.join(SUGGESTIONS_DIR, f"{quote(product_id, safe='')}.json")
+
+
+def _load(product_id: str) -> Optional[Tuple[int, List[str]]]:
+    try:
+        with open(_path(product_id)) as f:
+            stored = json.load(f)
+        return stored["version"], stored["suggestions"]
+    except (FileNotFoundError, ValueError, KeyError):
+        return None
+
+
+def build_suggestions(product_id: str, n: int = None) -> List[str]:
+    n = n or SUGGESTIONS_COUNT
+    if SUGGESTIONS_USE_LLM and llm_configured():
+        # An LLM failure falls back to the heuristic rather than storing nothing
+        return generate_suggestions(product_id, n) or generate_suggestions_from_rag(product_id, n)
+    return generate_suggestions_from_rag(product_id, n)
+
+
+def refresh_suggestions(product_id: str) -> List[str]:
+    """Rebuild and store a product's suggestions; call when its ingestion has finished."""
+    version = product_version(product_id)
+    suggestions = build_suggestions(product_id)
+    if not suggestions:
+        # Nothing indexed (or an unknown product id): store nothing, but remember it for
+        # this version so requests don't rebuild until the product's content changes
+        drop_suggestions(product_id)
+        _cache[product_id] = (version, [])
+        return []
+    os.makedirs(SUGGESTIONS_DIR, exist_ok=True)
+    tmp_path = f"{_path(product_id)}.tmp.{os.getpid()}.{threading.get_ident()}"
+    with open(tmp_path, "w") as f:
+        json.dump({"version": version, "suggestions": suggestions,
+                   "built_at": datetime.utcnow().isoformat()}, f)
+    os.replace(tmp_path, _path(product_id))
+    _cache[product_id] = (version, suggestions)
+    print(f"💡 Built {len(suggestions)} suggestions for product {product_id}")
+    return suggestions
+
+
+def _refresh_in_background(product_id: str):
+    with _lock:
+        if product_id in _refreshing:
+            return
+        _refreshing.add(product_id)
+
+    def run():
+        try:
+            refresh_suggestions(product_id)
+        except Exception as e:
+            print(f"❌ Error refreshing suggestions for {product_id}: {e}")
+        finally:
+            with _lock:
+                _refreshing.discard(product_id)
+
+    _executor.submit(run)
+
+
+def get_suggestions(product_id: str) -> List[str]:
+    """
+    Stored suggestions of a product. Outdated ones are returned as they are and
+    refreshed in the background; a product that has none yet gets [] while they are built.
+    """
+    version = product_version(product_id)
+    cached = _cache.get(product_id)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    # Another worker process may have rebuilt them already
+    stored = _load(product_id)
+    if stored is not None:
+        _cache[product_id] = stored
+        if stored[0] != version:
+            _refresh_in_background(product_id)
+        return stored[1]
+    _refresh_in_background(product_id)
+    return []
+
+
+def drop_suggestions(product_id: str):
+    _cache.pop(product_id, None)
+    try:
+        os.remove(_path(product_id))
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,50 @@
+# backend/app/services/upload_service.py
+import os
+import hashlib
+import tempfile
+from typing import BinaryIO
+
+# -------------------------
+# Config
+# -------------------------
+UPLOAD_SPOOL_DIR = os.path.abspath(
+    os.getenv("UPLOAD_SPOOL_DIR", os.path.join(os.path.dirname(__file__), "../../uploads/.spool"))
+)
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_MB", "200")) * 1024 * 1024
+UPLOAD_BLOCK_SIZE = 1 << 20  # 1 MiB
+
+
+class UploadTooLargeError(ValueError):
+    pass
+
+
+def spool_upload(source: BinaryIO, max_bytes: int = None) -> dict:
+    """
+    Copy an upload stream to the spool directory block by block, hashing as it goes.
+    Memory use is one block regardless of file size; the upload is rejected as soon
+    as it exceeds `max_bytes`. Returns {"path", "sha256", "size"}.
+    """
+    max_bytes = max_bytes or MAX_UPLOAD_BYTES
+    os.makedirs(UPLOAD_SPOOL_DIR, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+
+    fd, spool_path = tempfile.mkstemp(dir=UPLOAD_SPOOL_DIR, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            for block in iter(lambda: source.read(UPLOAD_BLOCK_SIZE), b""):
+                size += len(block)
+                if size > max_bytes:
+                    raise UploadTooLargeError(f"Upload exceeds the {max_bytes // (1024 * 1024)} MB limit")
+                digest.update(block)
+                out.write(block)
+    except BaseException:
+        os.remove(spool_path)
+        raise
+
+    return {"path": spool_path, "sha256": digest.hexdigest(), "size": size}
+
+
+def discard_spooled(spooled: dict):
+    if os.path.exists(spooled["path"]):
+        os.remove(spooled["path"])
@@ -0,0 +1,586 @@
+# backend/app/services/vector_store.py
+# In-process vector store with memory-mapped numpy segments (VECTOR_BACKEND=mmap).
+# It duck-types the parts of the Chroma client / collection API the services use
+# (get / query / add / upsert / update / delete / count, list / get / create / delete
+# collection), so ingest_service and rag_service run unchanged on either backend.
+#
+# Layout of one collection, VECTOR_STORE_DIR/<name>/:
+#   manifest.json          live segments + tombstoned rows; replaced atomically (os.replace)
+#   seg-000042/            immutable segment, written to a temp dir and renamed into place
+#     vectors.npy          float32 / float16 matrix, memory-mapped
+#     sqnorms.npy          squared norms for L2 distances
+#     documents.bin        utf-8 documents, addressed by doc_offsets.npy
+#     segment.json         ids and metadatas (the persistent id -> metadata mapping)
+#     ivf.npz              optional IVF lists (centroids, row order, list offsets)
+# Every write adds one segment and swaps the manifest; small segments are merged
+# (binary-counter style, so each row is rewritten O(log n) times) and dead rows dropped.
+# Readers in other worker processes pick up a new manifest on their next call.
+import os
+import json
+import mmap
+import shutil
+import tempfile
+import threading
+import uuid
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from filelock import FileLock
+
+# -------------------------
+# Config
+# -------------------------
+VECTOR_STORE_DIR = os.getenv(
+    "VECTOR_STORE_DIR", os.path.join(os.path.dirname(__file__), "../../data/vector_store")
+)
+VECTOR_STORE_DTYPE = os.getenv("VECTOR_STORE_DTYPE", "float32")  # or float16: half the memory, ~1e-3 error
+IVF_MIN_ROWS = int(os.getenv("IVF_MIN_ROWS", "20000"))  # segments below this are searched exactly
+IVF_NPROBE = int(os.getenv("IVF_NPROBE", "8"))
+MAX_SEGMENTS = int(os.getenv("VECTOR_STORE_MAX_SEGMENTS", "16"))
+
+MANIFEST = "manifest.json"
+_BLOCK_ROWS = 16384  # float16 rows are upcast in blocks so BLAS sees float32
+
+
+# -------------------------
+# Metadata filters (Chroma `where` subset)
+# -------------------------
+def _matches(where: Optional[dict], meta: Optional[dict]) -> bool:
+    if not where:
+        return True
+    meta = meta or {}
+    for key, cond in where.items():
+        if key == "$and":
+            if not all(_matches(c, meta) for c in cond):
+                return False
+        elif key == "$or":
+            if not any(_matches(c, meta) for c in cond):
+                return False
+        elif isinstance(cond, dict):
+            for op, value in cond.items():
+                actual = meta.get(key)
+                ok = {
+                    "$eq": lambda: actual == value,
+                    "$ne": lambda: actual != value,
+                    "$in": lambda: actual in value,
+                    "$nin": lambda: actual not in value,
+                    "$gt": lambda: actual is not None and actual > value,
+                    "$gte": lambda: actual is not None and actual >= value,
+                    "$lt": lambda: actual is not None and actual < value,
+                    "$lte": lambda: actual is not None and actual <= value,
+                }.get(op)
+                if ok is None:
+                    raise ValueError(f"Unsupported where operator: {op}")
+                if not ok():
+                    return False
+        elif meta.get(key) != cond:
+            return False
+    return True
+
+
+# -------------------------
+# IVF
+# -------------------------
+def _kmeans(vectors: np.ndarray, nlist: int, iters: int = 10, seed: int = 0) -> np.ndarray:
+    """Lloyd's k-means on a sample; nearest centroid by argmax(x.c - |c|^2 / 2), all as matmuls."""
+    rng = np.random.default_rng(seed)
+    sample_size = min(len(vectors), nlist * 64)
+    sample = np.asarray(vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))], dtype=np.float32)
+    centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+    for _ in range(iters):
+        assign = np.argmax(sample @ centroids.T - 0.5 * np.sum(centroids ** 2, axis=1), axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, sample)
+        counts = np.bincount(assign, minlength=nlist)
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+    return centroids
+
+
+def _assign(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    half_norms = 0.5 * np.sum(centroids ** 2, axis=1)
+    out = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), _BLOCK_ROWS):
+        block = np.asarray(vectors[start:start + _BLOCK_ROWS], dtype=np.float32)
+        out[start:start + len(block)] = np.argmax(block @ centroids.T - half_norms, axis=1)
+    return out
+
+
+# -------------------------
+# Segments
+# -------------------------
+class _Segment:
+    """One immutable, memory-mapped batch of rows."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.name = os.path.basename(path)
+        with open(os.path.join(path, "segment.json")) as f:
+            meta = json.load(f)
+        self.ids: List[str] = meta["ids"]
+        self.metadatas: List[Optional[dict]] = meta["metadatas"]
+        self.vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        self.sqnorms = np.load(os.path.join(path, "sqnorms.npy"))
+        self.doc_offsets = np.load(os.path.join(path, "doc_offsets.npy"))
+        self._docs = None
+        if self.doc_offsets[-1] > 0:
+            with open(os.path.join(path, "documents.bin"), "rb") as f:
+                self._docs = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.ivf = None
+        ivf_path = os.path.join(path, "ivf.npz")
+        if os.path.exists(ivf_path):
+            with np.load(ivf_path) as ivf:
+                self.ivf = (ivf["centroids"], ivf["order"], ivf["offsets"])
+
+    def __len__(self):
+        return len(self.ids)
+
+    def document(self, row: int) -> str:
+        start, end = int(self.doc_offsets[row]), int(self.doc_offsets[row + 1])
+        return self._docs[start:end].decode("utf-8") if end > start else ""
+
+    def dot(self, queries: np.ndarray, rows: np.ndarray = None) -> np.ndarray:
+        """(len(rows) or n, m) inner products with the (m, d) queries."""
+        if rows is not None:
+            return np.asarray(self.vectors[rows], dtype=np.float32) @ queries.T
+        if self.vectors.dtype == np.float32:
+            return self.vectors @ queries.T
+        out = np.empty((len(self), len(queries)), dtype=np.float32)
+        for start in range(0, len(self), _BLOCK_ROWS):
+            block = np.asarray(self.vectors[start:start + _BLOCK_ROWS], dtype=np.float32)
+            out[start:start + len(block)] = block @ queries.T
+        return out
+
+    def candidate_rows(self, query: np.ndarray, nprobe: int) -> Optional[np.ndarray]:
+        """Rows in the `nprobe` IVF lists closest to the query, or None for exact search."""
+        if self.ivf is None:
+            return None
+        centroids, order, offsets = self.ivf
+        scores = centroids @ query - 0.5 * np.sum(centroids ** 2, axis=1)
+        probes = np.argpartition(-scores, min(nprobe, len(centroids)) - 1)[:nprobe]
+        return np.sort(np.concatenate([order[offsets[p]:offsets[p + 1]] for p in probes]))
+
+    @staticmethod
+    def write(path: str, ids: List[str], vectors: np.ndarray, documents: List[Optional[str]],
+              metadatas: List[Optional[dict]], dtype: str):
+        tmp_dir = tempfile.mkdtemp(dir=os.path.dirname(path), suffix=".tmp")
+        vectors32 = np.asarray(vectors, dtype=np.float32)
+        np.save(os.path.join(tmp_dir, "vectors.npy"), vectors32.astype(dtype))
+        np.save(os.path.join(tmp_dir, "sqnorms.npy"), np.sum(vectors32 ** 2, axis=1))
+        encoded = [(d or "").encode("utf-8") for d in documents]
+        np.save(os.path.join(tmp_dir, "doc_offsets.npy"),
+                np.concatenate([[0], np.cumsum([len(e) for e in encoded])]).astype(np.int64))
+        with open(os.path.join(tmp_dir, "documents.bin"), "wb") as f:
+            f.write(b"".join(encoded))
+        with open(os.path.join(tmp_dir, "segment.json"), "w") as f:
+            json.dump({"ids": ids, "metadatas": metadatas}, f)
+        if len(ids) >= IVF_MIN_ROWS:
+            nlist = int(np.sqrt(len(ids)))
+            centroids = _kmeans(vectors32, nlist)
+            assign = _assign(vectors32, centroids)
+            order = np.argsort(assign, kind="stable").astype(np.int64)
+            offsets = np.searchsorted(assign[order], np.arange(nlist + 1)).astype(np.int64)
+            np.savez(os.path.join(tmp_dir, "ivf.npz"), centroids=centroids, order=order, offsets=offsets)
+        os.replace(tmp_dir, path)
+
+
+class _State:
+    """Immutable snapshot of a collection: readers use it without locks."""
+
+    def __init__(self, manifest: dict, segments: List[_Segment], stamp=None):
+        self.manifest = manifest
+        self.segments = segments
+        self.stamp = stamp  # (inode, mtime, size) of the manifest file it was read from
+        self.alive: List[np.ndarray] = []
+        self.index: Dict[str, Tuple[int, int]] = {}
+        for s, segment in enumerate(segments):
+            alive = np.ones(len(segment), dtype=bool)
+            dead = manifest["tombstones"].get(segment.name, [])
+            alive[dead] = False
+            self.alive.append(alive)
+            for row in np.flatnonzero(alive):
+                self.index[segment.ids[row]] = (s, int(row))
+
+
+# -------------------------
+# Collection
+# -------------------------
+class MmapCollection:
+    def __init__(self, path: str):
+        self.path = path
+        self.name = os.path.basename(path)
+        self._write_lock = threading.RLock()
+        self._file_lock = FileLock(os.path.join(path, ".lock"))
+        self._refresh_lock = threading.Lock()
+        self._state: Optional[_State] = None
+        self._refresh()
+
+    # --- manifest / state ---
+    @property
+    def metadata(self) -> Optional[dict]:
+        return self._refresh().manifest.get("metadata")
+
+    def _refresh(self) -> _State:
+        """
+        The current snapshot, reloaded when the manifest file changed. A new snapshot is
+        built under a lock and published with one assignment, so concurrent readers see
+        either the old state or the new one, never a mix of both.
+        """
+        manifest_path = os.path.join(self.path, MANIFEST)
+        try:
+            stat = os.stat(manifest_path)
+        except FileNotFoundError:
+            raise ValueError(f"Collection {self.name} does not exist.")
+        stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        state = self._state
+        if state is not None and state.stamp == stamp:
+            return state
+        with self._refresh_lock:
+            state = self._state
+            if state is not None and state.stamp == stamp:
+                return state  # another reader loaded it while we waited
+            for attempt in range(3):
+                try:
+                    with open(manifest_path) as f:
+                        manifest = json.load(f)
+                    # Segment files are immutable, so ones already mapped are reused by name,
+                    # unless the collection was dropped and recreated under the same name
+                    cached = {}
+                    if state is not None and manifest.get("uid") == state.manifest.get("uid"):
+                        cached = {segment.name: segment for segment in state.segments}
+                    segments = [cached.get(name) or _Segment(os.path.join(self.path, name))
+                                for name in manifest["segments"]]
+                    break
+                except FileNotFoundError:
+                    # A writer swapped the manifest and removed a segment between our two reads
+                    if attempt == 2 or not os.path.exists(manifest_path):
+                        raise ValueError(f"Collection {self.name} does not exist.")
+            state = _State(manifest, segments, stamp)
+            self._state = state
+            return state
+
+    def _write_manifest(self, manifest: dict):
+        tmp_path = os.path.join(self.path, f"{MANIFEST}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, os.path.join(self.path, MANIFEST))
+
+    def _rows(self, state: _State, locations: Iterable[Tuple[int, int]]):
+        """(ids, vectors, documents, metadatas) of existing rows, for rewrites and merges."""
+        ids, vectors, documents, metadatas = [], [], [], []
+        for s, row in locations:
+            segment = state.segments[s]
+            ids.append(segment.ids[row])
+            vectors.append(np.asarray(segment.vectors[row], dtype=np.float32))
+            documents.append(segment.document(row))
+            metadatas.append(segment.metadatas[row])
+        return ids, vectors, documents, metadatas
+
+    def _commit(self, ids: List[str] = (), vectors=None, documents=None, metadatas=None,
+                delete_ids: Iterable[str] = ()):
+        """
+        Atomically replace `delete_ids` and `ids` with the given rows (one new segment),
+        then merge small segments. Serialised across threads and worker processes.
+        """
+        self._commit_with(lambda state: (ids, vectors, documents, metadatas, delete_ids))
+
+    def _commit_with(self, build: Callable[[_State], tuple]):
+        """
+        Like _commit, with the rows computed by `build(state) -> (ids, vectors, documents,
+        metadatas, delete_ids)` from the state read under the write locks, so checks and
+        read-modify-writes can't race another writer.
+        """
+        with self._write_lock, self._file_lock:
+            state = self._refresh()
+            ids, vectors, documents, metadatas, delete_ids = build(state)
+            ids, delete_ids = list(ids), list(delete_ids)
+            if not ids and not delete_ids:
+                return
+            if ids:
+                vectors = np.asarray(vectors, dtype=np.float32)
+                if vectors.ndim != 2 or len(vectors) != len(ids):
+                    raise ValueError(f"Expected {len(ids)} embeddings, got an array of shape {vectors.shape}")
+                dim = state.manifest.get("dim")
+                if dim is not None and vectors.shape[1] != dim:
+                    raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match collection "
+                                     f"dimensionality {dim}")
+            manifest = json.loads(json.dumps(state.manifest))
+            tombstones = {name: set(rows) for name, rows in manifest["tombstones"].items()}
+            for doc_id in delete_ids + ids:
+                location = state.index.get(doc_id)
+                if location is not None:
+                    tombstones.setdefault(state.segments[location[0]].name, set()).add(location[1])
+
+            names = list(manifest["segments"])
+            if ids:
+                if manifest.get("dim") is None:
+                    manifest["dim"] = int(vectors.shape[1])
+                name = f"seg-{manifest['next_segment']:06d}"
+                manifest["next_segment"] += 1
+                _Segment.write(os.path.join(self.path, name), ids, vectors, documents, metadatas,
+                               manifest["dtype"])
+                names.append(name)
+
+            manifest["segments"] = names
+            manifest["tombstones"] = {n: sorted(r) for n, r in tombstones.items() if n in names and r}
+            self._write_manifest(manifest)
+            self._refresh()
+            self._compact()
+            self._gc()
+
+    def _write_segment(self, manifest: dict, state: _State, locations) -> str:
+        ids, vectors, documents, metadatas = self._rows(state, locations)
+        name = f"seg-{manifest['next_segment']:06d}"
+        manifest["next_segment"] += 1
+        _Segment.write(os.path.join(self.path, name), ids, np.vstack(vectors), documents, metadatas,
+                       manifest["dtype"])
+        return name
+
+    def _compact(self):
+        """
+        Rewrite segments that are mostly tombstones, then merge the newest segments while
+        the older neighbour holds at most twice the rows of the merged tail.
+        """
+        state = self._refresh()
+        manifest = json.loads(json.dumps(state.manifest))
+        positions = {seg.name: s for s, seg in enumerate(state.segments)}
+        alive = {seg.name: int(a.sum()) for seg, a in zip(state.segments, state.alive)}
+
+        def live_rows(name):
+            if name in rows_of:
+                return rows_of[name]
+            s = positions[name]
+            return [(s, int(r)) for r in np.flatnonzero(state.alive[s])]
+
+        rows_of = {}  # rewritten segment -> the rows it was copied from, for a merge in the same pass
+        names = []
+        for name in manifest["segments"]:
+            if alive[name] == 0:
+                continue
+            if 2 * alive[name] < len(state.segments[positions[name]]):
+                rewritten = self._write_segment(manifest, state, live_rows(name))
+                alive[rewritten] = alive[name]
+                rows_of[rewritten] = live_rows(name)
+                name = rewritten
+            names.append(name)
+
+        merge_from = len(names)
+        while merge_from >= 2 and (alive[names[merge_from - 2]] <= 2 * sum(alive[n] for n in names[merge_from - 1:])
+                                   or merge_from > MAX_SEGMENTS):
+            merge_from -= 1
+        if merge_from < len(names):
+            tail = [location for name in names[merge_from - 1:] for location in live_rows(name)]
+            names = names[:merge_from - 1] + [self._write_segment(manifest, state, tail)]
+        if names == state.manifest["segments"]:
+            return
+        manifest["segments"] = names
+        manifest["tombstones"] = {n: r for n, r in manifest["tombstones"].items() if n in names}
+        self._write_manifest(manifest)
+        self._refresh()
+
+    def _gc(self):
+        """Remove segment directories no manifest refers to (left by merges or crashed writes)."""
+        live = set(self._refresh().manifest["segments"])
+        for entry in os.listdir(self.path):
+            stale_segment = entry.startswith("seg-") and entry not in live
+            if stale_segment or (entry.endswith(".tmp") and entry != f"{MANIFEST}.tmp"):
+                # Open memory maps elsewhere keep the files readable on POSIX; on Windows retry later
+                shutil.rmtree(os.path.join(self.path, entry), ignore_errors=True)
+
+    # --- Chroma-compatible API ---
+    def count(self) -> int:
+        return len(self._refresh().index)
+
+    def add(self, ids, embeddings=None, documents=None, metadatas=None):
+        """Like Chroma: ids that already exist are left untouched."""
+        if embeddings is None:
+            raise ValueError("The mmap vector store needs precomputed embeddings")
+
+        def build(state: _State):
+            keep = [i for i, doc_id in enumerate(ids) if doc_id not in state.index]
+            return (
+                [ids[i] for i in keep],
+                np.asarray([embeddings[i] for i in keep], dtype=np.float32),
+                [documents[i] if documents is not None else None for i in keep],
+                [metadatas[i] if metadatas is not None else None for i in keep],
+                (),
+            )
+
+        self._commit_with(build)
+
+    def upsert(self, ids, embeddings=None, documents=None, metadatas=None):
+        if embeddings is None:
+            raise ValueError("The mmap vector store needs precomputed embeddings")
+        ids = list(ids)
+        self._commit(
+            ids, np.asarray(embeddings, dtype=np.float32),
+            list(documents) if documents is not None else [None] * len(ids),
+            list(metadatas) if metadatas is not None else [None] * len(ids),
+        )
+
+    def update(self, ids, embeddings=None, documents=None, metadatas=None):
+        """Chroma semantics: only given fields change, metadata keys are merged."""
+
+        def build(state: _State):
+            present = [i for i, doc_id in enumerate(ids) if doc_id in state.index]
+            new_ids, vectors, new_documents, new_metadatas = self._rows(state, [state.index[ids[i]] for i in present])
+            for j, i in enumerate(present):
+                if embeddings is not None:
+                    vectors[j] = np.asarray(embeddings[i], dtype=np.float32)
+                if documents is not None:
+                    new_documents[j] = documents[i]
+                if metadatas is not None:
+                    new_metadatas[j] = {**(new_metadatas[j] or {}), **(metadatas[i] or {})}
+            return new_ids, np.asarray(vectors, dtype=np.float32), new_documents, new_metadatas, ()
+
+        self._commit_with(build)
+
+    def delete(self, ids=None, where=None):
+        targets = list(ids) if ids is not None else None
+        if where is None:
+            if targets:
+                self._commit(delete_ids=targets)
+            return
+        self._commit_with(lambda state: ((), None, None, None, [
+            state.segments[s].ids[r] for s, r in self._select(state, ids=targets, where=where)
+        ]))
+
+    def _select(self, state: _State, ids=None, where=None) -> List[Tuple[int, int]]:
+        if ids is not None:
+            locations = [state.index[doc_id] for doc_id in ids if doc_id in state.index]
+        else:
+            locations = [(s, int(r)) for s, alive in enumerate(state.alive) for r in np.flatnonzero(alive)]
+        if where:
+            locations = [(s, r) for s, r in locations if _matches(where, state.segments[s].metadatas[r])]
+        return locations
+
+    def _project(self, state: _State, locations, include) -> dict:
+        out = {"ids": [state.segments[s].ids[r] for s, r in locations],
+               "documents": None, "metadatas": None, "embeddings": None}
+        if "documents" in include:
+            out["documents"] = [state.segments[s].document(r) for s, r in locations]
+        if "metadatas" in include:
+            out["metadatas"] = [state.segments[s].metadatas[r] for s, r in locations]
+        if "embeddings" in include:
+            dim = state.manifest.get("dim") or 0
+            out["embeddings"] = (np.vstack([np.asarray(state.segments[s].vectors[r], dtype=np.float32)
+                                            for s, r in locations]) if locations else np.zeros((0, dim), np.float32))
+        return out
+
+    def get(self, ids=None, where=None, limit=None, offset=None, include=("documents", "metadatas")) -> dict:
+        state = self._refresh()
+        locations = self._select(state, ids, where)
+        start = offset or 0
+        locations = locations[start:start + limit if limit is not None else None]
+        return self._project(state, locations, include)
+
+    def query(self, query_embeddings, n_results: int = 10, where=None,
+              include=("documents", "metadatas", "distances")) -> dict:
+        state = self._refresh()
+        queries = np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32))
+        space = (state.manifest.get("metadata") or {}).get("hnsw:space", "l2")
+        q_sqnorms = np.sum(queries ** 2, axis=1)
+        allowed = None
+        if where:
+            allowed = set(self._select(state, where=where))
+
+        results = {key: [] for key in ("ids", "distances", "documents", "metadatas", "embeddings")}
+        for qi, query in enumerate(queries):
+            candidates = []  # (distances, segment index, rows)
+            for s, segment in enumerate(state.segments):
+                rows = segment.candidate_rows(query, IVF_NPROBE)
+                dots = segment.dot(query[None, :], rows)[:, 0]
+                rows = np.arange(len(segment)) if rows is None else rows
+                if space == "cosine":
+                    distances = 1.0 - dots / np.sqrt(np.maximum(segment.sqnorms[rows] * q_sqnorms[qi], 1e-24))
+                elif space == "ip":
+                    distances = 1.0 - dots
+                else:
+                    distances = np.maximum(segment.sqnorms[rows] + q_sqnorms[qi] - 2.0 * dots, 0.0)
+                mask = state.alive[s][rows]
+                if allowed is not None:
+                    mask &= np.fromiter(((s, int(r)) in allowed for r in rows), dtype=bool, count=len(rows))
+                rows, distances = rows[mask], distances[mask]
+                if len(rows) > n_results:
+                    top = np.argpartition(distances, n_results - 1)[:n_results]
+                    rows, distances = rows[top], distances[top]
+                candidates.append((distances, np.full(len(rows), s), rows))
+
+            distances = np.concatenate([c[0] for c in candidates]) if candidates else np.zeros(0)
+            seg_index = np.concatenate([c[1] for c in candidates]) if candidates else np.zeros(0, int)
+            rows = np.concatenate([c[2] for c in candidates]) if candidates else np.zeros(0, int)
+            best = np.argsort(distances, kind="stable")[:n_results]
+            locations = [(int(seg_index[i]), int(rows[i])) for i in best]
+            projected = self._project(state, locations, include)
+            results["ids"].append(projected["ids"])
+            results["distances"].append(distances[best].tolist())
+            for field in ("documents", "metadatas", "embeddings"):
+                results[field].append(projected[field])
+        for field in ("documents", "metadatas", "embeddings", "distances"):
+            if field not in include:
+                results[field] = None
+        return results
+
+
+# -------------------------
+# Client
+# -------------------------
+class MmapVectorClient:
+    def __init__(self, root: str = None, dtype: str = None):
+        self.root = os.path.abspath(root or VECTOR_STORE_DIR)
+        self.dtype = dtype or VECTOR_STORE_DTYPE
+        os.makedirs(self.root, exist_ok=True)
+        self._open: Dict[str, MmapCollection] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    def list_collections(self) -> List[MmapCollection]:
+        return [self.get_collection(name) for name in sorted(os.listdir(self.root))
+                if os.path.exists(os.path.join(self._path(name), MANIFEST))]
+
+    def get_collection(self, name: str) -> MmapCollection:
+        with self._lock:
+            collection = self._open.get(name)
+            if collection is None or not os.path.exists(os.path.join(self._path(name), MANIFEST)):
+                collection = self._open[name] = MmapCollection(self._path(name))
+            return collection
+
+    def create_collection(self, name: str, metadata: dict = None) -> MmapCollection:
+        path = self._path(name)
+        if os.path.exists(os.path.join(path, MANIFEST)):
+            raise ValueError(f"Collection {name} already exists.")
+        os.makedirs(path, exist_ok=True)
+        with FileLock(os.path.join(path, ".lock")):
+            if not os.path.exists(os.path.join(path, MANIFEST)):
+                manifest = {"uid": uuid.uuid4().hex, "segments": [], "tombstones": {}, "next_segment": 1,
+                            "dim": None, "dtype": self.dtype, "metadata": metadata}
+                tmp_path = os.path.join(path, f"{MANIFEST}.tmp")
+                with open(tmp_path, "w") as f:
+                    json.dump(manifest, f)
+                os.replace(tmp_path, os.path.join(path, MANIFEST))
+        return self.get_collection(name)
+
+    def get_or_create_collection(self, name: str, metadata: dict = None) -> MmapCollection:
+        try:
+            return self.get_collection(name)
+        except ValueError:
+            try:
+                return self.create_collection(name, metadata)
+            except ValueError:
+                return self.get_collection(name)  # created concurrently
+
+    def delete_collection(self, name: str):
+        path = self._path(name)
+        if not os.path.exists(os.path.join(path, MANIFEST)):
+            raise ValueError(f"Collection {name} does not exist.")
+        with self._lock:
+            self._open.pop(name, None)
+        # Wait for a writer in any process to finish its commit first
+        with FileLock(os.path.join(path, ".lock")):
+            if not os.path.exists(os.path.join(path, MANIFEST)):
+                raise ValueError(f"Collection {name} does not exist.")
+            # Removing the manifest first makes the deletion atomic for readers
+            os.remove(os.path.join(path, MANIFEST))
+            shutil.rmtree(path, ignore_errors=True)
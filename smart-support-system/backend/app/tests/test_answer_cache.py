@@ -0,0 +1,47 @@
+# backend/app/tests/test_answer_cache.py
+import time
+import numpy as np
+from app.core import registry
+from app.services.answer_cache import SemanticAnswerCache
+
+def _cache(monkeypatch, tmp_path, **kwargs):
+    monkeypatch.setattr(registry, "PRODUCT_VERSION_DIR", str(tmp_path))
+    return SemanticAnswerCache(**{"threshold": 0.95, "ttl": 60, "maxsize": 10, **kwargs})
+
+def test_near_duplicate_question_hits(monkeypatch, tmp_path):
+    cache = _cache(monkeypatch, tmp_path)
+    cache.put("p1", "qa", np.array([1.0, 0.0, 0.0]), {"answer": "30 days"}, registry.product_version("p1"))
+
+    assert cache.get("p1", "qa", np.array([0.99, 0.05, 0.0]))["answer"] == "30 days"
+    assert cache.get("p1", "qa", np.array([0.0, 1.0, 0.0])) is None
+    assert cache.get("p2", "qa", np.array([1.0, 0.0, 0.0])) is None
+
+def test_product_change_invalidates(monkeypatch, tmp_path):
+    cache = _cache(monkeypatch, tmp_path)
+    version = registry.product_version("p1")
+    cache.put("p1", "qa", np.array([1.0, 0.0]), {"answer": "old"}, version)
+    registry.bump_product_version("p1")
+    assert cache.get("p1", "qa", np.array([1.0, 0.0])) is None
+
+    # An answer computed before the change is not stored after it
+    cache.put("p1", "qa", np.array([1.0, 0.0]), {"answer": "stale"}, version)
+    assert cache.get("p1", "qa", np.array([1.0, 0.0])) is None
+
+def test_all_products_version_is_not_a_product(monkeypatch, tmp_path):
+    _cache(monkeypatch, tmp_path)
+    registry.bump_product_version("p1")
+    assert registry.product_version("_all") == 0
+    assert registry.product_version("%all") == 0
+    assert registry.product_version(registry.ALL_PRODUCTS) > 0
+
+def test_ttl_and_size_eviction(monkeypatch, tmp_path):
+    cache = _cache(monkeypatch, tmp_path, ttl=0, maxsize=2)
+    cache.put("p1", "qa", np.array([1.0, 0.0]), {"answer": "a"}, 0)
+    time.sleep(0.01)
+    assert cache.get("p1", "qa", np.array([1.0, 0.0])) is None
+
+    cache.ttl = 60
+    for i, vec in enumerate(([1.0, 0.0], [0.0, 1.0], [-1.0, 0.0])):
+        cache.put("p1", "qa", np.array(vec), {"answer": str(i)}, 0)
+    assert cache.stats()["size"] == 2
+    assert cache.get("p1", "qa", np.array([1.0, 0.0])) is None
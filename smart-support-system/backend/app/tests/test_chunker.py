@@ -0,0 +1,42 @@
+# backend/app/tests/test_chunker.py
+from app.services.chunker import TokenChunker, approx_token_count
+
+PAGE_ONE = (
+    "RETURN POLICY\n"
+    + "\n".join(f"Sentence {i} explains how refunds and store credit work." for i in range(20))
+)
+PAGE_TWO = "2.1 Shipping\nOrders ship within 3 business days.\n- Express shipping is available.\n"
+
+def test_chunks_respect_token_budget():
+    chunker = TokenChunker(max_tokens=40, overlap_tokens=12)
+    chunks = list(chunker.chunk_pages([(1, PAGE_ONE)]))
+    assert len(chunks) > 1
+    assert all(meta["tokens"] <= 40 for _, meta in chunks)
+    assert all(approx_token_count([text])[0] <= 40 for text, _ in chunks)
+
+def test_consecutive_chunks_overlap():
+    chunks = list(TokenChunker(max_tokens=40, overlap_tokens=12).chunk_pages([(1, PAGE_ONE)]))
+    first, second = chunks[0][0].splitlines(), chunks[1][0].splitlines()
+    assert first[0] == second[0] == "RETURN POLICY"  # heading prefixed to every chunk of its section
+    assert first[-1] == second[1]
+
+def test_chunks_carry_page_and_section_provenance():
+    chunks = list(TokenChunker(max_tokens=40, overlap_tokens=12).chunk_pages([(1, PAGE_ONE), (2, PAGE_TWO)]))
+    assert {meta["section"] for _, meta in chunks if meta["page"] == 1} == {"RETURN POLICY"}
+    shipping = [(text, meta) for text, meta in chunks if meta["page"] == 2]
+    assert shipping and all(meta["section"] == "2.1 Shipping" for _, meta in shipping)
+    text, meta = shipping[0]
+    assert text.startswith("2.1 Shipping\nOrders ship")
+    assert PAGE_TWO[meta["char_start"]:].startswith("Orders ship")
+
+def test_chunks_never_span_pages():
+    chunks = list(TokenChunker(max_tokens=200, overlap_tokens=10).chunk_pages([(1, "Alpha text."), (2, "Beta text.")]))
+    assert [(text, meta["page"]) for text, meta in chunks] == [("Alpha text.", 1), ("Beta text.", 2)]
+
+def test_number_led_wrapped_line_is_not_a_heading():
+    page = ("Returns\nCustomers can return any item within\n"
+            "30 days of purchase for a full refund provided that\nthe receipt is kept.\n3 Cleaning the filter\nRinse it.")
+    chunks = list(TokenChunker(max_tokens=200, overlap_tokens=10).chunk_pages([(1, page)]))
+    assert [meta["section"] for _, meta in chunks] == ["Returns", "3 Cleaning the filter"]
+    assert "within 30 days of purchase" in chunks[0][0]
+    assert chunks[1][0] == "3 Cleaning the filter\nRinse it."
@@ -0,0 +1,34 @@
+# backend/app/tests/test_context_packer.py
+import pytest
+
+from app.services import context_packer
+from app.services.chunker import approx_token_count
+from app.services.context_packer import pack_context
+
+@pytest.fixture(autouse=True)
+def word_counter(monkeypatch):
+    # Deterministic counts whether or not the tiktoken encoding can be downloaded
+    monkeypatch.setattr(context_packer, "get_token_counter", lambda: approx_token_count)
+    monkeypatch.setattr(context_packer, "CONTEXT_MIN_TOKENS", 5)
+
+def test_overlap_between_chunks_is_dropped():
+    docs = [
+        {"id": "a", "document": "Hold the power button. The light blinks twice."},
+        {"id": "b", "document": "The light blinks twice. Then the device restarts."},
+    ]
+    packed = pack_context(docs, budget=100)
+    assert [d["document"] for d in packed] == [
+        "Hold the power button. The light blinks twice.", "Then the device restarts."
+    ]
+    assert not any(d["truncated"] for d in packed)
+
+def test_budget_trims_at_sentence_boundary():
+    docs = [
+        {"id": "a", "document": "Reset takes ten seconds. " * 3},
+        {"id": "b", "document": "Warranty covers two years. Batteries are excluded. Keep the receipt."},
+        {"id": "c", "document": "This chunk does not fit at all."},
+    ]
+    packed = pack_context(docs, budget=24)
+    assert sum(d["tokens"] for d in packed) <= 24
+    assert packed[1]["document"] == "Warranty covers two years." and packed[1]["truncated"]
+    assert [d["id"] for d in packed] == ["a", "b"]
@@ -0,0 +1,55 @@
+# backend/app/tests/test_embedding_batcher.py
+import time
+import threading
+import numpy as np
+from app.services.embedding_batcher import EmbeddingBatcher
+
+class SlowModel:
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, batch_size=32):
+        self.calls.append(list(texts))
+        time.sleep(0.02)
+        return np.array([[len(t), 1.0] for t in texts], dtype=np.float32)
+
+def test_single_request_is_not_delayed():
+    batcher = EmbeddingBatcher(SlowModel(), max_wait_ms=500)
+    start = time.perf_counter()
+    vectors = batcher.encode(["hello"])
+    assert time.perf_counter() - start < 0.3
+    assert vectors.tolist() == [[5.0, 1.0]]
+
+def test_concurrent_requests_are_coalesced():
+    model = SlowModel()
+    batcher = EmbeddingBatcher(model, max_wait_ms=20)
+    results = {}
+
+    def ask(i):
+        results[i] = batcher.encode([f"question {i % 4}"])
+
+    threads = [threading.Thread(target=ask, args=(i,)) for i in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(model.calls) < 16
+    assert all(results[i][0][0] == len(f"question {i % 4}") for i in range(16))
+    # Duplicate questions in one batch are encoded once
+    assert all(len(call) == len(set(call)) for call in model.calls)
+
+def test_worker_survives_a_failed_batch():
+    class FlakyModel(SlowModel):
+        def encode(self, texts, batch_size=32):
+            vectors = super().encode(texts, batch_size)
+            # A malformed result fails while the futures are resolved, not inside encode
+            return vectors[:0] if "bad" in texts else vectors
+
+    batcher = EmbeddingBatcher(FlakyModel())
+    try:
+        batcher.encode(["bad"])
+        assert False, "expected the batch to fail"
+    except IndexError:
+        pass
+    assert batcher.encode(["hello"]).tolist() == [[5.0, 1.0]]
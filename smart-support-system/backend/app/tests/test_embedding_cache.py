@@ -0,0 +1,62 @@
+# backend/app/tests/test_embedding_cache.py
+import numpy as np
+from app.services.embedding_cache import EmbeddingCache
+from app.utils.lru import LRUCache
+
+class CountingModel:
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, batch_size=32):
+        self.calls.append(list(texts))
+        return np.array([[len(t), t.count("a"), 1.0] for t in texts], dtype=np.float32)
+
+def test_lru_evicts_least_recently_used():
+    lru = LRUCache(2)
+    lru.put("a", 1)
+    lru.put("b", 2)
+    lru.get("a")
+    lru.put("c", 3)
+    assert lru.get("b") is None
+    assert lru.get("a") == 1
+    assert lru.stats()["evictions"] == 1
+
+def test_cache_only_encodes_misses(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "emb.sqlite"), memory_items=10, disk_items=100)
+    model = CountingModel()
+
+    first = cache.encode(model, ["what is the return policy", "warranty"], "m")
+    second = cache.encode(model, ["what  is the return policy ", "refunds"], "m")
+
+    assert model.calls == [["what is the return policy", "warranty"], ["refunds"]]
+    assert np.array_equal(first[0], second[0])
+
+def test_disk_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "emb.sqlite")
+    EmbeddingCache(path, 10, 100).encode(CountingModel(), ["shipping times"], "m")
+
+    model = CountingModel()
+    cache = EmbeddingCache(path, 10, 100)
+    cache.encode(model, ["shipping times"], "m")
+    assert model.calls == []
+    assert cache.stats()["disk"]["hits"] == 1
+
+def test_cache_is_keyed_per_model(tmp_path):
+    cache = EmbeddingCache(None, 10, 100)
+    model = CountingModel()
+    cache.encode(model, ["same text"], "model-a")
+    cache.encode(model, ["same text"], "model-b")
+    assert len(model.calls) == 2
+
+def test_disk_limit_holds_across_processes(tmp_path):
+    path = str(tmp_path / "emb.sqlite")
+    # Two workers sharing the file, each writing fewer rows than the limit
+    workers = [EmbeddingCache(path, 10, 3), EmbeddingCache(path, 10, 3)]
+    for i in range(4):
+        workers[i % 2].encode(CountingModel(), [f"text {i}"], "m")
+    assert workers[0].stats()["disk"]["size"] == 3
+
+    model = CountingModel()
+    workers[1].memory = LRUCache(10)  # cold memory tier: lookups hit the disk
+    workers[1].encode(model, ["text 0", "text 3"], "m")
+    assert model.calls == [["text 0"]]  # the oldest row was evicted
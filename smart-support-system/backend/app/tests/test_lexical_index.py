@@ -0,0 +1,72 @@
+# backend/app/tests/test_lexical_index.py
+from app.services.lexical_index import LexicalIndex, tokenize, reciprocal_rank_fusion
+
+DOCS = {
+    "a": "Error E-4021 means the filter cartridge is not seated.",
+    "b": "To reset the device hold the power button for ten seconds.",
+    "c": "The filter should be replaced every six months.",
+}
+
+def _index(path=None):
+    index = LexicalIndex(path)
+    index.add(list(DOCS), list(DOCS.values()))
+    return index
+
+def test_tokenize_keeps_codes_whole_and_split():
+    assert tokenize("Error E-4021") == ["error", "e-4021", "e", "4021"]
+
+def test_exact_code_ranks_first():
+    ids, scores = _index().search("what does e-4021 mean", n=3)
+    assert ids[0] == "a"
+    assert list(scores) == sorted(scores, reverse=True)
+
+def test_removed_and_replaced_documents():
+    index = _index()
+    index.remove(["a"])
+    assert "a" not in index.search("filter", n=3)[0]
+    index.add(["c"], ["power button replacement"])
+    assert index.search("filter", n=3)[0] == []
+    assert len(index) == 2
+
+def test_log_replay_and_compaction(tmp_path):
+    path = str(tmp_path / "p.jsonl")
+    index = _index(path)
+    index.remove(["a", "b"])
+
+    reloaded = LexicalIndex(path)
+    reloaded.load()  # 1 live of 3 rows: compacted by the writer (or on load)
+    assert len(reloaded) == 1 and len(reloaded.doc_ids) == 1
+    assert reloaded.search("filter", n=3)[0] == ["c"]
+
+    # Writes from another process are picked up on the next search
+    index.add(["d"], ["filter housing torque"])
+    assert "d" in reloaded.search("filter", n=3)[0]
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([["x", "y"], ["y", "z"]], k=60)
+    assert fused[0][0] == "y"
+
+def test_reindexing_compacts_the_log(tmp_path):
+    path = tmp_path / "p.jsonl"
+    index = _index(str(path))
+    for _ in range(20):
+        index.add(list(DOCS), list(DOCS.values()))
+    # Superseded rows are dropped as they pile up, not only on the next load
+    assert len(index.doc_ids) <= 2 * len(DOCS)
+    assert len(path.read_text().splitlines()) <= 2 * len(DOCS)
+    assert index.search("what does e-4021 mean", n=3)[0][0] == "a"
+
+def test_interleaved_writers_keep_each_others_records(tmp_path):
+    path = str(tmp_path / "p.jsonl")
+    first, second = LexicalIndex(path), LexicalIndex(path)
+    first.add(["a"], [DOCS["a"]])
+    second.add(["b"], [DOCS["b"]])  # `first` hasn't read this yet when it writes again
+    first.add(["c"], [DOCS["c"]])
+    second.remove(["a"])            # 1 dead of 3 rows
+    second.remove(["b"])            # mostly dead: compacted under the lock
+
+    reloaded = LexicalIndex(path)
+    reloaded.load()
+    for index in (first, second, reloaded):
+        assert index.search("filter", n=3)[0] == ["c"]
+        assert sorted(index.rows) == ["c"]
@@ -0,0 +1,30 @@
+# backend/app/tests/test_llm_provider.py
+import time
+import asyncio
+
+import pytest
+
+from app.services.llm_provider import LLMError, StubProvider
+
+REQUEST = {"messages": [{"role": "user", "content": "reset the device by holding power"}], "max_tokens": 8}
+
+def test_stub_streams_at_configured_rate():
+    llm = StubProvider(latency_ms=50, dist="fixed", tokens_per_sec=100, output_tokens=20, error_rate=0, seed=1)
+    t0 = time.perf_counter()
+    pieces = list(llm.stream(REQUEST))
+    elapsed = time.perf_counter() - t0
+    assert len(pieces) == 8  # capped by max_tokens
+    assert 0.05 + 7 / 100 <= elapsed < 0.5
+    assert set("".join(pieces).split()) <= set(REQUEST["messages"][0]["content"].split())
+
+def test_stub_injects_errors():
+    llm = StubProvider(latency_ms=0, dist="fixed", tokens_per_sec=0, error_rate=1.0, seed=1)
+    with pytest.raises(LLMError):
+        llm.complete(REQUEST)
+
+    async def consume():
+        return [piece async for piece in llm.astream(REQUEST)]
+    with pytest.raises(LLMError):
+        asyncio.run(consume())
+
+    assert StubProvider(latency_ms=0, tokens_per_sec=0, error_rate=0).complete(REQUEST)
@@ -0,0 +1,74 @@
+# backend/app/tests/test_manifest.py
+import numpy as np
+import pytest
+
+from app.services.manifest import FileManifest
+
+def _manifest(tmp_path, scan=lambda: []):
+    return FileManifest(str(tmp_path / "manifest.sqlite"), scan=scan)
+
+def test_record_update_and_remove(tmp_path):
+    manifest = _manifest(tmp_path)
+    manifest.record_file("p1", "f1", "a.pdf", 10, file_hash="h1", uploaded_at="2024-01-01", size=100,
+                         local_path="/u/a.pdf")
+    manifest.record_file("p1", "f1", "a.pdf", 12, file_hash="h2")  # re-index: path and time kept
+    manifest.record_file("p1", "f2", "b.pdf", 1, uploaded_at="2024-01-02", increment=True)
+    manifest.record_file("p1", "f2", "b.pdf", 1, increment=True)
+
+    f1 = manifest.get_file("f1")
+    assert (f1["chunks"], f1["file_hash"], f1["local_path"], f1["uploaded_at"]) == (12, "h2", "/u/a.pdf", "2024-01-01")
+    assert manifest.get_file("f2")["chunks"] == 2
+    assert manifest.find_by_hash("h2")["file_id"] == "f1"
+    assert manifest.file_name_exists("b.pdf") and not manifest.file_name_exists("c.pdf")
+
+    manifest.remove_file("f1")
+    assert [f["file_id"] for f in manifest.products()[0]["files"]] == ["f2"]
+    manifest.remove_product("p1")
+    assert manifest.products() == []
+
+def test_backfilled_once_from_scan(tmp_path):
+    calls = []
+
+    def scan():
+        calls.append(1)
+        return [{"product_id": "p1"},
+                {"product_id": "p1", "file_id": "f1", "file_name": "a.pdf", "chunks": 3, "uploaded_at": "t"}]
+
+    assert _manifest(tmp_path, scan).products()[0]["files"][0]["chunks"] == 3
+    assert _manifest(tmp_path, scan).get_file("f1")["file_name"] == "a.pdf"
+    assert len(calls) == 1
+
+def test_failed_ingest_is_not_a_duplicate(tmp_path, monkeypatch):
+    from app.core import registry
+    from app.services import ingest_service, lexical_index
+    from app.services.vector_store import MmapVectorClient
+    from app.utils.lru import LRUCache
+
+    monkeypatch.setattr(registry.settings, "VECTOR_BACKEND", "mmap")
+    monkeypatch.setitem(registry._instances, "vector_client", MmapVectorClient(str(tmp_path / "vectors")))
+    monkeypatch.setattr(registry, "_collections", LRUCache(16))
+    monkeypatch.setattr(registry, "PRODUCT_VERSION_DIR", str(tmp_path / "versions"))
+    monkeypatch.setattr(lexical_index, "LEXICAL_INDEX_DIR", str(tmp_path / "lexical"))
+    monkeypatch.setattr(ingest_service, "file_manifest", _manifest(tmp_path))
+    chunks = [(f"Chunk {i} about returns.", {"page": 1}) for i in range(4)]
+
+    calls = []
+    def fail_second_batch(product_id, texts, batch_size):
+        # Stands in for the embedding model; the second batch of the first run fails
+        calls.append(1)
+        if len(calls) == 2:
+            raise RuntimeError("embedding failed")
+        vectors = np.array([[len(t), i + 1.0, 1.0, 0.0] for i, t in enumerate(texts)], dtype=np.float32)
+        return vectors, [ingest_service.hash_text(t) for t in texts], 0
+    monkeypatch.setattr(ingest_service, "_embed_chunks", fail_second_batch)
+
+    with pytest.raises(RuntimeError):
+        ingest_service.add_documents_chroma_bulk(iter(chunks), "p1", "a.pdf", "f1", batch_size=2, file_hash="h1")
+    assert ingest_service.find_file_by_hash("h1") is None
+    assert ingest_service.find_incomplete_file_by_hash("h1")["chunks"] == 2
+
+    # Uploading the same file again re-runs the ingest under the same file id
+    ingest_service.add_documents_chroma_bulk(iter(chunks), "p1", "a.pdf", "f1", batch_size=2, file_hash="h1")
+    assert ingest_service.find_file_by_hash("h1")["file_id"] == "f1"
+    assert ingest_service.find_incomplete_file_by_hash("h1") is None
+    assert ingest_service.find_file("f1")["chunks"] == 4
@@ -0,0 +1,15 @@
+# backend/app/tests/test_pdf_extract.py
+from app.services.pdf_extract import iter_pdf_pages, count_pages
+
+SAMPLE_PDF = "app/sample_data/return_policy.pdf"
+
+def test_iter_pdf_pages_is_page_tagged():
+    pages = list(iter_pdf_pages(SAMPLE_PDF, workers=1))
+    assert len(pages) == count_pages(SAMPLE_PDF)
+    assert [n for n, _ in pages] == list(range(1, len(pages) + 1))
+    assert any(text.strip() for _, text in pages)
+
+def test_parallel_extraction_matches_sequential():
+    sequential = list(iter_pdf_pages(SAMPLE_PDF, workers=1))
+    parallel = list(iter_pdf_pages(SAMPLE_PDF, workers=2, pages_per_task=1))
+    assert parallel == sequential
@@ -0,0 +1,21 @@
+# backend/app/tests/test_rerank.py
+import numpy as np
+from app.services.rerank import mmr
+
+def test_mmr_skips_near_duplicates():
+    query = np.array([1.0, 0.0, 0.0])
+    candidates = np.array([
+        [0.95, 0.30, 0.0],   # most relevant
+        [0.95, 0.31, 0.0],   # near-duplicate of the first
+        [0.80, 0.00, 0.60],  # less relevant, different content
+    ])
+    assert mmr(query, candidates, k=2, lambda_mult=0.5) == [0, 2]
+
+def test_mmr_lambda_one_is_relevance_order():
+    query = np.array([1.0, 0.0])
+    candidates = np.array([[0.2, 1.0], [1.0, 0.1], [0.7, 0.7]])
+    assert mmr(query, candidates, k=3, lambda_mult=1.0) == [1, 2, 0]
+
+def test_mmr_handles_small_inputs():
+    assert mmr(np.ones(3), np.zeros((0, 3)), k=4) == []
+    assert mmr(np.ones(2), np.ones((2, 2)), k=5) == [0, 1]
@@ -0,0 +1,77 @@
+# backend/app/tests/test_suggestion_service.py
+import pytest
+
+from app.core import registry
+from app.services import suggestion_service
+from app.services.suggestion_service import get_suggestions, refresh_suggestions
+
+@pytest.fixture
+def built(tmp_path, monkeypatch):
+    monkeypatch.setattr(registry, "PRODUCT_VERSION_DIR", str(tmp_path / "versions"))
+    monkeypatch.setattr(suggestion_service, "SUGGESTIONS_DIR", str(tmp_path / "suggestions"))
+    monkeypatch.setattr(suggestion_service, "_cache", {})
+    calls = []
+
+    def build(product_id, n=None):
+        calls.append(product_id)
+        return [f"How do I reset {product_id}? ({len(calls)})"] if product_id != "missing" else []
+
+    monkeypatch.setattr(suggestion_service, "build_suggestions", build)
+    return calls
+
+def test_read_after_ingest_does_not_rebuild(built):
+    registry.bump_product_version("p1")
+    refresh_suggestions("p1")
+    suggestion_service._cache.clear()  # e.g. another worker process
+    assert get_suggestions("p1") == ["How do I reset p1? (1)"]
+    assert get_suggestions("p1") == ["How do I reset p1? (1)"]
+    assert built == ["p1"]
+
+def test_changed_content_serves_old_then_refreshes(built):
+    registry.bump_product_version("p1")
+    refresh_suggestions("p1")
+    registry.bump_product_version("p1")
+    assert get_suggestions("p1") == ["How do I reset p1? (1)"]
+    suggestion_service._executor.submit(lambda: None).result()  # wait for the refresh
+    assert get_suggestions("p1") == ["How do I reset p1? (2)"]
+
+@pytest.fixture
+def builders(tmp_path, monkeypatch):
+    """The real build_suggestions, with the LLM and indexed-text builders replaced."""
+    monkeypatch.setattr(registry, "PRODUCT_VERSION_DIR", str(tmp_path / "versions"))
+    monkeypatch.setattr(suggestion_service, "SUGGESTIONS_DIR", str(tmp_path / "suggestions"))
+    monkeypatch.setattr(suggestion_service, "_cache", {})
+    monkeypatch.setattr(suggestion_service, "llm_configured", lambda: True)
+    calls = []
+
+    def from_rag(product_id, n):
+        calls.append(("rag", product_id))
+        return ["How do I reset the router?"] if product_id == "p1" else []
+
+    def from_llm(product_id, n):
+        calls.append(("llm", product_id))
+        return []  # what generate_suggestions returns when the LLM call fails
+
+    monkeypatch.setattr(suggestion_service, "generate_suggestions_from_rag", from_rag)
+    monkeypatch.setattr(suggestion_service, "generate_suggestions", from_llm)
+    return calls
+
+def _wait_for_refresh():
+    suggestion_service._executor.submit(lambda: None).result()
+
+def test_unknown_product_is_built_once_per_version(builders, tmp_path):
+    assert get_suggestions("no-such-product") == []  # never built inline
+    _wait_for_refresh()
+    assert get_suggestions("no-such-product") == []
+    assert get_suggestions("no-such-product") == []
+    assert builders == [("llm", "no-such-product"), ("rag", "no-such-product")]
+    assert not (tmp_path / "suggestions").exists()
+
+    registry.bump_product_version("no-such-product")
+    get_suggestions("no-such-product")
+    _wait_for_refresh()
+    assert len(builders) == 4
+
+def test_llm_failure_falls_back_to_indexed_text(builders):
+    assert refresh_suggestions("p1") == ["How do I reset the router?"]
+    assert builders == [("llm", "p1"), ("rag", "p1")]
@@ -0,0 +1,47 @@
+# backend/app/tests/test_upload.py
+import io
+import os
+import hashlib
+import pytest
+from app.services import upload_service
+
+def test_spool_upload_hashes_incrementally(tmp_path, monkeypatch):
+    monkeypatch.setattr(upload_service, "UPLOAD_SPOOL_DIR", str(tmp_path))
+    data = os.urandom(upload_service.UPLOAD_BLOCK_SIZE * 2 + 17)
+
+    spooled = upload_service.spool_upload(io.BytesIO(data))
+    assert spooled["size"] == len(data)
+    assert spooled["sha256"] == hashlib.sha256(data).hexdigest()
+    with open(spooled["path"], "rb") as f:
+        assert f.read() == data
+
+def test_spool_upload_rejects_oversized_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(upload_service, "UPLOAD_SPOOL_DIR", str(tmp_path))
+    with pytest.raises(upload_service.UploadTooLargeError):
+        upload_service.spool_upload(io.BytesIO(b"x" * 2048), max_bytes=1024)
+    assert os.listdir(tmp_path) == []
+
+def test_simultaneous_uploads_of_a_file_queue_it_once(tmp_path, monkeypatch):
+    import time
+    import threading
+    from app.services import job_service
+
+    monkeypatch.setattr(job_service, "JOBS_FILE", str(tmp_path / "jobs.json"))
+    monkeypatch.setattr(job_service, "_jobs", {})
+    monkeypatch.setattr(job_service, "find_file_by_hash", lambda file_hash: None)
+    monkeypatch.setattr(job_service, "find_incomplete_file_by_hash", lambda file_hash: None)
+    monkeypatch.setattr(job_service._executor, "submit", lambda fn, *args: None)  # don't run the jobs
+
+    def prepare(failed):
+        time.sleep(0.05)  # moving the upload into place
+        return {"product_id": "manual", "pdf_path": str(tmp_path / "manual.pdf"), "file_name": "manual.pdf"}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(job_service.submit_if_absent("h1", prepare)[0]))
+               for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(results) == ["active", "active", "active", "queued"]
+    assert len(job_service._jobs) == 1
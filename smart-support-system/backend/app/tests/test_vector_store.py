@@ -0,0 +1,114 @@
+# backend/app/tests/test_vector_store.py
+import numpy as np
+import pytest
+
+from app.services import vector_store
+from app.services.vector_store import MmapVectorClient
+
+def _vectors(n, dim=16, seed=0):
+    return np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+
+def _collection(tmp_path, n=200):
+    collection = MmapVectorClient(str(tmp_path)).get_or_create_collection("product_p1")
+    vectors = _vectors(n)
+    for start in range(0, n, 50):
+        rows = range(start, start + 50)
+        collection.upsert(ids=[f"c{i}" for i in rows], embeddings=vectors[start:start + 50],
+                          documents=[f"chunk {i}" for i in rows],
+                          metadatas=[{"file_id": f"f{i % 4}", "page": i} for i in rows])
+    return collection, vectors
+
+def test_query_matches_exact_l2(tmp_path):
+    collection, vectors = _collection(tmp_path)
+    q = vectors[7] + 0.01
+    result = collection.query(query_embeddings=[q.tolist()], n_results=3,
+                              include=["documents", "metadatas", "distances"])
+    expected = np.argsort(np.sum((vectors - q) ** 2, axis=1))[:3]
+    assert result["ids"][0] == [f"c{i}" for i in expected]
+    assert result["documents"][0][0] == "chunk 7"
+    assert result["metadatas"][0][0] == {"file_id": "f3", "page": 7}
+    assert result["distances"][0] == pytest.approx(np.sum((vectors[expected] - q) ** 2, axis=1), abs=1e-4)
+
+def test_delete_update_and_reopen(tmp_path):
+    collection, vectors = _collection(tmp_path)
+    collection.delete(where={"file_id": "f1"})
+    collection.update(ids=["c0"], metadatas=[{"page": 100}])
+    assert collection.count() == 150
+    assert collection.get(ids=["c1"])["ids"] == []
+    assert len(collection.get(where={"file_id": {"$in": ["f0", "f1"]}})["ids"]) == 50
+
+    reopened = MmapVectorClient(str(tmp_path)).get_collection("product_p1")
+    assert reopened.count() == 150
+    assert reopened.get(ids=["c0"])["metadatas"] == [{"file_id": "f0", "page": 100}]
+    hits = reopened.query(query_embeddings=[vectors[1].tolist()], n_results=5)["ids"][0]
+    assert "c1" not in hits
+
+def test_segments_merge_and_old_files_go(tmp_path):
+    collection, _ = _collection(tmp_path)
+    segments = [p.name for p in tmp_path.joinpath("product_p1").iterdir() if p.name.startswith("seg-")]
+    assert len(segments) < 4
+    assert sorted(segments) == sorted(collection._refresh().manifest["segments"])
+
+def test_ivf_finds_the_nearest_neighbour(tmp_path, monkeypatch):
+    monkeypatch.setattr(vector_store, "IVF_MIN_ROWS", 100)
+    monkeypatch.setattr(vector_store, "IVF_NPROBE", 4)
+    collection, vectors = _collection(tmp_path, n=400)
+    assert all(s.ivf is not None for s in collection._refresh().segments)
+    hits = [collection.query(query_embeddings=[v.tolist()], n_results=1)["ids"][0][0] for v in vectors[:20]]
+    assert hits == [f"c{i}" for i in range(20)]
+
+def test_deleted_collection_raises(tmp_path):
+    client = MmapVectorClient(str(tmp_path))
+    collection, _ = _collection(tmp_path)
+    client.delete_collection("product_p1")
+    with pytest.raises(ValueError):
+        collection.count()
+    with pytest.raises(ValueError):
+        client.get_collection("product_p1")
+
+def test_wrong_dimension_is_rejected(tmp_path):
+    collection, _ = _collection(tmp_path)
+    with pytest.raises(ValueError, match="dimension"):
+        collection.upsert(ids=["x"], embeddings=_vectors(1, dim=8))
+    with pytest.raises(ValueError, match="dimension"):
+        collection.update(ids=["c0"], embeddings=_vectors(1, dim=8))
+    assert collection.count() == 200
+    assert collection.get(ids=["x"])["ids"] == []
+
+def test_ip_space_scores_are_similarities(tmp_path):
+    from app.services.rag_service import RetrievalResult
+    vectors = _vectors(20)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    collection = MmapVectorClient(str(tmp_path)).get_or_create_collection("ip", metadata={"hnsw:space": "ip"})
+    collection.add(ids=[f"id{i}" for i in range(20)], embeddings=vectors.tolist())
+    result = collection.query(query_embeddings=[vectors[3].tolist()], n_results=3, include=["distances"])
+    scores = RetrievalResult(collection, result["ids"][0], np.asarray(result["distances"][0]), space="ip").scores
+    assert result["ids"][0][0] == "id3"
+    assert scores[0] == pytest.approx(1.0, abs=1e-4)
+    assert scores[1] == pytest.approx(float(vectors[3] @ vectors[int(result["ids"][0][1][2:])]), abs=1e-4)
+
+def test_queries_during_compaction_see_whole_snapshots(tmp_path):
+    import threading
+    collection, vectors = _collection(tmp_path)
+    errors, done = [], threading.Event()
+
+    def read():
+        while not done.is_set():
+            try:
+                hits = collection.query(query_embeddings=[vectors[7].tolist()], n_results=1)
+                assert hits["ids"][0] == ["c7"]
+            except Exception as e:
+                errors.append(e)
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for t in readers:
+        t.start()
+    # Deletes leave tombstones that force segment rewrites and manifest swaps
+    for i in range(8, 200, 4):
+        collection.delete(ids=[f"c{i}", f"c{i + 1}"])
+        collection.update(ids=["c7"], metadatas=[{"file_id": "f3", "page": i}])
+    done.set()
+    for t in readers:
+        t.join()
+    assert errors == []
+    assert collection.count() == 104